@@ -7,7 +7,6 @@ import pandas as pd
 from datetime import datetime
 import hashlib
 import uuid
-import requests
 import json
 
 # ------------------------------------------------------------
@@ -16,16 +15,24 @@ import json
 
 try:
     import smartlog_blockchain as sb
+    from smartlog_ledger import Ledger
+    from smartlog_mempool import Mempool, PipelineConsenso
+    from smartlog_rede import chaves_publicas_dos_nos, consultar_no, enviar_para_nos, mapa_configurado
+    from smartlog_sync import sincronizar_espelhos
     from smartlog_blockchain import (
         criar_blockchain_inicial,
         criar_nos,
         validar_consenso,
+        validar_blockchain,
         simular_chaves_privadas,
         propor_bloco,
         votar_proposta,
+        verificar_assinatura,
+        verificar_assinaturas,
         aplicar_consenso,
+        bloco_da_proposta,
         detectar_no_corrompido,
-        recuperar_no,
+        recuperar_nos_divergentes,
         gerar_hash
     )
 
@@ -33,29 +40,37 @@ try:
     from web3_demo_simulado import mostrar_demo_web3
 
     from firebase_utils import (
-        salvar_blockchain_firestore,
-        carregar_blockchain_firestore,
-        limpar_blockchain_firestore
+        salvar_blockchain,
+        carregar_blockchain,
+        limpar_blockchain
     )
 
 except Exception as e:
     st.error(f"Erro ao carregar módulos internos: {e}")
 
     # fallbacks mínimos
+    from smartlog_ledger import Ledger
     def gerar_hash(c, p): return hashlib.sha256((c + p).encode()).hexdigest()
-    def criar_blockchain_inicial(df=None): return pd.DataFrame()
+    def criar_blockchain_inicial(df=None): return Ledger()
     def criar_nos(df): return {"Node_A": df}
     def validar_consenso(nos): return True
+    def validar_blockchain(b): return True
     def votar_proposta(p, nos, chaves): return p
     def aplicar_consenso(p, n, q): return True, "X"
+    def verificar_assinatura(c, h, a): return bool(a)
+    def verificar_assinaturas(itens): return [bool(a) for c, h, a in itens]
+    def bloco_da_proposta(p, i): return {}
+    def sincronizar_espelhos(espelhos, pares): return {}
+    def mapa_configurado(variavel): return {}
+    def chaves_publicas_dos_nos(nos_remotos, configuradas=None): return {}
     def simular_chaves_privadas(n): return {k: "key" for k in n}
     def detectar_no_corrompido(n): return []
-    def recuperar_no(n, h): return n
+    def recuperar_nos_divergentes(n, h): return {}
     def registrar_auditoria(*args): pass
     def mostrar_demo_web3(*args): pass
-    def salvar_blockchain_firestore(*args): pass
-    def carregar_blockchain_firestore(): return None
-    def limpar_blockchain_firestore(): pass
+    def salvar_blockchain(*args): pass
+    def carregar_blockchain(): return None
+    def limpar_blockchain(): pass
 
 
 # ============================================================
@@ -115,12 +130,18 @@ if "nos" not in st.session_state:
     eventos_df = pd.DataFrame(dados)
 
     if modo_operacao == "Simulado (local)":
-        blockchain_df = criar_blockchain_inicial(eventos_df)
-        nos = criar_nos(blockchain_df)
+        blockchain = criar_blockchain_inicial(eventos_df)
+        nos = criar_nos(blockchain)
         chaves = simular_chaves_privadas(nos)
     else:
-        nos = {n: pd.DataFrame() for n in NOS_REMOTOS}
-        chaves = {}
+        nos = {n: Ledger() for n in NOS_REMOTOS}
+        # Só as chaves públicas: cada nó remoto assina com a sua privada.
+        # CHAVES_PUBLICAS="Node_A=<hex>,..." fixa as chaves; as que faltarem
+        # vêm do /status de cada nó (nó sem chave não conta para o quorum)
+        chaves = chaves_publicas_dos_nos(NOS_REMOTOS, mapa_configurado("CHAVES_PUBLICAS"))
+
+        # Espelho local de cada nó: puxa a cadeia dele em páginas (todos ao mesmo tempo)
+        sincronizar_espelhos(nos, NOS_REMOTOS)
 
     st.session_state.nos = nos
     st.session_state.chaves = chaves
@@ -137,19 +158,32 @@ chaves = st.session_state.chaves
 # FUNÇÃO DE PROPOSTA REMOTA
 # ============================================================
 
-def propor_bloco_remoto(eventos, hash_anterior):
-    votos = {}
-    for nome, url in NOS_REMOTOS.items():
-        try:
-            resp = requests.post(
-                url + "/proposta",
-                json={"evento": eventos, "hash_anterior": hash_anterior},
-                timeout=5
-            )
-            votos[nome] = resp.json() if resp.status_code == 200 else {"erro": f"status {resp.status_code}"}
-        except Exception as e:
-            votos[nome] = {"erro": str(e)}
-    return votos
+def propor_bloco_remoto(proposta, quorum=None, chaves_publicas=None):
+    """
+    Envia a proposta a todos os nós em paralelo e retorna assim que
+    `quorum` assinaturas válidas chegarem (nós lentos não travam a
+    rodada). Cada nó recalcula o hash e só assina se ele estiver sobre
+    o seu topo; com chaves_publicas, só contam para o quorum as
+    assinaturas que conferem com a chave do nó.
+    """
+    validar = None
+    if chaves_publicas is not None:
+        def validar(nome, voto):
+            return verificar_assinatura(chaves_publicas.get(nome), proposta["hash_bloco"], voto.get("assinatura"))
+
+    return enviar_para_nos(
+        NOS_REMOTOS,
+        "/proposta",
+        {
+            "eventos": proposta["eventos"],
+            "hash_anterior": proposta["hash_anterior"],
+            "tx_id": proposta["tx_id_proposta"],
+            "hash_bloco": proposta["hash_bloco"]
+        },
+        quorum=quorum,
+        timeout=5,
+        validar=validar
+    )
 
 
 # ============================================================
@@ -178,18 +212,21 @@ with tab_main:
 
         col_status = st.columns(len(nos))
 
-        for i, (nome, df) in enumerate(nos.items()):
-            if len(df) == 0 or "hash_atual" not in df.columns:
-                h = "VAZIO"
-            else:
-                h = df.iloc[-1]["hash_atual"]
+        for i, (nome, ledger) in enumerate(nos.items()):
+            h = ledger.ultimo_hash or "VAZIO"
 
             col_status[i].metric(
                 label=f"Nó {nome}",
                 value=h[:12] + "..." if h != "VAZIO" else "VAZIO",
-                delta=f"Blocos: {len(df)}"
+                delta=f"Blocos: {len(ledger)}"
             )
 
+            # Validação incremental: só o sufixo novo é recalculado a cada rerun
+            if len(ledger) > 0:
+                col_status[i].caption(
+                    "Cadeia íntegra" if validar_blockchain(ledger) else "Cadeia inválida!"
+                )
+
     st.divider()
 
     # FORM PROPOSIÇÃO ----------------------------------------
@@ -222,28 +259,61 @@ with tab_main:
     if st.button("🚀 Iniciar Consenso", use_container_width=True):
 
         st.session_state.consenso_sucesso = False
+        falha = "❌ Quorum insuficiente. Bloco rejeitado."
 
         try:
 
             if modo_operacao == "Simulado (local)":
 
-                hash_anterior = nos[propositor].iloc[-1]["hash_atual"]
+                hash_anterior = nos[propositor].ultimo_hash
 
                 proposta = propor_bloco(propositor, lote, hash_anterior)
                 proposta = votar_proposta(proposta, nos, chaves)
                 sucesso, tx_id = aplicar_consenso(proposta, nos, quorum)
 
             else:
-                hash_anterior = "GENESIS"
-                votos = propor_bloco_remoto(lote, hash_anterior)
+                status_no = consultar_no(NOS_REMOTOS[propositor], "/status")
+                if "erro" in status_no:
+                    raise RuntimeError(f"{propositor} indisponível: {status_no['erro']}")
+
+                # Nós que estavam fora do ar na partida: busca a chave agora
+                faltando = {n: url for n, url in NOS_REMOTOS.items() if n not in chaves}
+                if faltando:
+                    chaves.update(chaves_publicas_dos_nos(faltando, mapa_configurado("CHAVES_PUBLICAS")))
+
+                proposta = propor_bloco(propositor, lote, status_no["ultimo_hash"])
+                votos = propor_bloco_remoto(proposta, quorum, chaves)
+
+                # Só contam assinaturas que conferem com a chave pública do nó
+                # (em lote; as já conferidas no fan-out saem do cache)
+                recebidas = {nome: voto.get("assinatura") for nome, voto in votos.items()}
+                validas = verificar_assinaturas(
+                    (chaves.get(nome), proposta["hash_bloco"], assinatura)
+                    for nome, assinatura in recebidas.items()
+                )
+                for (nome, assinatura), valida in zip(recebidas.items(), validas):
+                    proposta["assinaturas"][nome] = assinatura if valida else "Recusado"
+
+                sucesso = sum(a != "Recusado" for a in proposta["assinaturas"].values()) >= quorum
+
+                if sucesso:
+                    respostas = enviar_para_nos(
+                        NOS_REMOTOS, "/bloco",
+                        bloco_da_proposta(proposta, status_no["tamanho"])
+                    )
+                    # Nó que recusou (ou não respondeu) fica sem o bloco até o próximo catch-up
+                    recusas = {
+                        nome: r.get("motivo") or r.get("erro") or r.get("status")
+                        for nome, r in respostas.items()
+                        if r.get("status") not in ("OK", "IGNORADO")
+                    }
+                    for nome, motivo in recusas.items():
+                        st.warning(f"⚠️ {nome} não gravou o bloco: {motivo}")
 
-                proposta = {
-                    "propositor": propositor,
-                    "eventos": lote,
-                    "assinaturas": {k: v.get("assinatura", "?") for k, v in votos.items()},
-                    "hash_bloco": max([v.get("hash_bloco", "") for v in votos.values()])
-                }
-                sucesso = True
+                    if len(respostas) - len(recusas) < quorum:
+                        sucesso = False
+                        falha = f"❌ Bloco aprovado, mas gravado em menos de {quorum} nós."
+                    sincronizar_espelhos(nos, NOS_REMOTOS)
 
             if sucesso:
                 st.success("Novo bloco adicionado via consenso!")
@@ -257,7 +327,7 @@ with tab_main:
                 registrar_auditoria("Sistema", "consenso_aprovado", f"Bloco com {len(lote)} eventos")
 
             else:
-                st.error("❌ Quorum insuficiente. Bloco rejeitado.")
+                st.error(falha)
                 st.session_state.consenso_sucesso = False
 
         except Exception as e:
@@ -274,11 +344,11 @@ with tab_main:
 
         tabela = []
 
-        for nome, df in nos.items():
+        for nome, ledger in nos.items():
 
-            if len(df) >= 2:
-                h_ant = df.iloc[-2]["hash_atual"]
-                h_atu = df.iloc[-1]["hash_atual"]
+            if len(ledger) >= 2:
+                h_ant = ledger.bloco(-2)["hash_atual"]
+                h_atu = ledger.ultimo_hash
                 tabela.append({
                     "Nó": nome,
                     "Anterior": h_ant[:12] + "...",
@@ -286,7 +356,7 @@ with tab_main:
                     "Mudou?": "Sim" if h_ant != h_atu else "Não"
                 })
             else:
-                h = df.iloc[-1]["hash_atual"]
+                h = ledger.ultimo_hash or "VAZIO"
                 tabela.append({
                     "Nó": nome,
                     "Anterior": "-",
@@ -311,6 +381,44 @@ with tab_main:
             with st.container(border=True):
                 mostrar_demo_web3(st.session_state.ultimo_lote, st.session_state.ultimo_hash)
 
+    # --------------------------------------------------------
+    # CARGA EM LOTE (MEMPOOL)
+    # --------------------------------------------------------
+
+    if modo_operacao == "Simulado (local)":
+
+        st.divider()
+
+        with st.expander("Simulação de carga (mempool + rodadas consecutivas)"):
+
+            col_m1, col_m2 = st.columns(2)
+            with col_m1:
+                total_eventos = st.number_input("Eventos a injetar:", 100, 200_000, 5_000, step=100)
+            with col_m2:
+                tamanho_bloco = st.number_input("Eventos por bloco:", 1, 5_000, 100)
+
+            if st.button("⚡ Processar carga"):
+                mempool = Mempool(tamanho_bloco=int(tamanho_bloco))
+                mempool.adicionar_varios(
+                    {"id_entrega": f"C{i}", "etapa": "Em rota", "risco": "Baixo"}
+                    for i in range(int(total_eventos))
+                )
+
+                pipeline = PipelineConsenso(nos, chaves, mempool, quorum)
+                pipeline.drenar()
+                m = pipeline.metricas()
+
+                c1, c2, c3 = st.columns(3)
+                c1.metric("Eventos/s", f"{m['eventos_s']:,.0f}")
+                c2.metric("Blocos/s", f"{m['blocos_s']:,.0f}")
+                c3.metric("Latência p95", f"{m['latencia_p95_ms']:.1f} ms")
+                st.caption(
+                    f"{m['blocos']} blocos confirmados, {m['rejeitados']} rejeitados, "
+                    f"{m['pendentes']} eventos pendentes na mempool."
+                )
+
+                registrar_auditoria("Sistema", "carga_mempool", f"{m['eventos']} eventos em {m['blocos']} blocos")
+
 
 # ============================================================
 # ABA FRAUDE
@@ -333,24 +441,30 @@ with tab_fraude:
 
     with colB:
         if st.button("💣 Corromper nó"):
-            df = nos[node_target].copy()
+            ledger = nos[node_target].copy()
 
-            if len(df) == 0:
+            if len(ledger) == 0:
                 st.warning("Nó vazio — nada para corromper.")
             else:
-                idx = len(df) - 1
-                original = df.iloc[idx].to_dict()
+                idx = len(ledger) - 1
+                original = ledger.bloco(idx)
 
                 # CORRUPÇÃO
                 if tipo_corr == "Alterar último bloco (dados)":
-                    eventos_orig = df.at[idx, "eventos"]
-                    df.at[idx, "eventos"] = str(eventos_orig) + " 🚨 BLOCO ALTERADO"
-                    df.at[idx, "hash_atual"] = gerar_hash(df.at[idx, "eventos"], df.at[idx, "hash_anterior"])
+                    eventos_alt = str(original["eventos"]) + " 🚨 BLOCO ALTERADO"
+                    ledger.substituir(
+                        idx,
+                        eventos=eventos_alt,
+                        hash_atual=gerar_hash(eventos_alt, original["hash_anterior"])
+                    )
                 else:
-                    df.at[idx, "hash_atual"] = gerar_hash("ATAQUE_MALICIOSO", df.at[idx, "hash_anterior"])
+                    ledger.substituir(
+                        idx,
+                        hash_atual=gerar_hash("ATAQUE_MALICIOSO", original["hash_anterior"])
+                    )
 
-                nos[node_target] = df
-                mod = df.iloc[idx].to_dict()
+                nos[node_target] = ledger
+                mod = ledger.bloco(idx)
 
                 registrar_auditoria("Sistema", "no_corrompido", f"{node_target} corrompido")
 
@@ -392,10 +506,15 @@ with tab_fraude:
 
     if st.button("🧹 Recuperar nós corrompidos"):
         try:
-            ultimos = {n: df.iloc[-1]["hash_atual"] for n, df in nos.items()}
+            ultimos = {n: ledger.ultimo_hash for n, ledger in nos.items()}
             mais_frequente = max(set(ultimos.values()), key=list(ultimos.values()).count)
-            nos = recuperar_no(nos, mais_frequente)
+            relatorio = recuperar_nos_divergentes(nos, mais_frequente)
             st.success("Nós recuperados com sucesso!")
+            for n, r in relatorio.items():
+                st.write(
+                    f"{n}: {r['reescritos']} bloco(s) reescrito(s) e {r['descartados']} descartado(s) "
+                    f"a partir da altura {r['altura_comum']}"
+                )
             registrar_auditoria("Sistema", "no_recuperado", "Recuperação concluída.")
         except Exception as e:
             st.error(f"Erro ao recuperar: {e}")
@@ -405,8 +524,8 @@ with tab_fraude:
     # ============================================================
 
     if st.button("📊 Resumo dos nós"):
-        for n, df in nos.items():
-            st.markdown(f"### {n} — {len(df)} blocos")
-            st.dataframe(df.tail(2))
+        for n, ledger in nos.items():
+            st.markdown(f"### {n} — {len(ledger)} blocos")
+            st.dataframe(ledger.to_dataframe(inicio=max(len(ledger) - 2, 0)))
 
 
@@ -1,41 +1,151 @@
 # ===========================================================
-# 🧾 audit_logger.py — Controle de Logs e Auditoria (Firestore)
+# 🧾 audit_logger.py — Controle de Logs e Auditoria
 # ===========================================================
+# Os logs vão para o mesmo armazenamento da cadeia (obter_armazem):
+# Firestore (/auditoria_logs) quando há credenciais, senão SQLite
+# local — ver SMARTLOG_ARMAZENAMENTO em smartlog_armazenamento.
+#
+# registrar_auditoria não fala com o armazenamento: o log entra numa
+# fila limitada e uma thread (GravadorAuditoria) grava em lotes, a
+# cada INTERVALO_DESCARGA segundos, ao juntar TAMANHO_LOTE registros
+# ou no encerramento do processo. O último (acao, detalhes) fica em
+# memória para descartar duplicados consecutivos sem consultar nada.
 
+import atexit
 from datetime import datetime
-from firebase_utils import init_firebase
+import queue
+import threading
+
 import streamlit as st
-from firebase_admin import firestore  # ✅ Correção da importação
+
+from smartlog_armazenamento import obter_armazem
 
 APP_ID = "smartlog-simulador"
 
-@st.cache_resource
-def get_db():
-    return init_firebase()
+CAPACIDADE_FILA = 10_000    # registros aguardando gravação (cheia: quem registra espera)
+TAMANHO_LOTE = 100          # registros por escrita
+INTERVALO_DESCARGA = 1.0    # segundos entre descargas
 
-db = get_db()
 
-def registrar_auditoria(user_id: str, acao: str, detalhes: str):
+class GravadorAuditoria:
     """
-    Registra um evento de auditoria no Firestore.
-    Usa a coleção /auditoria_logs na raiz, para compatibilidade com versão anterior.
+    Gravação de auditoria em segundo plano. `armazem` é um
+    ArmazemBlocos; se None, usa obter_armazem() no primeiro lote.
+    Se uma escrita falha, o lote é mantido e tentado de novo no
+    próximo ciclo (nada é descartado).
     """
-    try:
-        # ✅ Caminho simplificado (raiz)
-        logs_ref = db.collection("auditoria_logs")
-
-        # 1️⃣ Obtém o último log para evitar duplicação consecutiva
-        q = logs_ref.order_by("timestamp", direction=firestore.Query.DESCENDING).limit(1)
-        ultimo_log = q.stream()
-        ultimo_doc = next(ultimo_log, None)
-
-        if ultimo_doc:
-            data = ultimo_doc.to_dict()
-            if data.get("acao") == acao and data.get("detalhes") == detalhes:
-                st.toast("⚠️ Log duplicado consecutivo detectado — ignorado.", icon="🚨")
+
+    def __init__(self, armazem=None, capacidade=CAPACIDADE_FILA,
+                 tamanho_lote=TAMANHO_LOTE, intervalo=INTERVALO_DESCARGA):
+        self._armazem = armazem
+        self._fila = queue.Queue(maxsize=capacidade)
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+
+        self._lock = threading.Lock()
+        self._ultimo = None             # (acao, detalhes) do último registro aceito
+        self._ultimo_gravado = None     # idem, lido do armazenamento no primeiro lote
+        self._acordar = threading.Event()
+        self._parar = False
+        self._thread = None
+
+        self._gravacao = threading.Condition()
+        self.enfileirados = 0
+        self.gravados = 0
+
+    @staticmethod
+    def _chave(registro):
+        return (registro.get("acao"), registro.get("detalhes")) if registro else None
+
+    def registrar(self, registro):
+        """Enfileira o registro. False se repetir o anterior (acao + detalhes)."""
+        chave = self._chave(registro)
+        with self._lock:
+            if chave == self._ultimo:
+                return False
+            self._ultimo = chave
+            self._iniciar()
+            self.enfileirados += 1
+            self._fila.put(registro)
+
+        if self._fila.qsize() >= self.tamanho_lote:
+            self._acordar.set()
+        return True
+
+    def _iniciar(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._laco, name="auditoria", daemon=True)
+            self._thread.start()
+
+    def _laco(self):
+        lote = []
+        while True:
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+            parar = self._parar
+
+            while True:
+                while len(lote) < self.tamanho_lote:
+                    try:
+                        lote.append(self._fila.get_nowait())
+                    except queue.Empty:
+                        break
+                if not lote:
+                    break
+                try:
+                    self._gravar(lote)
+                except Exception as e:
+                    print(f"ERRO DE AUDITORIA: {e}")
+                    break
+
+                with self._gravacao:
+                    self.gravados += len(lote)
+                    self._gravacao.notify_all()
+                lote = []
+
+            if parar:
                 return
 
-        # 2️⃣ Novo log
+    def _gravar(self, lote):
+        if self._armazem is None:
+            self._armazem = obter_armazem()
+
+        # Duplicado do último log de uma execução anterior: só o primeiro lote consulta
+        if self._ultimo_gravado is None:
+            anteriores = self._armazem.ler_auditoria(1)
+            self._ultimo_gravado = self._chave(anteriores[-1]) if anteriores else ()
+
+        novos = lote[1:] if self._chave(lote[0]) == self._ultimo_gravado else lote
+        if novos:
+            self._armazem.registrar_auditoria_varios(novos)
+        self._ultimo_gravado = self._chave(lote[-1])
+
+    def descarregar(self, timeout=None):
+        """Grava agora tudo o que já foi registrado. False se o timeout expirar."""
+        alvo = self.enfileirados
+        self._acordar.set()
+        with self._gravacao:
+            return self._gravacao.wait_for(lambda: self.gravados >= alvo, timeout)
+
+    def fechar(self, timeout=10):
+        """Descarrega a fila e encerra a thread."""
+        if self._thread is None:
+            return
+        self._parar = True
+        self._acordar.set()
+        self._thread.join(timeout)
+
+
+gravador = GravadorAuditoria()
+atexit.register(gravador.fechar)
+
+
+def registrar_auditoria(user_id: str, acao: str, detalhes: str):
+    """
+    Registra um evento de auditoria (gravação assíncrona, em lote).
+    Ignora um log idêntico (acao + detalhes) ao último registrado.
+    """
+    try:
         log = {
             "usuario": user_id,
             "acao": acao,
@@ -44,9 +154,23 @@ def registrar_auditoria(user_id: str, acao: str, detalhes: str):
             "origem": "Streamlit Cloud",
         }
 
-        logs_ref.add(log)
+        if not gravador.registrar(log):
+            st.toast("⚠️ Log duplicado consecutivo detectado — ignorado.", icon="🚨")
+            return
+
         st.toast(f"✅ Auditoria registrada: {acao}", icon="🔒")
 
     except Exception as e:
-        print(f"ERRO DE AUDITORIA FIREBASE: {e}")
-        st.error("❌ Erro ao registrar auditoria. Verifique a configuração do Firestore e os índices.")
+        print(f"ERRO DE AUDITORIA: {e}")
+        st.error("❌ Erro ao registrar auditoria. Verifique a configuração do armazenamento.")
+
+
+def consultar_auditoria(inicio=None, fim=None, acao=None, limite=None):
+    """
+    Registros com inicio <= timestamp < fim (ISO) e a ação, se dada —
+    ex.: consultar_auditoria("2024-03-01", "2024-03-08", "no_recuperado").
+    Grava antes o que ainda está na fila. Conferir com
+    smartlog_auditoria.verificar_auditoria(..., contiguo=False).
+    """
+    gravador.descarregar(timeout=5)
+    return obter_armazem().consultar_auditoria(inicio, fim, acao, limite)
@@ -0,0 +1,108 @@
+# ===========================================================
+# bench_assinaturas.py — Assinatura e verificação Ed25519 dos votos PoA
+# ===========================================================
+# Para 3, 21 e 100 validadores, mede:
+#   - assinar: votos assinados por segundo;
+#   - verificar 1 a 1: cada voto decodifica a chave pública e verifica
+#     (como um verificador sem estado faria);
+#   - lote frio / quente: verificar_assinaturas sobre todas as
+#     assinaturas da cadeia, com o cache vazio e na re-auditoria;
+#   - rodadas/s: votar_proposta + aplicar_consenso completos.
+#
+# Uso:  python bench_assinaturas.py [--validadores 3 21 100] [--blocos 200]
+# ===========================================================
+
+import argparse
+import time
+
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+
+import smartlog_blockchain
+from smartlog_blockchain import (
+    aplicar_consenso,
+    assinar_bloco,
+    chaves_publicas_de,
+    criar_blockchain_inicial,
+    criar_nos,
+    localizar_bloco_sem_quorum,
+    propor_bloco,
+    simular_chaves_privadas,
+    verificar_assinaturas,
+    votar_proposta,
+)
+
+
+def verificar_um_a_um(itens):
+    for chave, hash_bloco, assinatura in itens:
+        Ed25519PublicKey.from_public_bytes(bytes.fromhex(chave)).verify(
+            bytes.fromhex(assinatura), hash_bloco.encode()
+        )
+
+
+def medir(validadores, total_blocos):
+    nos = criar_nos(criar_blockchain_inicial(), validadores)
+    chaves = simular_chaves_privadas(nos)
+    publicas = chaves_publicas_de(chaves)
+    quorum = validadores * 2 // 3 + 1
+
+    # Rodadas completas: propor → votar (assinar) → aplicar (verificar em lote)
+    smartlog_blockchain._assinatura_confere.cache_clear()
+    t0 = time.perf_counter()
+    for i in range(total_blocos):
+        proposta = propor_bloco("Node_A", [{"id_entrega": i}], nos["Node_A"].ultimo_hash)
+        assert aplicar_consenso(votar_proposta(proposta, nos, chaves), nos, quorum, publicas)[0]
+    t_rodadas = time.perf_counter() - t0
+
+    ledger = nos["Node_A"]
+    votos = [
+        (n, b["hash_atual"], a)
+        for b in ledger if isinstance(b.get("assinaturas"), dict)
+        for n, a in b["assinaturas"].items()
+    ]
+    itens = [(publicas[n], h, a) for n, h, a in votos]
+    total = len(itens)
+
+    t0 = time.perf_counter()
+    for n, hash_bloco, _ in votos:
+        assinar_bloco(chaves[n], hash_bloco)
+    t_assinar = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    verificar_um_a_um(itens)
+    t_um_a_um = time.perf_counter() - t0
+
+    smartlog_blockchain._assinatura_confere.cache_clear()
+    t0 = time.perf_counter()
+    assert all(verificar_assinaturas(itens))
+    t_frio = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    assert localizar_bloco_sem_quorum(ledger, publicas, quorum) is None
+    t_quente = time.perf_counter() - t0
+
+    return {
+        "assinaturas": total,
+        "assinar": total / t_assinar,
+        "um_a_um": total / t_um_a_um,
+        "lote_frio": total / t_frio,
+        "lote_quente": total / t_quente,
+        "rodadas": total_blocos / t_rodadas,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--validadores", type=int, nargs="+", default=[3, 21, 100])
+    parser.add_argument("--blocos", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'validadores':>11} | {'assinaturas':>11} | {'assinar/s':>10} | {'1 a 1/s':>10} | "
+          f"{'lote frio/s':>11} | {'lote quente/s':>13} | {'rodadas/s':>9}")
+    for validadores in args.validadores:
+        r = medir(validadores, args.blocos)
+        print(f"{validadores:>11} | {r['assinaturas']:>11,} | {r['assinar']:>10,.0f} | {r['um_a_um']:>10,.0f} | "
+              f"{r['lote_frio']:>11,.0f} | {r['lote_quente']:>13,.0f} | {r['rodadas']:>9,.1f}")
+
+
+if __name__ == "__main__":
+    main()
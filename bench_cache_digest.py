@@ -0,0 +1,79 @@
+# ===========================================================
+# bench_cache_digest.py — Auditorias repetidas de uma cadeia estável
+# ===========================================================
+# Valida por inteiro (incremental=False) a mesma cadeia várias vezes,
+# como nas re-execuções do app e na auditoria dos nós, com o cache
+# de digests frio, quente e desligado, e confere que um bloco
+# adulterado depois do cache aquecido continua sendo detectado.
+#
+# Uso:  python bench_cache_digest.py [--blocos 20000] [--eventos 10] [--passadas 3]
+# ===========================================================
+
+import argparse
+import time
+
+from smartlog_blockchain import (
+    bloco_da_proposta,
+    cache_digest,
+    criar_blockchain_inicial,
+    localizar_bloco_invalido,
+    propor_bloco,
+)
+
+
+def gerar_cadeia(total_blocos, eventos_por_bloco):
+    ledger = criar_blockchain_inicial()
+    for i in range(total_blocos):
+        lote = [{"id_entrega": i * eventos_por_bloco + j, "etapa": "Em rota", "risco": "Baixo"}
+                for j in range(eventos_por_bloco)]
+        ledger.append(bloco_da_proposta(propor_bloco("Node_A", lote, ledger.ultimo_hash), len(ledger)))
+    return ledger
+
+
+def auditar(ledger):
+    t0 = time.perf_counter()
+    ruim = localizar_bloco_invalido(ledger, incremental=False)
+    return time.perf_counter() - t0, ruim
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocos", type=int, default=20_000)
+    parser.add_argument("--eventos", type=int, default=10)
+    parser.add_argument("--passadas", type=int, default=3)
+    args = parser.parse_args()
+
+    ledger = gerar_cadeia(args.blocos, args.eventos)
+    cache_digest.capacidade = max(cache_digest.capacidade, len(ledger))
+
+    print(f"Cadeia de {len(ledger):,} blocos ({args.eventos} eventos/bloco)\n")
+    print(f"{'passada':<22} | {'tempo':>9} | {'blocos/s':>11} | {'acertos':>8} | {'falhas':>8}")
+
+    def linha(rotulo, segundos):
+        e = cache_digest.estatisticas()
+        print(f"{rotulo:<22} | {segundos * 1000:>7.1f}ms | {len(ledger) / segundos:>11,.0f} | "
+              f"{e['acertos']:>8,} | {e['falhas']:>8,}")
+
+    # Sem cache: capacidade zero descarta tudo
+    capacidade = cache_digest.capacidade
+    cache_digest.limpar()
+    cache_digest.capacidade = 0
+    linha("sem cache", auditar(ledger)[0])
+
+    cache_digest.capacidade = capacidade
+    cache_digest.limpar()
+    for p in range(args.passadas):
+        linha("fria" if p == 0 else f"quente #{p}", auditar(ledger)[0])
+
+    # Adulteração depois do cache quente
+    alvo = len(ledger) // 2
+    original = ledger.bloco(alvo)["eventos"]
+    ledger.substituir(alvo, eventos=original.replace("Em rota", "Extraviado", 1))
+    segundos, ruim = auditar(ledger)
+    linha("com bloco adulterado", segundos)
+    assert ruim == alvo, ruim
+    print(f"\nAdulteração detectada na altura {ruim}.")
+
+
+if __name__ == "__main__":
+    main()
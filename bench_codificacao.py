@@ -0,0 +1,107 @@
+# ===========================================================
+# bench_codificacao.py — Serializar + hash dos blocos de consenso
+# ===========================================================
+# Compara a codificação canônica (eventos serializados uma vez, JSON
+# do bloco montado das mesmas formas, folhas recortadas do texto na
+# validação) com o caminho anterior:
+#   - proposta: json.dumps do lote para gravar + _json_ordenado por
+#     evento para a raiz Merkle;
+#   - validação: json.loads do bloco + _json_ordenado por evento.
+#
+# Uso:  python bench_codificacao.py [--blocos 20000] [--eventos 1 10 100]
+# ===========================================================
+
+import argparse
+import json
+import time
+import uuid
+
+from smartlog_blockchain import (
+    _json_ordenado,
+    bloco_da_proposta,
+    gerar_hash,
+    propor_bloco,
+    recalcular_hash_bloco,
+)
+from smartlog_merkle import hash_folha, raiz_merkle
+
+
+def gerar_lote(tamanho, deslocamento=0):
+    return [
+        {"id_entrega": deslocamento + i, "etapa": "Em rota", "risco": "Baixo",
+         "cidade": "São Paulo", "timestamp": "2024-01-01T00:00:00", "transportadora": "SmartLog"}
+        for i in range(tamanho)
+    ]
+
+
+# Caminho anterior (referência)
+
+def bloco_legado(lote, hash_anterior, bloco_id):
+    tx_id = str(uuid.uuid4())
+    merkle_raiz = raiz_merkle([hash_folha(_json_ordenado(e)) for e in lote])
+    return {
+        "bloco_id": bloco_id,
+        "eventos": json.dumps(lote, ensure_ascii=False),
+        "hash_anterior": hash_anterior,
+        "hash_atual": gerar_hash(f"{merkle_raiz}-{tx_id}", hash_anterior),
+        "merkle_raiz": merkle_raiz,
+        "tx_id": tx_id,
+    }
+
+
+def recalcular_legado(eventos, hash_anterior, tx_id, merkle_raiz):
+    eventos = json.loads(eventos)
+    if raiz_merkle([hash_folha(_json_ordenado(e)) for e in eventos]) != merkle_raiz:
+        return None
+    return gerar_hash(f"{merkle_raiz}-{tx_id}", hash_anterior)
+
+
+# Caminho atual
+
+def bloco_canonico(lote, hash_anterior, bloco_id):
+    return bloco_da_proposta(propor_bloco("Node_A", lote, hash_anterior), bloco_id)
+
+
+def medir(total_blocos, eventos_por_bloco):
+    lotes = [gerar_lote(eventos_por_bloco, i * eventos_por_bloco) for i in range(total_blocos)]
+    resultado = {}
+
+    for rotulo, criar, recalcular in (
+        ("antes", bloco_legado, recalcular_legado),
+        ("depois", bloco_canonico, recalcular_hash_bloco),
+    ):
+        t0 = time.perf_counter()
+        blocos, hash_anterior = [], "GENESIS"
+        for i, lote in enumerate(lotes):
+            bloco = criar(lote, hash_anterior, i + 1)
+            blocos.append(bloco)
+            hash_anterior = bloco["hash_atual"]
+        t_criar = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for b in blocos:
+            assert recalcular(b["eventos"], b["hash_anterior"], b["tx_id"], b["merkle_raiz"]) == b["hash_atual"]
+        t_validar = time.perf_counter() - t0
+
+        resultado[rotulo] = (total_blocos / t_criar, total_blocos / t_validar)
+
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocos", type=int, default=20_000)
+    parser.add_argument("--eventos", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+
+    print(f"{'eventos/bloco':>13} | {'etapa':<9} | {'antes (blocos/s)':>16} | {'depois (blocos/s)':>17} | {'ganho':>6}")
+    for eventos in args.eventos:
+        blocos = max(1, args.blocos // eventos)
+        r = medir(blocos, eventos)
+        for j, etapa in enumerate(("proposta", "validação")):
+            antes, depois = r["antes"][j], r["depois"][j]
+            print(f"{eventos:>13} | {etapa:<9} | {antes:>16,.0f} | {depois:>17,.0f} | {depois / antes:>5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# ===========================================================
+# bench_importacao.py — Tempo de importação (partida a frio)
+# ===========================================================
+# Mede, em processos novos, quanto custa importar cada caminho de
+# código e confere que nenhum deles carrega o SDK do Firebase: o
+# cliente só deve ser criado na primeira chamada à nuvem.
+#
+# "app" são os módulos que o app_streamlit importa (lidos do próprio
+# arquivo). Sai com código 1 se algum caminho passar do orçamento
+# ou carregar o Firebase.
+#
+# Uso:  python bench_importacao.py [--repeticoes 5] [--orcamento-app 1500]
+# ===========================================================
+
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+# Módulos cuja presença em sys.modules indica que o Firebase foi carregado
+MODULOS_FIREBASE = ("firebase_admin", "google.cloud.firestore")
+
+MEDIR = """
+import json, sys, time
+t0 = time.perf_counter()
+for nome in {modulos!r}:
+    __import__(nome)
+segundos = time.perf_counter() - t0
+print(json.dumps({{
+    "ms": segundos * 1000,
+    "firebase": [m for m in {firebase!r} if m in sys.modules],
+}}))
+"""
+
+
+def modulos_do_app():
+    """Módulos importados no nível do app_streamlit.py (inclusive no try)."""
+    with open(os.path.join(RAIZ, "app_streamlit.py"), encoding="utf-8") as f:
+        arvore = ast.parse(f.read())
+
+    modulos = []
+    for no in arvore.body:
+        corpo = no.body if isinstance(no, ast.Try) else [no]
+        for instrucao in corpo:
+            if isinstance(instrucao, ast.Import):
+                modulos += [a.name for a in instrucao.names]
+            elif isinstance(instrucao, ast.ImportFrom) and instrucao.module:
+                modulos.append(instrucao.module)
+    return list(dict.fromkeys(modulos))
+
+
+def medir(modulos, repeticoes):
+    """Mediana do tempo de importação em `repeticoes` processos novos."""
+    codigo = MEDIR.format(modulos=list(modulos), firebase=MODULOS_FIREBASE)
+    # Sem credenciais no ambiente: qualquer inicialização na importação falharia
+    env = dict(os.environ, PYTHONPATH=RAIZ, ARMAZENAMENTO="memoria", SMARTLOG_ARMAZENAMENTO="memoria")
+
+    tempos, firebase = [], set()
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, "-c", codigo], cwd=RAIZ, env=env,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1]
+        r = json.loads(saida)
+        tempos.append(r["ms"])
+        firebase.update(r["firebase"])
+    return statistics.median(tempos), sorted(firebase)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--orcamento-app", type=float, default=1500,
+                        help="ms para importar tudo que o app importa")
+    parser.add_argument("--orcamento-no", type=float, default=1200,
+                        help="ms para importar o nó PoA (no_poa_server)")
+    args = parser.parse_args()
+
+    caminhos = [
+        ("smartlog_blockchain", ["smartlog_blockchain"], None),
+        ("smartlog_armazenamento", ["smartlog_armazenamento"], None),
+        ("firebase_utils", ["firebase_utils"], None),
+        ("audit_logger", ["audit_logger"], None),
+        ("no_poa_server", ["no_poa_server"], args.orcamento_no),
+        ("app (todos os módulos)", modulos_do_app(), args.orcamento_app),
+    ]
+
+    print(f"{'caminho':<26} | {'mediana':>9} | {'orçamento':>9} | firebase carregado")
+    falhas = 0
+    for rotulo, modulos, orcamento in caminhos:
+        ms, firebase = medir(modulos, args.repeticoes)
+        estourou = orcamento is not None and ms > orcamento
+        falhas += bool(firebase) + estourou
+        limite = f"{orcamento:>7.0f}ms" if orcamento else f"{'-':>9}"
+        print(f"{rotulo:<26} | {ms:>7.0f}ms | {limite} | "
+              f"{', '.join(firebase) or 'não'}{'  ← acima do orçamento' if estourou else ''}")
+
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# ===========================================================
+# bench_ledger.py — Vazão de commit do ledger colunar
+# ===========================================================
+# Mede quantos blocos/s o fluxo PoA consegue confirmar em 3 nós
+# para cadeias de 10k, 100k e 1M blocos, e compara com o modelo
+# antigo (pd.concat por bloco) em tamanhos pequenos.
+#
+# Uso:  python bench_ledger.py [--tamanhos 10000 100000 1000000]
+# ===========================================================
+
+import argparse
+import time
+
+import pandas as pd
+
+from smartlog_blockchain import (
+    aplicar_consenso,
+    criar_blockchain_inicial,
+    criar_nos,
+    propor_bloco,
+    simular_chaves_privadas,
+    votar_proposta,
+)
+
+EVENTO = [{"id_entrega": 1, "etapa": "Em rota", "risco": "Baixo"}]
+
+
+def medir_ledger(total_blocos, total_nos=3):
+    """Confirma `total_blocos` blocos e devolve (s_consenso, s_total)."""
+    nos = criar_nos(criar_blockchain_inicial(), total_nos)
+    chaves = simular_chaves_privadas(nos)
+    propositor = next(iter(nos))
+
+    t_consenso = 0.0
+    inicio = time.perf_counter()
+    for _ in range(total_blocos):
+        proposta = propor_bloco(propositor, EVENTO, nos[propositor].ultimo_hash)
+        proposta = votar_proposta(proposta, nos, chaves)
+
+        t0 = time.perf_counter()
+        aplicar_consenso(proposta, nos)
+        t_consenso += time.perf_counter() - t0
+
+    return t_consenso, time.perf_counter() - inicio
+
+
+def medir_pandas_concat(total_blocos, total_nos=3):
+    """Modelo antigo: um pd.concat por nó a cada bloco confirmado."""
+    base = criar_blockchain_inicial().to_dataframe()
+    nos = {f"Node_{chr(65 + i)}": base.copy() for i in range(total_nos)}
+
+    inicio = time.perf_counter()
+    for i in range(total_blocos):
+        for nome, df in nos.items():
+            bloco = {"bloco_id": len(df), "hash_atual": str(i)}
+            nos[nome] = pd.concat([df, pd.DataFrame([bloco])], ignore_index=True)
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--legado", type=int, default=500,
+                        help="blocos para o comparativo com pd.concat (0 desativa)")
+    args = parser.parse_args()
+
+    print(f"{'blocos':>10} | {'consenso blk/s':>15} | {'rodada blk/s':>13} | {'total (s)':>9}")
+    for n in args.tamanhos:
+        t_consenso, t_total = medir_ledger(n)
+        print(f"{n:>10} | {n / t_consenso:>15,.0f} | {n / t_total:>13,.0f} | {t_total:>9.2f}")
+
+    if args.legado:
+        t = medir_pandas_concat(args.legado)
+        print(f"\npd.concat (legado) com {args.legado} blocos: {args.legado / t:,.0f} blk/s ({t:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# ===========================================================
+# bench_mempool.py — Tamanho de bloco × vazão × latência
+# ===========================================================
+# Injeta eventos a uma taxa fixa (eventos/s) durante alguns segundos
+# e confirma blocos via mempool + rodadas PoA consecutivas, para
+# cada tamanho de bloco pedido.
+#
+# Uso:  python bench_mempool.py [--taxa 5000] [--duracao 3] [--tamanhos 1 10 100 1000]
+# ===========================================================
+
+import argparse
+import time
+
+from smartlog_blockchain import criar_blockchain_inicial, criar_nos, simular_chaves_privadas
+from smartlog_mempool import Mempool, PipelineConsenso
+
+
+def simular(taxa, duracao, tamanho_bloco, tempo_max, total_nos=3):
+    nos = criar_nos(criar_blockchain_inicial(), total_nos)
+    chaves = simular_chaves_privadas(nos)
+    mempool = Mempool(tamanho_bloco=tamanho_bloco, tempo_max=tempo_max)
+    pipeline = PipelineConsenso(nos, chaves, mempool)
+
+    inicio = time.perf_counter()
+    enviados = 0
+
+    while True:
+        agora = time.perf_counter() - inicio
+        if agora >= duracao:
+            break
+
+        # Eventos que já "chegaram" até agora
+        devidos = int(agora * taxa)
+        mempool.adicionar_varios(
+            {"id_entrega": i, "etapa": "Em rota", "risco": "Baixo"} for i in range(enviados, devidos)
+        )
+        enviados = devidos
+
+        pipeline.processar_prontos()
+
+    pipeline.drenar()
+    return pipeline.metricas(time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--taxa", type=int, default=5000, help="eventos/s injetados")
+    parser.add_argument("--duracao", type=float, default=3.0, help="segundos por cenário")
+    parser.add_argument("--tempo-max", type=float, default=0.2, help="espera máxima na mempool (s)")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1, 10, 100, 1000])
+    args = parser.parse_args()
+
+    print(f"Taxa de entrada: {args.taxa:,} eventos/s por {args.duracao}s\n")
+    print(f"{'bloco':>6} | {'eventos/s':>10} | {'blocos/s':>9} | {'lat. média':>10} | {'p50':>8} | {'p95':>8} | {'máx':>8}")
+
+    for tam in args.tamanhos:
+        m = simular(args.taxa, args.duracao, tam, args.tempo_max)
+        print(
+            f"{tam:>6} | {m['eventos_s']:>10,.0f} | {m['blocos_s']:>9,.0f} | "
+            f"{m['latencia_media_ms']:>8.1f}ms | {m['latencia_p50_ms']:>6.1f}ms | "
+            f"{m['latencia_p95_ms']:>6.1f}ms | {m['latencia_max_ms']:>6.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# ===========================================================
+# bench_sync.py — Tempo de catch-up de um nó atrasado
+# ===========================================================
+# Sobe K nós (no_poa_async) com a mesma cadeia de N blocos e mede
+# quanto um nó vazio leva para alcançá-los:
+#   - por bloco: uma requisição por bloco (amostra, extrapolada);
+#   - em páginas, de 1 par e de todos os pares em paralelo.
+#
+# Uso:  python bench_sync.py [--blocos 100000] [--pares 3] [--pagina 5000]
+# ===========================================================
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from smartlog_armazenamento import ArmazemArquivo
+from smartlog_rede import consultar_no
+from smartlog_sync import sincronizar
+from smartlog_wal import LogBlocos
+
+PORTA_BASE = 5600
+
+
+def gerar_cadeia(caminho, total):
+    log = LogBlocos(caminho, fsync_a_cada=total)
+    hash_anterior = "GENESIS"
+    lote = []
+
+    for i in range(total):
+        eventos = json.dumps([
+            {"id_entrega": i * 3 + j, "etapa": "Em rota", "risco": "Baixo"} for j in range(3)
+        ])
+        hash_atual = hashlib.sha256(f"{eventos}{hash_anterior}".encode()).hexdigest()
+        lote.append({
+            "bloco_id": i, "eventos": eventos, "timestamp": "2024-01-01T00:00:00Z",
+            "hash_anterior": hash_anterior, "hash_atual": hash_atual, "tx_id": f"tx-{i}",
+        })
+        hash_anterior = hash_atual
+
+        if len(lote) == 10000:
+            log.anexar_varios(lote)
+            lote = []
+
+    log.anexar_varios(lote)
+    log.fechar()
+    return hash_anterior
+
+
+def subir_pares(diretorio, origem, total_pares):
+    pares, processos = {}, []
+    raiz = os.path.dirname(os.path.abspath(__file__))
+
+    for k in range(total_pares):
+        nome = f"Par_{k}"
+        caminho = os.path.join(diretorio, f"{nome}.jsonl")
+        shutil.copy(origem, caminho)
+
+        env = dict(os.environ, NOME_NO=nome, PORT=str(PORTA_BASE + k), ARQUIVO_LOG=caminho, PARES="", NO_UNICO="1")
+        processos.append(subprocess.Popen(
+            [sys.executable, os.path.join(raiz, "no_poa_async.py")],
+            env=env, cwd=diretorio, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        ))
+        pares[nome] = f"http://127.0.0.1:{PORTA_BASE + k}"
+
+    # Espera todos responderem
+    for url in pares.values():
+        for _ in range(600):
+            if "erro" not in consultar_no(url, "/status", timeout=1):
+                break
+            time.sleep(0.1)
+
+    return pares, processos
+
+
+def novo_destino(diretorio, nome):
+    caminho = os.path.join(diretorio, nome)
+    if os.path.exists(caminho):
+        os.remove(caminho)
+    return ArmazemArquivo(caminho, fsync_a_cada=1_000_000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocos", type=int, default=100_000)
+    parser.add_argument("--pares", type=int, default=3)
+    parser.add_argument("--pagina", type=int, default=5000)
+    parser.add_argument("--amostra-por-bloco", type=int, default=1000,
+                        help="blocos medidos no modo uma-requisição-por-bloco")
+    args = parser.parse_args()
+
+    diretorio = tempfile.mkdtemp(prefix="bench_sync_")
+    origem = os.path.join(diretorio, "origem.jsonl")
+
+    print(f"Gerando cadeia de {args.blocos:,} blocos...")
+    topo = gerar_cadeia(origem, args.blocos)
+    megabytes = os.path.getsize(origem) / 1e6
+
+    pares, processos = subir_pares(diretorio, origem, args.pares)
+    try:
+        print(f"{args.pares} pares no ar; lacuna de {args.blocos:,} blocos ({megabytes:.1f} MB de JSON)\n")
+        print(f"{'modo':<28} | {'tempo':>9} | {'blocos/s':>10} | {'MB/s':>7}")
+
+        # Uma requisição por bloco (amostra, extrapolada para a lacuna inteira)
+        amostra = min(args.amostra_por_bloco, args.blocos)
+        destino = novo_destino(diretorio, "por_bloco.jsonl")
+        par = dict(list(pares.items())[:1])
+        t0 = time.perf_counter()
+        for h in range(amostra):
+            destino.anexar_varios_se_novos(
+                consultar_no(par[next(iter(par))], "/blocos", params={"from": h, "to": h + 1})["blocos"]
+            )
+        por_bloco = (time.perf_counter() - t0) / amostra
+        destino.fechar()
+        estimado = por_bloco * args.blocos
+        print(f"{'por bloco (extrapolado)':<28} | {estimado:>8.1f}s | {1 / por_bloco:>10,.0f} | {megabytes / estimado:>7.1f}")
+
+        cenarios = [("páginas, 1 par", par), (f"páginas, {len(pares)} pares", pares)]
+        for rotulo, fontes in cenarios:
+            destino = novo_destino(diretorio, "paginado.jsonl")
+            r = sincronizar(destino, fontes, tamanho_pagina=args.pagina)
+            assert destino.status() == (args.blocos, topo), (destino.status(), r["erros"])
+            destino.fechar()
+            print(f"{rotulo:<28} | {r['segundos']:>8.2f}s | {r['blocos_s']:>10,.0f} | {megabytes / r['segundos']:>7.1f}")
+    finally:
+        for p in processos:
+            p.terminate()
+        for p in processos:
+            p.wait()
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
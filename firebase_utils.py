@@ -2,12 +2,21 @@
 # ☁️ firebase_utils.py — Integração segura com Firestore
 # ============================================================
 # Compatível com Streamlit Cloud (sem arquivo .json físico)
+#
+# Nada é inicializado na importação: o SDK do Firebase (~0,5 s só
+# para importar) e o cliente Firestore são carregados na primeira
+# chamada que realmente fala com a nuvem. Importar este módulo é
+# barato e funciona offline.
+#
+# A cadeia do app é salva no armazenamento compartilhado
+# (smartlog_armazenamento.obter_armazem) — o mesmo da auditoria e do
+# nó: Firestore quando há credenciais, senão local (SQLite/arquivo),
+# conforme SMARTLOG_ARMAZENAMENTO.
 # ============================================================
 
 import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, firestore
-import pandas as pd
+
+from smartlog_armazenamento import carregar_ledger, obter_armazem, salvar_ledger
 
 
 @st.cache_resource
@@ -16,6 +25,9 @@ def init_firebase():
     Inicializa o Firebase usando credenciais do Streamlit Secrets
     (ou fallback local, se estiver rodando em ambiente de desenvolvimento).
     """
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
     if not firebase_admin._apps:
         try:
             # 🔹 Lê as credenciais do secrets (configuradas no Streamlit Cloud)
@@ -36,57 +48,56 @@ def init_firebase():
     return firestore.client()
 
 
-# Inicializa Firestore (global)
-db = init_firebase()
+def obter_db():
+    """Cliente Firestore, criado na primeira chamada (cache do Streamlit)."""
+    return init_firebase()
 
 
 # ============================================================
 # 🔹 Funções de sincronização da blockchain
 # ============================================================
+# No Firestore: blockchains/rede_principal (metadados) + subcoleção
+# blocos/<altura inicial> com até BLOCOS_POR_CHUNK blocos e BYTES_POR_CHUNK bytes cada.
 
-def salvar_blockchain_firestore(df_blockchain):
-    """Salva o dataframe da blockchain no Firestore (corrigido para timestamps)."""
+def salvar_blockchain(blockchain):
+    """
+    Salva a blockchain (Ledger ou DataFrame) no armazenamento
+    configurado; só o que passou da última altura salva é enviado.
+    """
     try:
-        df_safe = df_blockchain.copy()
-
-        # 🔹 Converte timestamps problemáticos (datetime/NaT) em string
-        if "timestamp" in df_safe.columns:
-            df_safe["timestamp"] = df_safe["timestamp"].astype(str)
+        relatorio = salvar_ledger(obter_armazem(), blockchain)
 
-        # 🔹 Converte para lista de dicionários
-        data = df_safe.to_dict(orient="records")
-
-        # 🔹 Salva no Firestore (documento fixo 'rede_principal')
-        db.collection("blockchains").document("rede_principal").set({
-            "dados": data,
-            "timestamp": firestore.SERVER_TIMESTAMP
-        })
-
-        st.success("✅ Blockchain salva no Firestore com sucesso!")
+        st.success(
+            f"✅ Blockchain salva: {relatorio['blocos_enviados']} blocos enviados "
+            f"(altura {relatorio['altura']})."
+        )
+        return relatorio
     except Exception as e:
-        st.error(f"❌ Erro ao salvar blockchain no Firestore: {e}")
+        st.error(f"❌ Erro ao salvar blockchain: {e}")
 
 
-def carregar_blockchain_firestore():
-    """Carrega a blockchain da nuvem."""
+def carregar_blockchain():
+    """Carrega a blockchain salva (Ledger), ou None se não houver."""
     try:
-        doc = db.collection("blockchains").document("rede_principal").get()
-        if doc.exists:
-            data = doc.to_dict().get("dados", [])
-            if data:
-                return pd.DataFrame(data)
-        st.warning("⚠️ Nenhuma blockchain encontrada no Firestore.")
-        return None
+        ledger = carregar_ledger(obter_armazem())
+        if ledger is None:
+            st.warning("⚠️ Nenhuma blockchain salva encontrada.")
+        return ledger
     except Exception as e:
         st.error(f"❌ Erro ao carregar blockchain: {e}")
         return None
 
 
-def limpar_blockchain_firestore():
-    """Remove a blockchain da nuvem."""
+def limpar_blockchain():
+    """Remove os blocos salvos (a auditoria é mantida)."""
     try:
-        db.collection("blockchains").document("rede_principal").delete()
-        st.warning("🧹 Blockchain removida do Firestore!")
+        obter_armazem().limpar()
+        st.warning("🧹 Blockchain salva removida!")
     except Exception as e:
-        st.error(f"❌ Erro ao limpar Firestore: {e}")
+        st.error(f"❌ Erro ao limpar blockchain: {e}")
+
 
+# Nomes anteriores (compatibilidade)
+salvar_blockchain_firestore = salvar_blockchain
+carregar_blockchain_firestore = carregar_blockchain
+limpar_blockchain_firestore = limpar_blockchain
@@ -0,0 +1,140 @@
+# ============================================================
+# ⚡ Servidor assíncrono (Starlette/uvicorn) — Nó PoA do SmartLog
+# ============================================================
+# Mesmas rotas e mesma lógica do no_poa_server (Flask), num loop
+# asyncio: o acesso ao armazenamento roda no threadpool e o
+# intervalo da cadeia (/blocos?from&to) é enviado em streaming,
+# página por página, sem montar a resposta inteira na memória.
+#
+# Uso:  NOME_NO=Node_A PORT=5000 python no_poa_async.py
+#       (ou: uvicorn no_poa_async:app --port 5000)
+# ============================================================
+import contextlib
+import json
+import os
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+import no_poa_server as no
+
+# Blocos lidos do armazenamento por fatia do streaming
+PAGINA_STREAMING = 500
+
+
+async def status(request):
+    return JSONResponse(await run_in_threadpool(no.status_no))
+
+
+async def proposta(request):
+    data = await request.json()
+    return JSONResponse(await run_in_threadpool(no.processar_proposta, data or {}))
+
+
+async def propostas(request):
+    lista = await request.json()
+    return JSONResponse(await run_in_threadpool(no.processar_propostas, lista or []))
+
+
+async def _corpo_json(request):
+    # JSON malformado vira 400 (como no Flask), não uma exceção na rota
+    try:
+        return await request.json()
+    except ValueError:
+        raise HTTPException(400, "corpo JSON inválido") from None
+
+
+async def bloco(request):
+    data = await _corpo_json(request) or {}
+    if not isinstance(data, dict):
+        return JSONResponse({"erro": "o corpo deve ser um bloco (objeto JSON)"}, status_code=400)
+    return JSONResponse(await run_in_threadpool(no.processar_bloco, data))
+
+
+async def blocos_lote(request):
+    lista = await _corpo_json(request) or []
+    erro = no.erro_no_lote(lista)
+    if erro:
+        return JSONResponse({"erro": erro[0]}, status_code=erro[1])
+    return JSONResponse(await run_in_threadpool(no.processar_blocos, lista))
+
+
+async def blocos_intervalo(request):
+    """GET /blocos?from=h&to=h → mesmo JSON do Flask, enviado em fatias."""
+    try:
+        inicio, fim, tamanho = await run_in_threadpool(
+            no.intervalo_pedido, request.query_params.get("from"), request.query_params.get("to")
+        )
+    except ValueError as e:
+        return JSONResponse({"erro": str(e)}, status_code=400)
+
+    # A primeira fatia é lida antes de responder: alturas podadas sem
+    # arquivo histórico viram 410, e não um JSON cortado no meio
+    try:
+        primeira = await run_in_threadpool(no.armazem.ler_intervalo, inicio, min(inicio + PAGINA_STREAMING, fim))
+    except ValueError as e:
+        return JSONResponse({"erro": str(e), "altura_base": no.armazem.altura_base()}, status_code=410)
+
+    async def gerar():
+        cabecalho = {"node": no.NOME_NO, "from": inicio, "to": fim, "tamanho": tamanho}
+        yield json.dumps(cabecalho, ensure_ascii=False)[:-1] + ', "blocos": ['
+
+        primeiro = True
+        for pos in range(inicio, fim, PAGINA_STREAMING):
+            if pos == inicio:
+                pagina = primeira
+            else:
+                pagina = await run_in_threadpool(no.armazem.ler_intervalo, pos, min(pos + PAGINA_STREAMING, fim))
+            if pagina:
+                yield ("" if primeiro else ",") + ",".join(json.dumps(b, ensure_ascii=False) for b in pagina)
+                primeiro = False
+
+        yield "]}"
+
+    return StreamingResponse(gerar(), media_type="application/json")
+
+
+async def snapshot(request):
+    if no.snapshot_atual is None:
+        return JSONResponse({"erro": "nenhum snapshot"}, status_code=404)
+    return JSONResponse(no.snapshot_atual)
+
+
+async def snapshot_novo(request):
+    podar = request.query_params.get("podar", "1") != "0"
+    return JSONResponse(await run_in_threadpool(no.gerar_snapshot, podar))
+
+
+async def sincronizar(request):
+    return JSONResponse(await run_in_threadpool(no.sincronizar_com_pares))
+
+
+@contextlib.asynccontextmanager
+async def ciclo_de_vida(app):
+    no.verificar_validadores()
+    no.sincronizar_na_partida()
+    yield
+
+
+app = Starlette(lifespan=ciclo_de_vida, routes=[
+    Route("/status", status, methods=["GET"]),
+    Route("/proposta", proposta, methods=["POST"]),
+    Route("/propostas", propostas, methods=["POST"]),
+    Route("/bloco", bloco, methods=["POST"]),
+    Route("/blocos", blocos_lote, methods=["POST"]),
+    Route("/blocos", blocos_intervalo, methods=["GET"]),
+    Route("/snapshot", snapshot, methods=["GET"]),
+    Route("/snapshot", snapshot_novo, methods=["POST"]),
+    Route("/sincronizar", sincronizar, methods=["POST"]),
+])
+
+# ------------------------------------------------------------
+# Executar servidor
+# ------------------------------------------------------------
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", 5000)))
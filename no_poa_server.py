@@ -2,47 +2,454 @@
 # ⚙️ Servidor Flask — Nó PoA do SmartLog Blockchain
 # ============================================================
 from flask import Flask, request, jsonify
-import hashlib
+import atexit
 import os
+import secrets
+import tempfile
+import threading
+from collections import OrderedDict
 from datetime import datetime
 import json
 
+from smartlog_armazenamento import criar_armazem
+from smartlog_blockchain import assinar_bloco, calcular_merkle_raiz, chave_publica, gerar_hash, verificar_bloco
+from smartlog_rede import mapa_configurado
+from smartlog_snapshot import (
+    assinar_snapshot,
+    carregar_snapshot,
+    criar_snapshot,
+    salvar_snapshot,
+    validar_desde_snapshot,
+    verificar_snapshot,
+)
+from smartlog_sync import sincronizar
+
 app = Flask(__name__)
 
 # Identificação do nó
 NOME_NO = os.getenv("NOME_NO", "Node_A")
 
+# Chave de assinatura do nó: CHAVE_NO ou, sem ela, um segredo aleatório
+# gerado na primeira partida e guardado em ARQUIVO_CHAVE (permissão 600).
+# A chave pública Ed25519 correspondente é publicada em /status.
+ARQUIVO_CHAVE = os.getenv("ARQUIVO_CHAVE", f"chave_{NOME_NO}.secret")
+
+def carregar_chave_no():
+    if os.getenv("CHAVE_NO"):
+        return os.environ["CHAVE_NO"]
+    if not os.path.exists(ARQUIVO_CHAVE):
+        # Grava num temporário e publica com link: quem perder a corrida
+        # (outro worker subindo junto) lê a chave inteira, nunca um arquivo vazio
+        chave = secrets.token_hex(32)
+        descritor, temporario = tempfile.mkstemp(
+            prefix=".chave-", dir=os.path.dirname(os.path.abspath(ARQUIVO_CHAVE))
+        )
+        try:
+            with os.fdopen(descritor, "w") as f:
+                f.write(chave + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.link(temporario, ARQUIVO_CHAVE)
+            print(f"[{NOME_NO}] 🔑 Nova chave do nó gerada em {ARQUIVO_CHAVE}")
+            return chave
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(temporario)
+
+    # Já gerada (numa partida anterior ou por outro worker)
+    with open(ARQUIVO_CHAVE) as f:
+        chave = f.read().strip()
+    if not chave:
+        raise SystemExit(f"[{NOME_NO}] ❌ {ARQUIVO_CHAVE} está vazio: apague-o para gerar uma nova chave")
+    return chave
+
+CHAVE_NO = carregar_chave_no()
+CHAVE_PUBLICA_NO = chave_publica(CHAVE_NO)
+
+# Validadores conhecidos: blocos recebidos (/bloco, /blocos e catch-up)
+# só são anexados com QUORUM assinaturas válidas dessas chaves.
+# CHAVES_PUBLICAS="Node_B=<hex>,Node_C=<hex>"; a do próprio nó entra sempre.
+CHAVES_PUBLICAS = {**mapa_configurado("CHAVES_PUBLICAS"), NOME_NO: CHAVE_PUBLICA_NO}
+QUORUM = int(os.getenv("QUORUM", "0")) or len(CHAVES_PUBLICAS) // 2 + 1
+
+# Sem CHAVES_PUBLICAS só a chave do próprio nó conta e o quorum cai para 1:
+# o nó recusa todo bloco que ele mesmo não assinou (inclusive os que o
+# fan-out fechou sem o seu voto) e nunca alcança os pares pelo catch-up.
+# Só um nó isolado, declarado com NO_UNICO=1, pode subir assim.
+NO_UNICO = os.getenv("NO_UNICO", "0") == "1"
+
+def verificar_validadores():
+    """Recusa subir o nó sem outros validadores configurados ou com QUORUM inatingível."""
+    if QUORUM > len(CHAVES_PUBLICAS):
+        raise SystemExit(
+            f"[{NOME_NO}] ❌ QUORUM={QUORUM} maior que o número de validadores "
+            f"conhecidos ({len(CHAVES_PUBLICAS)}): nenhum bloco seria aceito."
+        )
+    if len(CHAVES_PUBLICAS) < 2 and not NO_UNICO:
+        raise SystemExit(
+            f"[{NOME_NO}] ❌ CHAVES_PUBLICAS não configurado: só a chave deste nó "
+            "seria aceita e os blocos dos demais seriam recusados. Configure "
+            "CHAVES_PUBLICAS=\"Node_B=<hex>,...\" ou use NO_UNICO=1 para um nó isolado."
+        )
+
+if len(CHAVES_PUBLICAS) < 2 and not NO_UNICO:
+    print(f"[{NOME_NO}] ⚠️  CHAVES_PUBLICAS não configurado: só a chave deste nó é aceita (quorum {QUORUM})")
+
+# Hash do "bloco anterior" quando o ledger do nó está vazio
+HASH_GENESIS = "GENESIS"
+
+# ------------------------------------------------------------
+# Armazenamento do ledger
+# ------------------------------------------------------------
+# ARMAZENAMENTO=arquivo   → log JSONL + memória (um processo, várias threads)
+# ARMAZENAMENTO=sqlite    → SQLite WAL, seguro com vários workers (gunicorn)
+# ARMAZENAMENTO=memoria   → só memória (testes e benchmarks)
+# ARMAZENAMENTO=firestore → chunks no Firestore (rede REDE_FIRESTORE)
+def carregar_blocos_legado():
+    """Blocos do JSON antigo (blockchain_{NOME_NO}.json), para importação única."""
+    legado = f"blockchain_{NOME_NO}.json"
+    if not os.path.exists(legado):
+        return None
+    with open(legado) as f:
+        return json.load(f)
+
+def criar_armazem_no():
+    tipo = os.getenv("ARMAZENAMENTO", "arquivo")
+
+    if tipo == "memoria":
+        return criar_armazem("memoria", blocos_iniciais=carregar_blocos_legado())
+
+    if tipo == "firestore":
+        return criar_armazem("firestore", os.getenv("REDE_FIRESTORE", f"no_{NOME_NO}"))
+
+    if tipo == "sqlite":
+        return criar_armazem(
+            "sqlite",
+            os.getenv("ARQUIVO_DB", f"blockchain_{NOME_NO}.db"),
+            blocos_iniciais=carregar_blocos_legado(),
+        )
+
+    return criar_armazem(
+        "arquivo",
+        os.getenv("ARQUIVO_LOG", f"blockchain_{NOME_NO}.jsonl"),
+        fsync_a_cada=int(os.getenv("WAL_FSYNC_A_CADA", "1")),
+        fsync_intervalo=float(os.getenv("WAL_FSYNC_INTERVALO", "0")) or None,
+        blocos_iniciais=carregar_blocos_legado(),
+    )
+
 # Ledger local (blockchain do nó)
-blockchain = []
+armazem = criar_armazem_no()
+atexit.register(lambda: armazem.fechar())
 
 # ------------------------------------------------------------
-# Função utilitária para gerar hash
+# Snapshots e poda
 # ------------------------------------------------------------
-def gerar_hash(conteudo, prev_hash):
-    """Gera o hash SHA256 de um bloco."""
-    bloco_str = f"{conteudo}{prev_hash}{datetime.now()}"
-    return hashlib.sha256(bloco_str.encode()).hexdigest()
+# SNAPSHOT_A_CADA=N → a cada N blocos novos, grava um snapshot assinado
+# e poda (arquiva em disco) os blocos abaixo dele. 0 desativa.
+SNAPSHOT_A_CADA = int(os.getenv("SNAPSHOT_A_CADA", "0"))
+CAMINHO_SNAPSHOT = os.getenv("ARQUIVO_SNAPSHOT", f"blockchain_{NOME_NO}.snapshot.json")
+_lock_snapshot = threading.Lock()
+
+def carregar_snapshot_confiavel():
+    """Snapshot do disco, se a assinatura do nó conferir; valida os blocos vivos a partir dele."""
+    snapshot = carregar_snapshot(CAMINHO_SNAPSHOT)
+    if snapshot is None:
+        return None
+
+    if not verificar_snapshot(snapshot, {NOME_NO: CHAVE_PUBLICA_NO}):
+        print(f"[{NOME_NO}] ⚠️ Snapshot {CAMINHO_SNAPSHOT} com assinatura inválida — ignorado.")
+        return None
+
+    # Blocos vivos que não conferem com o snapshot assinado: o nó não sobe
+    # (serviria, votaria e anexaria sobre uma cadeia adulterada)
+    invalido = validar_desde_snapshot(snapshot, armazem.ler_intervalo(snapshot["altura"]))
+    if invalido is not None:
+        raise SystemExit(
+            f"[{NOME_NO}] ❌ Bloco {invalido} não confere a partir do snapshot {CAMINHO_SNAPSHOT}: "
+            "restaure o ledger ou apague-o para ressincronizar com os pares."
+        )
+    return snapshot
+
+snapshot_atual = carregar_snapshot_confiavel()
+
+def gerar_snapshot(podar=True):
+    """Snapshot assinado na altura atual; com podar=True, arquiva os blocos abaixo dele."""
+    global snapshot_atual
+
+    with _lock_snapshot:
+        tamanho, topo = armazem.status()
+        anterior = snapshot_atual
+        if anterior is not None and anterior["altura"] >= tamanho:
+            return anterior
+
+        # Estado incremental: só os blocos desde o snapshot anterior
+        blocos = armazem.ler_intervalo(anterior["altura"] if anterior else 0, tamanho)
+        snapshot = assinar_snapshot(criar_snapshot(blocos, tamanho, topo, anterior), {NOME_NO: CHAVE_NO})
+
+        # Grava o snapshot antes de podar: os blocos só saem depois que ele existe
+        salvar_snapshot(snapshot, CAMINHO_SNAPSHOT)
+        snapshot_atual = snapshot
+        podados = armazem.podar(tamanho) if podar else 0
+
+    print(f"[{NOME_NO}] 📸 Snapshot na altura {tamanho} — {podados} blocos arquivados")
+    return snapshot
+
+def snapshot_se_devido(tamanho):
+    """Dispara o snapshot periódico em segundo plano, sem atrasar a resposta."""
+    ultimo = snapshot_atual["altura"] if snapshot_atual else 0
+    if SNAPSHOT_A_CADA and tamanho - ultimo >= SNAPSHOT_A_CADA and not _lock_snapshot.locked():
+        threading.Thread(target=gerar_snapshot, daemon=True).start()
+
+# Limite de blocos por requisição em /blocos (leitura e lote)
+MAX_BLOCOS_POR_PAGINA = int(os.getenv("MAX_BLOCOS_POR_PAGINA", "5000"))
 
 # ------------------------------------------------------------
-# Função auxiliar: salvar blockchain em arquivo (opcional)
+# Lógica do nó (compartilhada pelo Flask e pelo modo assíncrono)
 # ------------------------------------------------------------
-def salvar_blockchain_local():
-    """Salva o ledger local em JSON (para testes/hackathon)."""
-    with open(f"blockchain_{NOME_NO}.json", "w") as f:
-        json.dump(blockchain, f, indent=2, ensure_ascii=False)
+def status_no():
+    tamanho, ultimo_hash = armazem.status()
+    return {
+        "node": NOME_NO,
+        "chave_publica": CHAVE_PUBLICA_NO,
+        "ultimo_hash": ultimo_hash or HASH_GENESIS,
+        "tamanho": tamanho,
+        "altura_base": armazem.altura_base(),
+        "altura_snapshot": snapshot_atual["altura"] if snapshot_atual else None,
+        "validadores": sorted(CHAVES_PUBLICAS),
+        "quorum": QUORUM,
+        "sincronizado": True if tamanho > 0 else False
+    }
+
+# Votos recentes por hash_bloco: uma proposta reenviada é respondida
+# sem recalcular a raiz Merkle. O cache guarda também o conteúdo que
+# foi assinado; o voto só é reaproveitado se a proposta for idêntica
+# (eventos, tx_id, hash_anterior) e ainda estiver sobre o topo do nó.
+MAX_VOTOS_CACHE = int(os.getenv("MAX_VOTOS_CACHE", "4096"))
+_votos_recentes = OrderedDict()
+_lock_votos = threading.Lock()
+
+def _voto_em_cache(hash_bloco, eventos, tx_id, hash_anterior):
+    with _lock_votos:
+        entrada = _votos_recentes.get(hash_bloco)
+        if entrada is None or entrada[1] != (eventos, tx_id, hash_anterior):
+            return None
+        _votos_recentes.move_to_end(hash_bloco)
+        return entrada[0]
+
+def _guardar_voto(voto, eventos, tx_id, hash_anterior):
+    with _lock_votos:
+        _votos_recentes[voto["hash_bloco"]] = (voto, (eventos, tx_id, hash_anterior))
+        while len(_votos_recentes) > MAX_VOTOS_CACHE:
+            _votos_recentes.popitem(last=False)
+
+def _recusa(motivo, hash_bloco=None, topo=None):
+    return {"node": NOME_NO, "assinatura": None, "recusado": motivo, "hash_bloco": hash_bloco, "topo": topo}
+
+def processar_proposta(data, topo=None):
+    """
+    Avalia uma proposta e devolve o voto do nó.
+
+    O hash é recalculado como em smartlog_blockchain.propor_bloco
+    (raiz Merkle dos eventos + tx_id + hash_anterior), então todos os
+    nós honestos chegam ao mesmo valor. O nó só assina propostas
+    construídas sobre o seu topo; `topo` permite encadear um lote.
+    """
+    hash_informado = data.get("hash_bloco")
+    eventos = data.get("eventos", data.get("evento"))
+    tx_id = data.get("tx_id")
+    hash_anterior = data.get("hash_anterior")
+    if eventos is None or not tx_id or not hash_anterior:
+        return _recusa("proposta incompleta (eventos, tx_id e hash_anterior são obrigatórios)")
+
+    if topo is None:
+        topo = armazem.status()[1] or HASH_GENESIS
+
+    # Reenvio idêntico sobre o mesmo topo: o conteúdo já foi conferido
+    if hash_informado and hash_anterior == topo:
+        voto = _voto_em_cache(hash_informado, eventos, tx_id, hash_anterior)
+        if voto is not None:
+            return voto
+
+    merkle_raiz = calcular_merkle_raiz(eventos)
+    hash_bloco = gerar_hash(f"{merkle_raiz}-{tx_id}", hash_anterior)
+
+    if hash_informado and hash_informado != hash_bloco:
+        return _recusa("hash_bloco não confere com o conteúdo", hash_bloco)
+
+    if hash_anterior != topo:
+        return _recusa("hash_anterior diverge do topo do nó", hash_bloco, topo)
+
+    voto = {
+        "node": NOME_NO,
+        "assinatura": assinar_bloco(CHAVE_NO, hash_bloco),
+        "hash_bloco": hash_bloco,
+        "merkle_raiz": merkle_raiz,
+        "timestamp": datetime.now().isoformat()
+    }
+    _guardar_voto(voto, eventos, tx_id, hash_anterior)
+    return voto
+
+def processar_propostas(lista):
+    """
+    Vota em N propostas de uma vez. Cada proposta pode se apoiar na
+    anterior do lote (pipeline de blocos ainda não confirmados).
+    """
+    topo = armazem.status()[1] or HASH_GENESIS
+    votos = []
+    for data in lista:
+        voto = processar_proposta(data, topo)
+        if voto["assinatura"]:
+            topo = voto["hash_bloco"]
+        votos.append(voto)
+    return votos
+
+# Blocos recebidos são conferidos sobre o topo lido e gravados com
+# topo_esperado = esse topo: se outro bloco entrou no meio (outra
+# thread ou outro worker), o anexo não acontece e a conferência é
+# refeita sobre o topo novo — a cadeia gravada nunca bifurca.
+def validar_bloco(bloco, topo):
+    """Motivo da recusa de um bloco recebido sobre `topo`, ou None."""
+    return verificar_bloco(bloco, topo, CHAVES_PUBLICAS, QUORUM)
+
+def validar_pagina(blocos, hash_anterior):
+    """Confere uma página do catch-up bloco a bloco (ver sincronizar)."""
+    topo = hash_anterior or HASH_GENESIS
+    for bloco in blocos:
+        motivo = validar_bloco(bloco, topo)
+        if motivo:
+            return f"bloco {bloco.get('bloco_id')}: {motivo}"
+        topo = bloco["hash_atual"]
+    return None
+
+def processar_bloco(data):
+    while True:
+        tamanho, topo = armazem.status()
+        if tamanho and data.get("hash_atual") == topo:
+            return {"status": "IGNORADO", "node": NOME_NO}
+
+        motivo = validar_bloco(data, topo or HASH_GENESIS)
+        if motivo:
+            return {"status": "RECUSADO", "node": NOME_NO, "motivo": motivo, "topo": topo or HASH_GENESIS}
+
+        anexado, tamanho = armazem.anexar_se_novo(data, topo_esperado=topo)
+        if anexado:
+            break
+
+    print(f"[{NOME_NO}] ✅ Novo bloco adicionado — Hash: {data.get('hash_atual', '')[:12]}...")
+    snapshot_se_devido(tamanho)
+    return {"status": "OK", "node": NOME_NO, "tamanho": tamanho}
+
+def _conferir_lote(lista, tamanho, topo):
+    """(situação por bloco, blocos aceitos, motivo da primeira recusa) sobre `topo`."""
+    topo = topo or HASH_GENESIS
+    situacoes, aceitos, motivo = [], [], None
+
+    for data in lista:
+        if motivo is None and tamanho and data.get("hash_atual") == topo:
+            situacoes.append("IGNORADO")
+            continue
+        if motivo is None:
+            motivo = validar_bloco(data, topo)
+        if motivo:
+            situacoes.append("RECUSADO")
+            continue
+        situacoes.append("OK")
+        aceitos.append(data)
+        topo, tamanho = data["hash_atual"], tamanho + 1
+    return situacoes, aceitos, motivo
+
+def processar_blocos(lista):
+    """
+    Anexa N blocos numa única operação de armazenamento. O lote é
+    conferido em ordem, cada bloco sobre o anterior; a partir do
+    primeiro recusado, nenhum outro é anexado.
+    """
+    while True:
+        tamanho, topo = armazem.status()
+        situacoes, aceitos, motivo = _conferir_lote(lista, tamanho, topo)
+        if not aceitos:
+            break
+        resultados, tamanho = armazem.anexar_varios_se_novos(aceitos, topo_esperado=topo)
+        if any(resultados):
+            break
+    anexados = len(aceitos)
+
+    if anexados:
+        print(f"[{NOME_NO}] ✅ {anexados} blocos adicionados em lote — tamanho {tamanho}")
+        snapshot_se_devido(tamanho)
+
+    resposta = {
+        "status": "OK" if motivo is None else "RECUSADO",
+        "node": NOME_NO,
+        "anexados": anexados,
+        "ignorados": situacoes.count("IGNORADO"),
+        "recusados": situacoes.count("RECUSADO"),
+        "resultados": situacoes,
+        "tamanho": tamanho
+    }
+    if motivo:
+        resposta["motivo"] = motivo
+    return resposta
+
+def intervalo_pedido(inicio, fim):
+    """Normaliza ?from=&to= (to exclusivo), limitado a MAX_BLOCOS_POR_PAGINA; ValueError se não forem inteiros."""
+    tamanho = armazem.tamanho()
+    try:
+        inicio = max(0, int(inicio or 0))
+        fim = tamanho if fim in (None, "") else min(int(fim), tamanho)
+    except ValueError:
+        raise ValueError("from e to devem ser alturas inteiras") from None
+    return inicio, max(inicio, min(fim, inicio + MAX_BLOCOS_POR_PAGINA)), tamanho
+
+def erro_no_lote(lista):
+    """(mensagem, status HTTP) se o corpo de POST /blocos não for um lote aceitável, senão None."""
+    if not isinstance(lista, list) or not all(isinstance(b, dict) for b in lista):
+        return "o corpo deve ser uma lista de blocos (objetos JSON)", 400
+    if len(lista) > MAX_BLOCOS_POR_PAGINA:
+        return f"máximo de {MAX_BLOCOS_POR_PAGINA} blocos por lote", 413
+    return None
+
+# ------------------------------------------------------------
+# Sincronização com os pares (catch-up)
+# ------------------------------------------------------------
+# PARES="Node_B=http://127.0.0.1:5001,Node_C=http://127.0.0.1:5002"
+def pares_configurados():
+    return mapa_configurado("PARES")
+
+PARES = pares_configurados()
+_lock_sincronizacao = threading.Lock()
+
+def sincronizar_com_pares():
+    """Puxa dos pares os blocos que faltam (uma sincronização por vez)."""
+    if not PARES:
+        return {"erro": "nenhum par configurado (PARES)"}
+    if not _lock_sincronizacao.acquire(blocking=False):
+        return {"erro": "sincronização já em andamento"}
+
+    try:
+        relatorio = sincronizar(armazem, PARES, validar=validar_pagina)
+    finally:
+        _lock_sincronizacao.release()
+
+    if relatorio["blocos"]:
+        print(
+            f"[{NOME_NO}] 🔄 Sincronizado: +{relatorio['blocos']} blocos em "
+            f"{relatorio['segundos']:.2f}s ({relatorio['blocos_s']:,.0f} blocos/s)"
+        )
+    return relatorio
+
+def sincronizar_na_partida():
+    """Dispara o catch-up em segundo plano ao subir o nó (se houver PARES)."""
+    if PARES and os.getenv("SINCRONIZAR_NA_PARTIDA", "1") != "0":
+        threading.Thread(target=sincronizar_com_pares, daemon=True).start()
 
 # ------------------------------------------------------------
 # Endpoint: status do nó
 # ------------------------------------------------------------
 @app.route("/status", methods=["GET"])
 def status():
-    ultimo_hash = blockchain[-1]["hash_atual"] if blockchain else "GENESIS"
-    return jsonify({
-        "node": NOME_NO,
-        "ultimo_hash": ultimo_hash,
-        "tamanho": len(blockchain),
-        "sincronizado": True if len(blockchain) > 0 else False
-    })
+    return jsonify(status_no())
 
 # ------------------------------------------------------------
 # Endpoint: proposta de bloco (recebe do painel Streamlit)
@@ -50,55 +457,83 @@ def status():
 @app.route("/proposta", methods=["POST"])
 def proposta():
     data = request.json or {}
-    evento = data.get("evento", "")
-    hash_anterior = data.get("hash_anterior", "GENESIS")
-
-    # Gera hash do novo bloco proposto
-    novo_hash = gerar_hash(evento, hash_anterior)
-
-    # Monta bloco básico
-    bloco = {
-        "index": len(blockchain) + 1,
-        "timestamp": datetime.now().isoformat(),
-        "evento": evento,
-        "hash_anterior": hash_anterior,
-        "hash_atual": novo_hash,
-        "validador": NOME_NO,
-        "assinatura": f"SIG-{NOME_NO}"
-    }
-
-    print(f"[{NOME_NO}] Nova proposta recebida: {evento} | Hash: {novo_hash[:10]}...")
+    resposta = processar_proposta(data)
 
-    # Retorna o voto/assinatura para o painel
-    resposta = {
-        "node": NOME_NO,
-        "assinatura": bloco["assinatura"],
-        "hash_bloco": bloco["hash_atual"],
-        "timestamp": bloco["timestamp"]
-    }
+    situacao = "assinada" if resposta["assinatura"] else f"recusada ({resposta['recusado']})"
+    print(f"[{NOME_NO}] Proposta {situacao} | Hash: {str(resposta['hash_bloco'])[:10]}...")
     return jsonify(resposta)
 
+@app.route("/propostas", methods=["POST"])
+def propostas():
+    """Lote: corpo é uma lista de propostas; resposta na mesma ordem."""
+    return jsonify(processar_propostas(request.json or []))
+
 # ------------------------------------------------------------
 # Endpoint: adicionar bloco final (após consenso)
 # ------------------------------------------------------------
 @app.route("/bloco", methods=["POST"])
 def bloco():
     data = request.json or {}
+    if not isinstance(data, dict):
+        return jsonify({"erro": "o corpo deve ser um bloco (objeto JSON)"}), 400
+    return jsonify(processar_bloco(data))
 
-    # Evita duplicar blocos
-    if blockchain and data.get("hash_atual") == blockchain[-1].get("hash_atual"):
-        return jsonify({"status": "IGNORADO", "node": NOME_NO})
+@app.route("/blocos", methods=["POST"])
+def blocos_lote():
+    """Lote: corpo é uma lista de blocos, anexados em ordem."""
+    lista = request.json or []
+    erro = erro_no_lote(lista)
+    if erro:
+        return jsonify({"erro": erro[0]}), erro[1]
+    return jsonify(processar_blocos(lista))
 
-    blockchain.append(data)
-    salvar_blockchain_local()
+# ------------------------------------------------------------
+# Endpoint: intervalo da cadeia (sincronização entre pares)
+# ------------------------------------------------------------
+@app.route("/blocos", methods=["GET"])
+def blocos_intervalo():
+    """GET /blocos?from=h&to=h → blocos nas alturas [from, to)."""
+    try:
+        inicio, fim, tamanho = intervalo_pedido(request.args.get("from"), request.args.get("to"))
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    try:
+        blocos = armazem.ler_intervalo(inicio, fim)
+    except ValueError as e:
+        # Alturas podadas sem arquivo histórico (ARMAZENAMENTO=memoria)
+        return jsonify({"erro": str(e), "altura_base": armazem.altura_base()}), 410
+    return jsonify({
+        "node": NOME_NO,
+        "from": inicio,
+        "to": fim,
+        "tamanho": tamanho,
+        "blocos": blocos
+    })
 
-    print(f"[{NOME_NO}] ✅ Novo bloco adicionado — Hash: {data.get('hash_atual', '')[:12]}...")
+# ------------------------------------------------------------
+# Endpoint: snapshot assinado
+# ------------------------------------------------------------
+@app.route("/snapshot", methods=["GET"])
+def snapshot():
+    if snapshot_atual is None:
+        return jsonify({"erro": "nenhum snapshot"}), 404
+    return jsonify(snapshot_atual)
+
+@app.route("/snapshot", methods=["POST"])
+def snapshot_novo():
+    """Força um snapshot agora (e a poda, salvo ?podar=0)."""
+    return jsonify(gerar_snapshot(request.args.get("podar", "1") != "0"))
 
-    return jsonify({"status": "OK", "node": NOME_NO, "tamanho": len(blockchain)})
+@app.route("/sincronizar", methods=["POST"])
+def sincronizar_rota():
+    """Força um catch-up com os pares configurados."""
+    return jsonify(sincronizar_com_pares())
 
 # ------------------------------------------------------------
 # Executar servidor
 # ------------------------------------------------------------
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 5000))
+    verificar_validadores()
+    sincronizar_na_partida()
     app.run(host="0.0.0.0", port=port)
@@ -0,0 +1,704 @@
+# ===========================================================
+# smartlog_armazenamento.py — Armazenamento de blocos e auditoria
+# ===========================================================
+# Abstração usada pelo nó (Flask/async) e pelo app: anexar com
+# checagem de duplicata atômica, leitura do topo e de intervalos e
+# log de auditoria encadeado por hash (smartlog_auditoria), com
+# consulta por intervalo de horário e por ação.
+#
+# - ArmazemMemoria: listas na memória do processo (testes, benchmarks).
+# - ArmazemArquivo: log JSONL + lista em memória; um único escritor
+#   (lock) e leituras sem lock sobre um snapshot imutável do topo.
+#   Para um processo (threads).
+# - ArmazemSQLite: SQLite em modo WAL; anexos serializados por
+#   BEGIN IMMEDIATE e leituras concorrentes entre processos.
+#   Para vários workers (gunicorn).
+# - ArmazemFirestore (smartlog_firestore): chunks de blocos na nuvem.
+#
+# O backend é escolhido por configuração (obter_armazem /
+# SMARTLOG_ARMAZENAMENTO), sem depender da nuvem para rodar local.
+#
+# Ambos podem podar os blocos abaixo de um snapshot (podar): eles vão
+# para segmentos JSONL imutáveis em disco (ArquivoHistorico) e saem
+# da memória / da tabela; as alturas continuam absolutas.
+# ===========================================================
+
+import glob
+import json
+import os
+import sqlite3
+import threading
+
+from smartlog_auditoria import LogAuditoria, encadear, no_intervalo
+from smartlog_wal import LogBlocos
+
+# Valor padrão de topo_esperado: anexa sobre qualquer topo
+QUALQUER_TOPO = object()
+
+
+class ArmazemBlocos:
+    """Interface comum dos armazenamentos de blocos."""
+
+    def anexar_se_novo(self, bloco, topo_esperado=QUALQUER_TOPO):
+        """
+        Anexa o bloco, a menos que ele repita o topo atual. Com
+        topo_esperado (hash do topo, None = vazio), só anexa se o topo
+        ainda for esse — a checagem e o anexo são uma operação só, então
+        dois blocos sobre o mesmo pai não entram os dois.
+        Retorna (anexado: bool, tamanho após a operação).
+        """
+        raise NotImplementedError
+
+    def anexar_varios_se_novos(self, blocos, topo_esperado=QUALQUER_TOPO):
+        """
+        Anexa uma sequência de blocos numa única operação (um lock /
+        transação / escrita). Cada bloco é ignorado se repetir o topo
+        naquele momento; com topo_esperado, nada é anexado se o topo
+        não for mais esse. Retorna ([anexado por bloco], tamanho final).
+        """
+        if topo_esperado is not QUALQUER_TOPO and self.status()[1] != topo_esperado:
+            return [False] * len(blocos), self.tamanho()
+        resultados = [self.anexar_se_novo(b)[0] for b in blocos]
+        return resultados, self.tamanho()
+
+    def status(self):
+        """(tamanho, hash do topo ou None) — leitura consistente."""
+        raise NotImplementedError
+
+    def ler_intervalo(self, inicio, fim=None):
+        """Blocos nas alturas [inicio, fim); ValueError se parte delas foi podada sem arquivo."""
+        raise NotImplementedError
+
+    def tamanho(self):
+        return self.status()[0]
+
+    def altura_base(self):
+        """Primeira altura ainda mantida "viva" (abaixo dela, só no arquivo)."""
+        return 0
+
+    def podar(self, altura):
+        """Arquiva e remove os blocos abaixo de `altura`. Retorna quantos saíram."""
+        raise NotImplementedError
+
+    def limpar(self):
+        """Remove todos os blocos (inclusive os arquivados). A auditoria fica."""
+        raise NotImplementedError
+
+    def registrar_auditoria(self, registro):
+        """Acrescenta um registro (dict) ao log de auditoria."""
+        self.registrar_auditoria_varios([registro])
+
+    def registrar_auditoria_varios(self, registros):
+        """
+        Acrescenta vários registros de auditoria numa única escrita,
+        encadeados ao último gravado (smartlog_auditoria.encadear).
+        """
+        raise NotImplementedError
+
+    def ler_auditoria(self, limite=None):
+        """Últimos `limite` registros de auditoria (todos se None), do mais antigo ao mais novo."""
+        raise NotImplementedError
+
+    def consultar_auditoria(self, inicio=None, fim=None, acao=None, limite=None):
+        """
+        Registros com inicio <= timestamp < fim (ISO) e, se dada, a
+        `acao`, em ordem de gravação — sem varrer o log inteiro.
+        """
+        raise NotImplementedError
+
+    def fechar(self):
+        pass
+
+
+# ===========================================================
+# ARQUIVO HISTÓRICO (blocos podados)
+# ===========================================================
+
+class ArquivoHistorico:
+    """
+    Blocos podados em segmentos imutáveis <prefixo>.<inicio>-<fim>.jsonl.
+    Cada segmento é gravado de forma atômica; segmentos além da base
+    atual (sobras de uma poda interrompida) são descartados na abertura.
+    """
+
+    def __init__(self, prefixo):
+        self.prefixo = prefixo
+        self._segmentos = []
+        self._listar()
+
+    def _listar(self):
+        segmentos = []
+        for caminho in glob.glob(glob.escape(self.prefixo) + ".*-*.jsonl"):
+            faixa = caminho[len(self.prefixo) + 1:-len(".jsonl")]
+            inicio, _, fim = faixa.partition("-")
+            if inicio.isdigit() and fim.isdigit():
+                segmentos.append((int(inicio), int(fim), caminho))
+        self._segmentos = sorted(segmentos)
+
+    def descartar_orfaos(self, base):
+        for inicio, fim, caminho in self._segmentos:
+            if fim > base:
+                os.remove(caminho)
+        self._segmentos = [s for s in self._segmentos if s[1] <= base]
+
+    def gravar(self, inicio, blocos):
+        if not blocos:
+            return
+        fim = inicio + len(blocos)
+        caminho = f"{self.prefixo}.{inicio:012d}-{fim:012d}.jsonl"
+
+        temporario = caminho + ".tmp"
+        with open(temporario, "wb") as f:
+            f.write(b"".join(
+                json.dumps(b, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+                for b in blocos
+            ))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, caminho)
+
+        self._segmentos = sorted(self._segmentos + [(inicio, fim, caminho)])
+
+    def ler(self, inicio, fim):
+        """Blocos arquivados nas alturas [inicio, fim)."""
+        if not self._segmentos or self._segmentos[-1][1] < fim:
+            self._listar()  # outro processo pode ter podado
+
+        blocos = []
+        for a, b, caminho in self._segmentos:
+            if b <= inicio or a >= fim:
+                continue
+            with open(caminho, "rb") as f:
+                linhas = f.readlines()
+            blocos.extend(json.loads(l) for l in linhas[max(inicio, a) - a:min(fim, b) - a])
+        return blocos
+
+
+# ===========================================================
+# MEMÓRIA
+# ===========================================================
+
+class ArmazemMemoria(ArmazemBlocos):
+    """
+    Blocos e auditoria em listas na memória. Escritas passam por um
+    lock; leitores usam o snapshot (tamanho, hash) trocado
+    atomicamente a cada anexo, sem bloquear. Podar descarta.
+
+    Subclasses persistem via _persistir / _arquivar / _ler_arquivados.
+    """
+
+    def __init__(self, blocos_iniciais=None, altura_base=0, hash_base=None):
+        self._lock = threading.Lock()
+        # (altura base, hash do bloco base-1, blocos vivos) — trocado de uma vez na poda
+        self._janela = (altura_base, hash_base, list(blocos_iniciais or []))
+        self._topo = self._calcular_topo()
+        self._auditoria = []
+        self._auditoria_por_acao = {}    # acao → posições em _auditoria
+
+    def _calcular_topo(self):
+        base, hash_base, blocos = self._janela
+        ultimo = blocos[-1].get("hash_atual") if blocos else hash_base
+        return base + len(blocos), ultimo
+
+    # Ganchos de persistência (no-op em memória)
+    def _persistir(self, blocos):
+        pass
+
+    def _arquivar(self, base, podados, altura, hash_base, restantes):
+        pass
+
+    def _ler_arquivados(self, inicio, fim):
+        # Só memória: o que foi podado foi descartado
+        raise ValueError(f"Alturas [{inicio}, {fim}) foram podadas e não estão mais disponíveis.")
+
+    def _limpar_persistidos(self):
+        pass
+
+    def _persistir_auditoria(self, registros):
+        pass
+
+    def anexar_se_novo(self, bloco, topo_esperado=QUALQUER_TOPO):
+        with self._lock:
+            tamanho, ultimo = self._topo
+            if tamanho and bloco.get("hash_atual") == ultimo:
+                return False, tamanho
+            if topo_esperado is not QUALQUER_TOPO and ultimo != topo_esperado:
+                return False, tamanho
+
+            self._persistir([bloco])
+            self._janela[2].append(bloco)
+            self._topo = self._calcular_topo()
+            return True, self._topo[0]
+
+    def anexar_varios_se_novos(self, blocos, topo_esperado=QUALQUER_TOPO):
+        with self._lock:
+            tamanho, ultimo = self._topo
+            if topo_esperado is not QUALQUER_TOPO and ultimo != topo_esperado:
+                return [False] * len(blocos), tamanho
+            novos, resultados = [], []
+
+            for bloco in blocos:
+                repetido = tamanho > 0 and bloco.get("hash_atual") == ultimo
+                resultados.append(not repetido)
+                if not repetido:
+                    novos.append(bloco)
+                    tamanho += 1
+                    ultimo = bloco.get("hash_atual")
+
+            if novos:
+                self._persistir(novos)
+                self._janela[2].extend(novos)
+                self._topo = self._calcular_topo()
+            return resultados, self._topo[0]
+
+    def status(self):
+        return self._topo
+
+    def altura_base(self):
+        return self._janela[0]
+
+    def ler_intervalo(self, inicio, fim=None):
+        tamanho = self._topo[0]
+        fim = tamanho if fim is None else min(fim, tamanho)
+        base, _, blocos = self._janela
+        if inicio >= fim:
+            return []
+
+        arquivados = self._ler_arquivados(inicio, min(fim, base)) if inicio < base else []
+        return arquivados + blocos[max(inicio, base) - base:max(fim, base) - base]
+
+    def podar(self, altura):
+        with self._lock:
+            base, hash_base, blocos = self._janela
+            altura = min(altura, self._topo[0])
+            if altura <= base:
+                return 0
+
+            podados, restantes = blocos[:altura - base], blocos[altura - base:]
+            hash_base = podados[-1].get("hash_atual")
+            self._arquivar(base, podados, altura, hash_base, restantes)
+
+            self._janela = (altura, hash_base, restantes)
+            return len(podados)
+
+    def limpar(self):
+        with self._lock:
+            self._limpar_persistidos()
+            self._janela = (0, None, [])
+            self._topo = self._calcular_topo()
+
+    def registrar_auditoria_varios(self, registros):
+        with self._lock:
+            registros = encadear(registros, self._auditoria[-1] if self._auditoria else None)
+            self._persistir_auditoria(registros)
+            for registro in registros:
+                self._auditoria_por_acao.setdefault(registro.get("acao"), []).append(len(self._auditoria))
+                self._auditoria.append(registro)
+
+    def ler_auditoria(self, limite=None):
+        registros = self._auditoria
+        return registros[-limite:] if limite else list(registros)
+
+    def consultar_auditoria(self, inicio=None, fim=None, acao=None, limite=None):
+        registros = self._auditoria
+        posicoes = range(len(registros)) if acao is None else self._auditoria_por_acao.get(acao, [])
+        encontrados = [registros[p] for p in posicoes if no_intervalo(registros[p], inicio, fim)]
+        return encontrados[:limite] if limite else encontrados
+
+
+# ===========================================================
+# ARQUIVO (JSONL) + MEMÓRIA
+# ===========================================================
+
+class ArmazemArquivo(ArmazemMemoria):
+    """
+    Ledger em memória persistido num LogBlocos; a auditoria fica em
+    segmentos diários (LogAuditoria em <caminho>.auditoria/), lidos
+    só quando consultados.
+
+    Depois de uma poda, o log começa com um cabeçalho
+    {"altura_base": H, "hash_base": ...} e só guarda os blocos >= H.
+    """
+
+    def __init__(self, caminho, fsync_a_cada=1, fsync_intervalo=None, blocos_iniciais=None):
+        self._log = LogBlocos(caminho, fsync_a_cada, fsync_intervalo)
+
+        registros = self._log.carregar()
+        base, hash_base = 0, None
+        if registros and "altura_base" in registros[0]:
+            base, hash_base = registros[0]["altura_base"], registros[0]["hash_base"]
+            registros = registros[1:]
+
+        if not registros and not base and blocos_iniciais:
+            self._log.anexar_varios(blocos_iniciais)
+            self._log.sincronizar()
+            registros = list(blocos_iniciais)
+
+        super().__init__(registros, base, hash_base)
+
+        self._historico = ArquivoHistorico(caminho + ".arquivo")
+        self._historico.descartar_orfaos(base)
+
+        self._log_auditoria = LogAuditoria(caminho + ".auditoria")
+
+    def _persistir(self, blocos):
+        self._log.anexar_varios(blocos)
+
+    def _arquivar(self, base, podados, altura, hash_base, restantes):
+        # 1) arquiva; 2) reescreve o log só com o que fica (rename atômico)
+        self._historico.gravar(base, podados)
+        self._log.reescrever([{"altura_base": altura, "hash_base": hash_base}] + restantes)
+
+    def _ler_arquivados(self, inicio, fim):
+        return self._historico.ler(inicio, fim)
+
+    def _limpar_persistidos(self):
+        self._log.reescrever([])
+        self._historico.descartar_orfaos(0)
+
+    def registrar_auditoria_varios(self, registros):
+        with self._lock:
+            self._log_auditoria.registrar(registros)
+
+    def ler_auditoria(self, limite=None):
+        with self._lock:
+            return self._log_auditoria.ler(limite)
+
+    def consultar_auditoria(self, inicio=None, fim=None, acao=None, limite=None):
+        with self._lock:
+            return self._log_auditoria.consultar(inicio, fim, acao, limite)
+
+    def fechar(self):
+        with self._lock:
+            self._log.fechar()
+
+
+# ===========================================================
+# SQLITE (WAL)
+# ===========================================================
+
+class ArmazemSQLite(ArmazemBlocos):
+    """
+    Ledger numa tabela SQLite em modo WAL. Cada thread/processo abre
+    sua conexão; leitores não bloqueiam o escritor e o BEGIN IMMEDIATE
+    garante um único anexo por vez (inclusive entre processos).
+    A altura e o hash da base (após podas) ficam na tabela `meta`;
+    a auditoria, na tabela `auditoria`, indexada por horário e por
+    (acao, horário).
+    """
+
+    def __init__(self, caminho, blocos_iniciais=None):
+        self.caminho = caminho
+        self._local = threading.local()
+
+        con = self._conexao()
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS blocos ("
+            " altura INTEGER PRIMARY KEY,"
+            " hash_atual TEXT,"
+            " dados TEXT NOT NULL)"
+        )
+        con.execute("CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT)")
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS auditoria ("
+            " seq INTEGER PRIMARY KEY,"
+            " timestamp TEXT,"
+            " acao TEXT,"
+            " dados TEXT NOT NULL)"
+        )
+        con.execute("CREATE INDEX IF NOT EXISTS auditoria_por_horario ON auditoria (timestamp)")
+        con.execute("CREATE INDEX IF NOT EXISTS auditoria_por_acao ON auditoria (acao, timestamp)")
+
+        if blocos_iniciais and self.tamanho() == 0:
+            with con:
+                con.executemany(
+                    "INSERT INTO blocos (altura, hash_atual, dados) VALUES (?, ?, ?)",
+                    [(i, b.get("hash_atual"), json.dumps(b, ensure_ascii=False))
+                     for i, b in enumerate(blocos_iniciais)]
+                )
+
+        self._historico = ArquivoHistorico(caminho + ".arquivo")
+        self._historico.descartar_orfaos(self.altura_base())
+
+    def _conexao(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def _base(self, con):
+        linhas = dict(con.execute("SELECT chave, valor FROM meta").fetchall())
+        return int(linhas.get("altura_base", 0)), linhas.get("hash_base")
+
+    def _ler_topo(self, con):
+        topo = con.execute(
+            "SELECT altura, hash_atual FROM blocos ORDER BY altura DESC LIMIT 1"
+        ).fetchone()
+        return (topo[0] + 1, topo[1]) if topo else self._base(con)
+
+    def anexar_se_novo(self, bloco, topo_esperado=QUALQUER_TOPO):
+        con = self._conexao()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            tamanho, ultimo = self._ler_topo(con)
+
+            repetido = tamanho and bloco.get("hash_atual") == ultimo
+            if repetido or (topo_esperado is not QUALQUER_TOPO and ultimo != topo_esperado):
+                con.execute("COMMIT")
+                return False, tamanho
+
+            con.execute(
+                "INSERT INTO blocos (altura, hash_atual, dados) VALUES (?, ?, ?)",
+                (tamanho, bloco.get("hash_atual"), json.dumps(bloco, ensure_ascii=False))
+            )
+            con.execute("COMMIT")
+            return True, tamanho + 1
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+    def anexar_varios_se_novos(self, blocos, topo_esperado=QUALQUER_TOPO):
+        con = self._conexao()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            tamanho, ultimo = self._ler_topo(con)
+            if topo_esperado is not QUALQUER_TOPO and ultimo != topo_esperado:
+                con.execute("COMMIT")
+                return [False] * len(blocos), tamanho
+
+            linhas, resultados = [], []
+            for bloco in blocos:
+                repetido = tamanho > 0 and bloco.get("hash_atual") == ultimo
+                resultados.append(not repetido)
+                if not repetido:
+                    linhas.append((tamanho, bloco.get("hash_atual"), json.dumps(bloco, ensure_ascii=False)))
+                    tamanho += 1
+                    ultimo = bloco.get("hash_atual")
+
+            con.executemany("INSERT INTO blocos (altura, hash_atual, dados) VALUES (?, ?, ?)", linhas)
+            con.execute("COMMIT")
+            return resultados, tamanho
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+    def status(self):
+        return self._ler_topo(self._conexao())
+
+    def altura_base(self):
+        return self._base(self._conexao())[0]
+
+    def ler_intervalo(self, inicio, fim=None):
+        con = self._conexao()
+        fim = self.tamanho() if fim is None else fim
+        base = self._base(con)[0]
+
+        arquivados = self._historico.ler(inicio, min(fim, base)) if inicio < base else []
+        linhas = con.execute(
+            "SELECT dados FROM blocos WHERE altura >= ? AND altura < ? ORDER BY altura",
+            (max(inicio, base), fim)
+        ).fetchall()
+        return arquivados + [json.loads(d) for (d,) in linhas]
+
+    def podar(self, altura):
+        con = self._conexao()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            base = self._base(con)[0]
+            altura = min(altura, self._ler_topo(con)[0])
+            if altura <= base:
+                con.execute("COMMIT")
+                return 0
+
+            linhas = con.execute(
+                "SELECT dados FROM blocos WHERE altura >= ? AND altura < ? ORDER BY altura", (base, altura)
+            ).fetchall()
+            podados = [json.loads(d) for (d,) in linhas]
+
+            # Arquiva antes de apagar: se cair aqui, o segmento vira órfão e é descartado
+            self._historico.gravar(base, podados)
+
+            con.execute("DELETE FROM blocos WHERE altura < ?", (altura,))
+            con.executemany(
+                "INSERT OR REPLACE INTO meta (chave, valor) VALUES (?, ?)",
+                [("altura_base", str(altura)), ("hash_base", podados[-1].get("hash_atual"))]
+            )
+            con.execute("COMMIT")
+            return len(podados)
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+    def limpar(self):
+        con = self._conexao()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            con.execute("DELETE FROM blocos")
+            con.execute("DELETE FROM meta WHERE chave IN ('altura_base', 'hash_base')")
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        self._historico.descartar_orfaos(0)
+
+    def registrar_auditoria_varios(self, registros):
+        con = self._conexao()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            ultimo = con.execute("SELECT dados FROM auditoria ORDER BY seq DESC LIMIT 1").fetchone()
+            registros = encadear(registros, json.loads(ultimo[0]) if ultimo else None)
+            con.executemany(
+                "INSERT INTO auditoria (seq, timestamp, acao, dados) VALUES (?, ?, ?, ?)",
+                [(r["seq"], r["timestamp"], r.get("acao"), json.dumps(r, ensure_ascii=False)) for r in registros],
+            )
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+    def ler_auditoria(self, limite=None):
+        linhas = self._conexao().execute(
+            "SELECT dados FROM auditoria ORDER BY seq DESC LIMIT ?", (limite or -1,)
+        ).fetchall()
+        return [json.loads(d) for (d,) in reversed(linhas)]
+
+    def consultar_auditoria(self, inicio=None, fim=None, acao=None, limite=None):
+        condicoes, parametros = [], []
+        for condicao, valor in (("acao = ?", acao), ("timestamp >= ?", inicio), ("timestamp < ?", fim)):
+            if valor is not None:
+                condicoes.append(condicao)
+                parametros.append(valor)
+
+        onde = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        linhas = self._conexao().execute(
+            f"SELECT dados FROM auditoria {onde} ORDER BY seq LIMIT ?", (*parametros, limite or -1)
+        ).fetchall()
+        return [json.loads(d) for (d,) in linhas]
+
+    def fechar(self):
+        con = getattr(self._local, "con", None)
+        if con is not None:
+            con.close()
+            self._local.con = None
+
+
+# ===========================================================
+# CONFIGURAÇÃO
+# ===========================================================
+
+TIPOS_ARMAZEM = ("memoria", "arquivo", "sqlite", "firestore")
+
+CAMINHOS_PADRAO = {
+    "arquivo": "smartlog.jsonl",
+    "sqlite": "smartlog.db",
+    "firestore": "rede_principal",
+}
+
+_armazem_compartilhado = None
+_lock_configuracao = threading.Lock()
+
+
+def criar_armazem(tipo, caminho=None, **opcoes):
+    """
+    Cria o armazenamento pelo nome: "memoria", "arquivo", "sqlite" ou
+    "firestore" (caminho = nome da rede; aceita db=<cliente Firestore>).
+    """
+    if tipo not in TIPOS_ARMAZEM:
+        raise ValueError(f"Armazenamento desconhecido: {tipo}")
+    if tipo == "memoria":
+        return ArmazemMemoria(**opcoes)
+
+    caminho = caminho or CAMINHOS_PADRAO[tipo]
+    if tipo == "arquivo":
+        return ArmazemArquivo(caminho, **opcoes)
+    if tipo == "sqlite":
+        return ArmazemSQLite(caminho, **opcoes)
+
+    from smartlog_firestore import ArmazemFirestore  # só carrega o Firestore se for usado
+    return ArmazemFirestore(caminho, **opcoes)
+
+
+def _firebase_configurado():
+    """Há credenciais do Firebase (arquivo local ou st.secrets)? Não inicializa nada."""
+    if os.path.exists("serviceAccountKey.json"):
+        return True
+    try:
+        import streamlit as st
+        return "FIREBASE" in st.secrets
+    except Exception:
+        return False
+
+
+def tipo_configurado():
+    """
+    SMARTLOG_ARMAZENAMENTO, se definido; senão Firestore quando houver
+    credenciais (implantação na nuvem) e SQLite local caso contrário.
+    """
+    tipo = os.getenv("SMARTLOG_ARMAZENAMENTO")
+    if tipo:
+        return tipo
+    return "firestore" if _firebase_configurado() else "sqlite"
+
+
+def salvar_ledger(armazem, blockchain):
+    """
+    Persiste a cadeia (Ledger ou DataFrame) no armazenamento, enviando
+    só os blocos além do topo gravado. Se o prefixo gravado não é o da
+    cadeia local (cadeia refeita ou adulterada), limpa e regrava tudo.
+    """
+    from smartlog_ledger import como_ledger  # pandas só para quem salva um Ledger
+
+    ledger = como_ledger(blockchain)
+    anterior, topo = armazem.status()
+
+    reenvio = bool(anterior) and (anterior > len(ledger) or ledger.hash_em(anterior - 1) != topo)
+    if reenvio:
+        armazem.limpar()
+
+    gravada = 0 if reenvio else anterior
+    novos = ledger.registros(gravada)
+    if novos:
+        armazem.anexar_varios_se_novos(novos)
+
+    return {"altura_anterior": anterior, "altura": armazem.tamanho(),
+            "blocos_enviados": len(novos), "reenvio_total": reenvio}
+
+
+def carregar_ledger(armazem):
+    """Cadeia gravada no armazenamento como Ledger, ou None se vazia."""
+    from smartlog_ledger import Ledger
+
+    blocos = armazem.ler_intervalo(0)
+    return Ledger(blocos) if blocos else None
+
+
+def obter_armazem():
+    """
+    Armazenamento compartilhado do processo (app, auditoria, scripts),
+    criado na primeira chamada conforme SMARTLOG_ARMAZENAMENTO e
+    SMARTLOG_CAMINHO.
+    """
+    global _armazem_compartilhado
+    with _lock_configuracao:
+        if _armazem_compartilhado is None:
+            _armazem_compartilhado = criar_armazem(tipo_configurado(), os.getenv("SMARTLOG_CAMINHO"))
+        return _armazem_compartilhado
+
+
+__all__ = [
+    "QUALQUER_TOPO",
+    "ArmazemBlocos",
+    "ArquivoHistorico",
+    "ArmazemMemoria",
+    "ArmazemArquivo",
+    "ArmazemSQLite",
+    "TIPOS_ARMAZEM",
+    "criar_armazem",
+    "tipo_configurado",
+    "obter_armazem",
+    "salvar_ledger",
+    "carregar_ledger",
+]
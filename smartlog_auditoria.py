@@ -0,0 +1,250 @@
+# ===========================================================
+# smartlog_auditoria.py — Log de auditoria encadeado por hash
+# ===========================================================
+# Cada registro recebe um número de sequência, o hash do registro
+# anterior e o próprio hash (SHA-256 do JSON canônico), como os
+# blocos da cadeia: alterar ou remover um registro quebra o
+# encadeamento e verificar_auditoria aponta onde.
+#
+# LogAuditoria guarda o log em segmentos diários imutáveis na prática
+# (<diretorio>/<AAAA-MM-DD>.jsonl, só anexos), com um índice por ação
+# e horário montado sob demanda para cada dia consultado: uma consulta
+# por intervalo só abre os segmentos dos dias do intervalo.
+# ===========================================================
+
+from datetime import datetime
+import hashlib
+import json
+import os
+
+HASH_INICIAL = "0" * 64
+
+
+def hash_registro(registro):
+    """SHA-256 do registro (sem o campo "hash") em JSON canônico."""
+    conteudo = {k: v for k, v in registro.items() if k != "hash"}
+    return hashlib.sha256(
+        json.dumps(conteudo, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str).encode()
+    ).hexdigest()
+
+
+def encadear(registros, anterior=None):
+    """
+    Cópias dos registros encadeadas a partir de `anterior` (último
+    registro já gravado, ou None): seq, hash_anterior e hash. Registros
+    sem timestamp recebem o horário atual (UTC, ISO).
+    """
+    seq = anterior["seq"] + 1 if anterior else 0
+    hash_anterior = anterior["hash"] if anterior else HASH_INICIAL
+
+    encadeados = []
+    for registro in registros:
+        novo = dict(registro, seq=seq, hash_anterior=hash_anterior)
+        novo.setdefault("timestamp", datetime.utcnow().isoformat())
+        novo["hash"] = hash_anterior = hash_registro(novo)
+        encadeados.append(novo)
+        seq += 1
+    return encadeados
+
+
+def verificar_auditoria(registros, anterior=None, contiguo=True):
+    """
+    Posição do primeiro registro adulterado, ou None. O hash de cada
+    registro é sempre recalculado.
+
+    contiguo=True (leitura de ler_auditoria, com ou sem `anterior`):
+    cada registro deve ter a seq seguinte à do anterior e apontar para
+    o hash dele — um registro removido do meio é apontado na posição da
+    lacuna. Sem `anterior`, um log que começa na seq 0 deve partir de
+    HASH_INICIAL; com `anterior`, o primeiro deve encadear nele.
+
+    contiguo=False (resultado filtrado de consultar_auditoria): lacunas
+    de seq são esperadas; confere os hashes e o encadeamento só entre
+    registros de seq consecutiva.
+    """
+    for i, registro in enumerate(registros):
+        if registro.get("hash") != hash_registro(registro):
+            return i
+
+        elo = registros[i - 1] if i else anterior
+        if elo is None:
+            if contiguo and registro.get("seq") == 0 and registro.get("hash_anterior") != HASH_INICIAL:
+                return i
+            continue
+
+        consecutivo = registro.get("seq") == elo["seq"] + 1
+        if contiguo and not consecutivo:
+            return i
+        if consecutivo and registro.get("hash_anterior") != elo["hash"]:
+            return i
+
+    return None
+
+
+def no_intervalo(registro, inicio=None, fim=None, acao=None):
+    """O registro tem inicio <= timestamp < fim e a ação pedida?"""
+    timestamp = registro.get("timestamp") or ""
+    return (
+        (acao is None or registro.get("acao") == acao)
+        and (inicio is None or timestamp >= inicio)
+        and (fim is None or timestamp < fim)
+    )
+
+
+# ===========================================================
+# SEGMENTOS DIÁRIOS (arquivo)
+# ===========================================================
+
+def _dia(registro):
+    return str(registro.get("timestamp"))[:10]
+
+
+class LogAuditoria:
+    """
+    Log de auditoria encadeado em <diretorio>/<AAAA-MM-DD>.jsonl.
+    Um escritor por diretório (quem chama serializa os anexos).
+    """
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        os.makedirs(diretorio, exist_ok=True)
+
+        self._indices = {}    # dia → ([(timestamp, posição)], {acao: [(timestamp, posição)]})
+
+        # Um registro com horário atrasado vai para o segmento do seu dia:
+        # o último da cadeia é o de maior seq entre os finais dos segmentos
+        finais = [r for r in (self._ultima_linha(dia) for dia in self.dias()) if r is not None]
+        self._ultimo = max(finais, key=lambda r: r["seq"], default=None)
+
+    def _caminho(self, dia):
+        return os.path.join(self.diretorio, f"{dia}.jsonl")
+
+    def dias(self):
+        return sorted(n[:-len(".jsonl")] for n in os.listdir(self.diretorio) if n.endswith(".jsonl"))
+
+    def ultimo(self):
+        return self._ultimo
+
+    def registrar(self, registros):
+        """Encadeia e anexa os registros (um write + fsync por dia tocado)."""
+        encadeados = encadear(registros, self._ultimo)
+        if not encadeados:
+            return encadeados
+
+        por_dia = {}
+        for registro in encadeados:
+            por_dia.setdefault(_dia(registro), []).append(registro)
+
+        for dia, lote in por_dia.items():
+            linhas = [json.dumps(r, ensure_ascii=False, separators=(",", ":")).encode() + b"\n" for r in lote]
+            with open(self._caminho(dia), "ab") as f:
+                posicao = f.tell()
+                f.write(b"".join(linhas))
+                f.flush()
+                os.fsync(f.fileno())
+
+            indice = self._indices.get(dia)
+            if indice is not None:
+                for registro, linha in zip(lote, linhas):
+                    self._indexar(indice, registro, posicao)
+                    posicao += len(linha)
+
+        self._ultimo = encadeados[-1]
+        return encadeados
+
+    @staticmethod
+    def _indexar(indice, registro, posicao):
+        todos, por_acao = indice
+        entrada = (registro.get("timestamp") or "", posicao)
+        todos.append(entrada)
+        por_acao.setdefault(registro.get("acao"), []).append(entrada)
+
+    def _indice(self, dia):
+        indice = self._indices.get(dia)
+        if indice is None:
+            indice = ([], {})
+            posicao = 0
+            with open(self._caminho(dia), "rb") as f:
+                for linha in f:
+                    if linha.strip():
+                        self._indexar(indice, json.loads(linha), posicao)
+                    posicao += len(linha)
+            self._indices[dia] = indice
+        return indice
+
+    def _ultima_linha(self, dia):
+        """
+        Último registro do segmento, ou None se vazio. Uma linha
+        incompleta no fim (queda no meio da escrita) é descartada e o
+        arquivo truncado ali, como em LogBlocos.carregar.
+        """
+        caminho = self._caminho(dia)
+        with open(caminho, "r+b") as f:
+            fim = f.seek(0, os.SEEK_END)
+            bloco = 4096
+            while True:
+                inicio = max(0, fim - bloco)
+                f.seek(inicio)
+                dados = f.read(fim - inicio)
+                integro = dados.rfind(b"\n") + 1
+                linhas = dados[:integro].rstrip(b"\n").split(b"\n")
+                if inicio == 0 or (integro and len(linhas) > 1):
+                    break
+                bloco *= 2
+
+            if inicio + integro != fim:
+                print(f"⚠️ Auditoria {caminho}: final corrompido descartado ({inicio + integro} bytes íntegros).")
+                f.truncate(inicio + integro)
+
+        return json.loads(linhas[-1]) if linhas[-1].strip() else None
+
+    def _ler_segmento(self, dia):
+        with open(self._caminho(dia), "rb") as f:
+            return [json.loads(linha) for linha in f if linha.strip()]
+
+    def consultar(self, inicio=None, fim=None, acao=None, limite=None):
+        """Registros com inicio <= timestamp < fim (e a ação, se dada), em ordem de seq."""
+        resultado = []
+        for dia in self.dias():
+            if (inicio and dia < inicio[:10]) or (fim and dia > fim[:10]):
+                continue
+
+            todos, por_acao = self._indice(dia)
+            entradas = todos if acao is None else por_acao.get(acao, [])
+            posicoes = [
+                p for t, p in entradas
+                if (inicio is None or t >= inicio) and (fim is None or t < fim)
+            ]
+            if not posicoes:
+                continue
+
+            with open(self._caminho(dia), "rb") as f:
+                for p in posicoes:
+                    f.seek(p)
+                    resultado.append(json.loads(f.readline()))
+
+        resultado.sort(key=lambda r: r["seq"])
+        return resultado[:limite] if limite else resultado
+
+    def ler(self, limite=None):
+        """Últimos `limite` registros (todos se None), em ordem de seq."""
+        if self._ultimo is None:
+            return []
+
+        primeiro = max(0, self._ultimo["seq"] + 1 - limite) if limite else 0
+        registros = []
+        for dia in reversed(self.dias()):
+            registros += [r for r in self._ler_segmento(dia) if r["seq"] >= primeiro]
+            if len(registros) == self._ultimo["seq"] + 1 - primeiro:
+                break
+        return sorted(registros, key=lambda r: r["seq"])
+
+
+__all__ = [
+    "HASH_INICIAL",
+    "hash_registro",
+    "encadear",
+    "verificar_auditoria",
+    "no_intervalo",
+    "LogAuditoria",
+]
@@ -5,11 +5,23 @@
 # Versão 3 — Totalmente determinística, com bloco gênesis garantido
 # ===========================================================
 
+import numpy as np
 import pandas as pd
 import hashlib
 import json
+from collections import Counter, OrderedDict
 from datetime import datetime
+from functools import lru_cache
+import threading
 import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+
+from smartlog_ledger import INTERVALO_CHECKPOINT, Ledger, como_ledger
+from smartlog_merkle import gerar_prova, hash_folha, raiz_merkle, verificar_prova
 
 # ===========================================================
 # HASH DETERMINÍSTICO
@@ -22,6 +34,52 @@ def gerar_hash(conteudo, hash_anterior):
     bloco_str = f"{conteudo}{hash_anterior}"
     return hashlib.sha256(bloco_str.encode()).hexdigest()
 
+# Encoder reaproveitado: json.dumps(..., sort_keys=True) recria um
+# JSONEncoder a cada chamada; a saída é idêntica
+_json_ordenado = json.JSONEncoder(ensure_ascii=False, sort_keys=True).encode
+_decodificar_trecho = json.JSONDecoder().raw_decode
+
+# ===========================================================
+# CODIFICAÇÃO CANÔNICA DOS EVENTOS
+# ===========================================================
+# Cada evento é serializado uma única vez em JSON canônico (chaves
+# ordenadas, UTF-8) — a mesma forma que entra na folha Merkle. O JSON
+# gravado no bloco, e enviado aos nós, é a lista dessas formas; na
+# validação, cada evento é recortado do texto, sem re-serializar.
+
+def codificar_eventos(eventos):
+    """(forma canônica de cada evento, JSON canônico do bloco)."""
+    if isinstance(eventos, list):
+        canonicos = [_json_ordenado(e) for e in eventos]
+        return canonicos, "[" + ", ".join(canonicos) + "]"
+
+    canonico = _json_ordenado(eventos)
+    return [canonico], canonico
+
+
+def _recortar_eventos(eventos_json):
+    """
+    (texto de cada evento, evento decodificado) de um JSON de lista,
+    numa única leitura. None se o texto não for uma lista JSON.
+    """
+    if not eventos_json.startswith("["):
+        return None
+    if eventos_json == "[]":
+        return []
+
+    recortes, i = [], 1
+    try:
+        while True:
+            evento, fim = _decodificar_trecho(eventos_json, i)
+            recortes.append((eventos_json[i:fim], evento))
+            if eventos_json[fim:] == "]":
+                return recortes
+            if not eventos_json.startswith(", ", fim):
+                return None
+            i = fim + 2
+    except ValueError:
+        return None
+
 # ===========================================================
 # BLOCO GÊNESIS — FIXO E OBRIGATÓRIO
 # ===========================================================
@@ -43,164 +101,537 @@ GENESIS_BLOCK = {
 # CRIAÇÃO DA BLOCKCHAIN INICIAL
 # ===========================================================
 
+def _coluna_iso(serie):
+    """
+    Converte uma coluna datetime64 inteira para ISO 8601 de uma vez,
+    no mesmo formato de Timestamp.isoformat() (hashes não mudam).
+    """
+    if serie.dt.tz is not None:
+        return [v.isoformat() for v in serie]
+
+    valores = serie.to_numpy(dtype="datetime64[ns]")
+    fracao = valores.astype("int64") % 1_000_000_000
+
+    # isoformat() omite a fração quando zero e só usa nanossegundos se houver
+    iso = np.datetime_as_string(valores, unit="s")
+    if fracao.any():
+        iso = np.where(fracao == 0, iso, np.datetime_as_string(valores, unit="us"))
+        if (fracao % 1000).any():
+            iso = np.where(fracao % 1000 == 0, iso, np.datetime_as_string(valores, unit="ns"))
+
+    return iso.tolist()
+
+
+def _eventos_para_registros(df_eventos):
+    """
+    Converte as colunas de data uma única vez (por coluna, não por
+    valor) e monta os dicts das linhas a partir das colunas já em
+    listas Python — mesmo resultado de to_dict(orient="records"),
+    sem o custo de conversão célula a célula.
+
+    Diferença do caminho antigo (iterrows): num DataFrame só numérico
+    com colunas int e float misturadas, iterrows promovia a linha a
+    float (id_entrega 101 → 101.0); aqui cada coluna mantém seu tipo.
+    Para esses DataFrames o JSON dos eventos, e portanto os hashes dos
+    blocos iniciais, diferem das cadeias montadas antes.
+    """
+    nomes = list(df_eventos.columns)
+    colunas = []
+
+    for c in nomes:
+        serie = df_eventos[c]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            colunas.append(_coluna_iso(serie))
+        elif serie.dtype == object and pd.api.types.infer_dtype(serie) in ("datetime", "mixed"):
+            colunas.append([
+                v.isoformat() if isinstance(v, (datetime, pd.Timestamp)) else v
+                for v in serie
+            ])
+        else:
+            colunas.append(serie.tolist())
+
+    return [dict(zip(nomes, linha)) for linha in zip(*colunas)]
+
+
 def criar_blockchain_inicial(df_eventos=None, limite_blocos=20):
     """
     Cria blockchain sempre iniciando pelo bloco gênesis.
     Mesmo que df_eventos esteja vazio ou None.
+    Com limite_blocos=None, todas as linhas de df_eventos viram blocos.
     """
-    blockchain = [GENESIS_BLOCK]  # Sempre inicia com 1 bloco
+    blockchain = Ledger([GENESIS_BLOCK])  # Sempre inicia com 1 bloco
     hash_anterior = GENESIS_HASH
 
     # Se não houver eventos → retorna apenas o gênesis
     if df_eventos is None or len(df_eventos) == 0:
-        return pd.DataFrame(blockchain)
-
-    # Adiciona blocos derivados dos eventos iniciais
-    for _, evento in df_eventos.head(limite_blocos).iterrows():
-
-        lote = evento.to_dict()
-        for k, v in lote.items():
-            if isinstance(v, (datetime, pd.Timestamp)):
-                lote[k] = v.isoformat()
-
-        conteudo_json = json.dumps(lote, ensure_ascii=False, sort_keys=True)
-        hash_atual = gerar_hash(conteudo_json, hash_anterior)
-
-        bloco = {
-            "bloco_id": len(blockchain),
-            "eventos": lote,
-            "hash_anterior": hash_anterior,
-            "hash_atual": hash_atual,
-            "tx_id": f"INIT_{len(blockchain)}",
-            "timestamp": GENESIS_TIMESTAMP
-        }
+        return blockchain
+
+    if limite_blocos is not None:
+        df_eventos = df_eventos.head(limite_blocos)
+
+    # Adiciona blocos derivados dos eventos iniciais (uma única passada)
+    lotes = _eventos_para_registros(df_eventos)
+    anteriores, atuais = [], []
+
+    for lote in lotes:
+        hash_atual = gerar_hash(_json_ordenado(lote), hash_anterior)
 
-        blockchain.append(bloco)
+        anteriores.append(hash_anterior)
+        atuais.append(hash_atual)
         hash_anterior = hash_atual
 
-    return pd.DataFrame(blockchain)
+    alturas = range(1, len(lotes) + 1)
+    blockchain.anexar_colunas({
+        "bloco_id": list(alturas),
+        "eventos": lotes,
+        "hash_anterior": anteriores,
+        "hash_atual": atuais,
+        "tx_id": [f"INIT_{i}" for i in alturas],
+        "timestamp": [GENESIS_TIMESTAMP] * len(lotes),
+    })
+
+    # Cadeia montada aqui mesmo → já nasce verificada
+    blockchain.registrar_verificacao(len(blockchain))
+    return blockchain
 
 # ===========================================================
 # VALIDAÇÃO
 # ===========================================================
 
-def validar_blockchain(blockchain_df):
+# Abaixo disso, o custo de subir processos supera o ganho
+MIN_BLOCOS_POR_WORKER = 5_000
+
+# Digests já calculados, endereçados pelo conteúdo do bloco
+CAPACIDADE_CACHE_DIGEST = 50_000
+
+
+class CacheDigest:
     """
-    Verifica encadeamento completo da blockchain.
+    LRU limitado de hashes recalculados. A chave é o próprio conteúdo
+    que entra no hash (eventos em JSON, hash_anterior, tx_id, raiz
+    Merkle): um bloco alterado tem outra chave e é recalculado, então
+    a adulteração continua sendo detectada. As strings da chave são as
+    mesmas do ledger (referências), não cópias.
     """
-    if blockchain_df is None or len(blockchain_df) == 0:
-        return False
 
-    for i in range(1, len(blockchain_df)):
-        atual = blockchain_df.iloc[i]
-        anterior = blockchain_df.iloc[i - 1]
+    def __init__(self, capacidade=CAPACIDADE_CACHE_DIGEST):
+        self.capacidade = capacidade
+        self._digests = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+
+    def obter(self, chave):
+        with self._lock:
+            digest = self._digests.get(chave)
+            if digest is None:
+                self.falhas += 1
+            else:
+                self.acertos += 1
+                self._digests.move_to_end(chave)
+            return digest
+
+    def guardar(self, chave, digest):
+        with self._lock:
+            self._digests[chave] = digest
+            while len(self._digests) > self.capacidade:
+                self._digests.popitem(last=False)
+                self.descartes += 1
+
+    def limpar(self):
+        with self._lock:
+            self._digests.clear()
+            self.acertos = self.falhas = self.descartes = 0
+
+    def estatisticas(self):
+        consultas = self.acertos + self.falhas
+        return {
+            "tamanho": len(self._digests),
+            "capacidade": self.capacidade,
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "descartes": self.descartes,
+            "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+        }
 
-        conteudo = json.dumps(atual.eventos, ensure_ascii=False, sort_keys=True)
-        recalculado = gerar_hash(conteudo, atual.hash_anterior)
 
-        if atual.hash_anterior != anterior.hash_atual:
-            return False
+cache_digest = CacheDigest()
+
+
+def recalcular_hash_bloco(eventos, hash_anterior, tx_id, merkle_raiz=None):
+    """
+    Recalcula o hash de um bloco gravado.
+    Blocos iniciais guardam o evento como dict; blocos confirmados por
+    consenso guardam os eventos em JSON e têm o hash calculado sobre a
+    raiz Merkle + tx_id (ou sobre o JSON + tx_id, se anteriores à raiz).
+    Blocos em JSON passam pelo cache_digest.
+    """
+    if not isinstance(eventos, str):
+        return _recalcular_hash_bloco(eventos, hash_anterior, tx_id, merkle_raiz)
+
+    chave = (eventos, hash_anterior, tx_id, merkle_raiz)
+    digest = cache_digest.obter(chave)
+    if digest is None:
+        digest = _recalcular_hash_bloco(eventos, hash_anterior, tx_id, merkle_raiz)
+        if digest is not None:
+            cache_digest.guardar(chave, digest)
+    return digest
+
+
+def _recalcular_hash_bloco(eventos, hash_anterior, tx_id, merkle_raiz):
+    if isinstance(eventos, str):
+        recortes = _recortar_eventos(eventos) if isinstance(merkle_raiz, str) else None
+        if recortes is not None:
+            # JSON canônico: as folhas saem do próprio texto; senão
+            # (blocos gravados antes da codificação canônica), re-serializa
+            if raiz_merkle([hash_folha(t) for t, _ in recortes]) == merkle_raiz or \
+                    raiz_merkle([hash_folha(_json_ordenado(e)) for _, e in recortes]) == merkle_raiz:
+                return gerar_hash(f"{merkle_raiz}-{tx_id}", hash_anterior)
+            return None
+
+        try:
+            eventos = json.loads(eventos)
+        except ValueError:
+            return None
+
+        if not isinstance(merkle_raiz, str):
+            return gerar_hash(_conteudo_proposta(eventos, tx_id), hash_anterior)
+
+        if calcular_merkle_raiz(eventos) != merkle_raiz:
+            return None
+        return gerar_hash(f"{merkle_raiz}-{tx_id}", hash_anterior)
+
+    return gerar_hash(_json_ordenado(eventos), hash_anterior)
+
+
+def _verificar_intervalo(inicio, hash_limite, eventos, anteriores, atuais, tx_ids, raizes):
+    """
+    Verifica um trecho da cadeia e devolve a primeira altura inválida
+    (ou None). hash_limite é o hash do bloco imediatamente anterior ao
+    trecho, para checar o encadeamento na fronteira.
+    Função de nível de módulo para poder rodar em outro processo.
+    """
+    anterior = hash_limite
+    for j in range(len(atuais)):
+        if anteriores[j] != anterior:
+            return inicio + j
+
+        if atuais[j] != recalcular_hash_bloco(eventos[j], anteriores[j], tx_ids[j], raizes[j]):
+            return inicio + j
+
+        anterior = atuais[j]
+
+    return None
+
+
+def _dividir_faixas(inicio, fim, workers):
+    """Divide [inicio, fim) em até `workers` faixas contíguas."""
+    total = fim - inicio
+    partes = max(1, min(workers, total // MIN_BLOCOS_POR_WORKER))
+    passo = -(-total // partes)
+    return [(a, min(a + passo, fim)) for a in range(inicio, fim, passo)]
 
-        if atual.hash_atual != recalculado:
-            return False
 
-    return True
+def localizar_bloco_invalido(blockchain, incremental=True, workers=1):
+    """
+    Retorna a primeira altura inválida da cadeia, ou None se íntegra.
+
+    Com workers > 1, cadeias grandes são divididas em faixas verificadas
+    em paralelo num pool de processos; cada faixa recebe o hash do bloco
+    anterior a ela para checar o encadeamento na fronteira.
+    """
+    ledger = como_ledger(blockchain)
+    inicio = max(ledger.inicio_verificacao() if incremental else 0, 1)
+    fim = len(ledger)
+
+    if inicio >= fim:
+        ledger.registrar_verificacao(fim)
+        return None
+
+    # Só o trecho a verificar (mais o hash da fronteira) é lido
+    base = inicio - 1
+    eventos = ledger.coluna("eventos", base)
+    anteriores = ledger.coluna("hash_anterior", base)
+    atuais = ledger.coluna("hash_atual", base)
+    tx_ids = ledger.coluna("tx_id", base)
+    raizes = ledger.coluna("merkle_raiz", base)
+
+    faixas = _dividir_faixas(inicio, fim, workers)
+    args = []
+    for a, b in faixas:
+        i, j = a - base, b - base
+        args.append((a, atuais[i - 1], eventos[i:j], anteriores[i:j], atuais[i:j], tx_ids[i:j], raizes[i:j]))
+
+    if len(faixas) == 1:
+        resultados = [_verificar_intervalo(*args[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=len(faixas)) as pool:
+            resultados = list(pool.map(_verificar_intervalo, *zip(*args)))
+
+    invalidos = [r for r in resultados if r is not None]
+    ruim = min(invalidos) if invalidos else None
+
+    ledger.registrar_verificacao(fim if ruim is None else ruim)
+    return ruim
+
+
+def validar_blockchain(blockchain, incremental=True, workers=1):
+    """
+    Verifica encadeamento da blockchain (Ledger ou DataFrame).
+
+    Com incremental=True, um Ledger lembra a altura e o hash do topo
+    já verificados e só o sufixo novo é checado; se o prefixo mudou
+    (ex.: nó adulterado), a verificação volta a ser completa.
+    workers > 1 distribui a verificação entre processos.
+    """
+    if blockchain is None or len(blockchain) == 0:
+        return False
+
+    return localizar_bloco_invalido(blockchain, incremental, workers) is None
 
 # ===========================================================
 # NÓS (copiados sempre iguais)
 # ===========================================================
 
-def criar_nos(blockchain_df, total=3):
+def criar_nos(blockchain, total=3):
     """
-    Cria N nós idênticos (deep copy garantido).
+    Cria N nós idênticos. Os nós compartilham o mesmo armazenamento
+    (copy-on-write) e só se separam quando divergirem.
     """
-    return {f"Node_{chr(65+i)}": blockchain_df.copy() for i in range(total)}
+    ledger = como_ledger(blockchain)
+    return {f"Node_{chr(65+i)}": ledger.copy() for i in range(total)}
 
 # ===========================================================
 # CONSENSO (determinístico)
 # ===========================================================
 
+def _impressao(ledger):
+    if ledger is None or len(ledger) == 0:
+        return "VAZIO"
+    return como_ledger(ledger).impressao()
+
+def _impressao_majoritaria(impressoes):
+    freq = {}
+    for imp in impressoes.values():
+        freq[imp] = freq.get(imp, 0) + 1
+    return max(freq, key=freq.get)
+
 def validar_consenso(nos):
     """
-    Checa se todos os nós têm o mesmo hash final.
-    Evita erros quando algum nó está vazio.
+    Checa se todos os nós têm exatamente o mesmo conteúdo.
+    Compara a impressão digital da cadeia inteira (não só o hash final),
+    então blocos antigos adulterados também quebram o consenso.
     """
-    ultimos = []
-    for df in nos.values():
-        if df is None or len(df) == 0:
-            ultimos.append("VAZIO")
-        else:
-            ultimos.append(df.iloc[-1]["hash_atual"])
-
-    return len(set(ultimos)) == 1
+    return len({_impressao(ledger) for ledger in nos.values()}) <= 1
 
 def detectar_no_corrompido(nos):
     """
-    Identifica nós fora do consenso.
+    Identifica nós fora do consenso (conteúdo diferente do majoritário).
+    """
+    impressoes = {nome: _impressao(ledger) for nome, ledger in nos.items()}
+    majoritaria = _impressao_majoritaria(impressoes)
+
+    return [n for n, imp in impressoes.items() if imp != majoritaria]
+
+def primeira_divergencia(ledger_a, ledger_b):
     """
-    ultimos = {}
-    for nome, df in nos.items():
-        if df is None or len(df) == 0:
-            ultimos[nome] = "VAZIO"
+    Primeira altura em que os dois ledgers diferem (qualquer campo de
+    qualquer bloco), ou None se forem idênticos.
+
+    Busca binária sobre os checkpoints de conteúdo — O(log n)
+    comparações — seguida de busca binária dentro de um único intervalo.
+    """
+    a, b = como_ledger(ledger_a), como_ledger(ledger_b)
+    limite = min(len(a), len(b))
+
+    if a.compartilha_com(b):
+        return None if len(a) == len(b) else limite
+
+    # 1) último checkpoint comum
+    cps_a, cps_b = a.checkpoints(), b.checkpoints()
+    lo, hi = 0, min(len(cps_a), len(cps_b), limite // INTERVALO_CHECKPOINT)
+    while lo < hi:
+        meio = (lo + hi + 1) // 2
+        if cps_a[meio - 1] == cps_b[meio - 1]:
+            lo = meio
+        else:
+            hi = meio - 1
+
+    # 2) dentro do intervalo seguinte
+    lo, hi = lo * INTERVALO_CHECKPOINT, min(limite, (lo + 1) * INTERVALO_CHECKPOINT)
+    while lo < hi:
+        meio = (lo + hi + 1) // 2
+        if a.acumulado_em(meio) == b.acumulado_em(meio):
+            lo = meio
         else:
-            ultimos[nome] = df.iloc[-1]["hash_atual"]
+            hi = meio - 1
 
-    freq = {}
-    for h in ultimos.values():
-        freq[h] = freq.get(h, 0) + 1
+    if lo == len(a) == len(b):
+        return None
+    return lo
 
-    hash_ok = max(freq, key=freq.get)
+def altura_comum(ledger_a, ledger_b):
+    """
+    Maior altura h tal que os blocos [0, h) são idênticos nos dois
+    ledgers (ponto de bifurcação).
+    """
+    h = primeira_divergencia(ledger_a, ledger_b)
+    return len(ledger_a) if h is None else h
 
-    return [n for n, h in ultimos.items() if h != hash_ok]
+def detectar_divergencias(nos):
+    """
+    Altura de bifurcação de cada nó em relação ao conteúdo majoritário:
+    {nó: altura} para os divergentes, None para os que estão em consenso.
+    """
+    impressoes = {nome: _impressao(ledger) for nome, ledger in nos.items()}
+    majoritaria = _impressao_majoritaria(impressoes)
+    referencia = next(nos[n] for n, imp in impressoes.items() if imp == majoritaria)
 
-def recuperar_no(nos, hash_ok):
+    return {
+        nome: None if imp == majoritaria else primeira_divergencia(nos[nome], referencia)
+        for nome, imp in impressoes.items()
+    }
+
+def recuperar_nos_divergentes(nos, hash_ok):
     """
-    Restaura nó copiando blockchain do nó majoritário.
+    Ressincroniza os nós fora do consenso a partir do nó majoritário,
+    reescrevendo apenas o sufixo após o ponto de bifurcação.
+    Retorna {nó: {"altura_comum": h, "reescritos": k, "descartados": d}}:
+    k blocos copiados do majoritário e d blocos próprios removidos.
     """
-    base = None
-    for df in nos.values():
-        if len(df) > 0 and df.iloc[-1]["hash_atual"] == hash_ok:
-            base = df.copy()
-            break
+    impressoes = {nome: _impressao(ledger) for nome, ledger in nos.items()}
 
-    if base is None:
+    candidatos = [
+        n for n, ledger in nos.items()
+        if len(ledger) > 0 and como_ledger(ledger).ultimo_hash == hash_ok
+    ]
+    if not candidatos:
         raise ValueError("Nenhum nó válido encontrado para recuperação.")
 
-    for nome, df in nos.items():
-        if len(df) == 0 or df.iloc[-1]["hash_atual"] != hash_ok:
-            nos[nome] = base.copy()
+    # Entre os nós com o hash final esperado, usa o conteúdo mais comum
+    majoritaria = _impressao_majoritaria({n: impressoes[n] for n in candidatos})
+    base = como_ledger(next(nos[n] for n in candidatos if impressoes[n] == majoritaria))
+
+    relatorio = {}
+    for nome, ledger in nos.items():
+        if impressoes[nome] == majoritaria:
+            continue
 
+        ledger = como_ledger(ledger)
+        h = altura_comum(ledger, base)
+        reescritos, descartados = ledger.ressincronizar(base, h)
+        relatorio[nome] = {"altura_comum": h, "reescritos": reescritos, "descartados": descartados}
+        nos[nome] = ledger
+
+    return relatorio
+
+def recuperar_no(nos, hash_ok):
+    """
+    Restaura nós corrompidos a partir do nó majoritário (apenas o
+    trecho divergente é reescrito).
+    """
+    recuperar_nos_divergentes(nos, hash_ok)
     return nos
 
 # ===========================================================
 # PROPOSTA E VOTAÇÃO PoA
 # ===========================================================
 
+# Cada nó tem um par Ed25519. A chave privada é um segredo em texto
+# (CHAVE_NO no nó, simular_chaves_privadas no simulador) e a semente
+# de 32 bytes é o SHA-256 dele; chaves públicas e assinaturas
+# circulam em hex. Quem verifica só precisa das chaves públicas.
+
 def simular_chaves_privadas(nos):
     return {n: f"key_{n}_secret" for n in nos}
 
+@lru_cache(maxsize=1024)
+def _par_ed25519(chave_privada):
+    return Ed25519PrivateKey.from_private_bytes(hashlib.sha256(chave_privada.encode()).digest())
+
+@lru_cache(maxsize=4096)
+def _chave_ed25519(chave_publica):
+    return Ed25519PublicKey.from_public_bytes(bytes.fromhex(chave_publica))
+
+def chave_publica(chave_privada):
+    """Chave pública (hex) do par Ed25519 derivado de `chave_privada`."""
+    return _par_ed25519(chave_privada).public_key().public_bytes(
+        serialization.Encoding.Raw, serialization.PublicFormat.Raw
+    ).hex()
+
+def chaves_publicas_de(chaves_privadas):
+    """{nó: chave privada} → {nó: chave pública}."""
+    return {n: chave_publica(c) for n, c in chaves_privadas.items()}
+
+@lru_cache(maxsize=64)
+def _chaves_publicas_simuladas(nos):
+    return chaves_publicas_de(simular_chaves_privadas(nos))
+
 def assinar_bloco(chave_privada, hash_bloco):
-    return hashlib.sha256((chave_privada + ":" + hash_bloco).encode()).hexdigest()
+    """Assinatura Ed25519 (hex) do nó sobre `hash_bloco`."""
+    return _par_ed25519(chave_privada).sign(hash_bloco.encode()).hex()
+
+# Assinaturas já conferidas: auditar a cadeia depois do consenso não
+# repete a verificação (a chave inclui a assinatura, então uma
+# assinatura trocada é verificada de novo)
+@lru_cache(maxsize=65_536)
+def _assinatura_confere(chave_publica, hash_bloco, assinatura):
+    try:
+        _chave_ed25519(chave_publica).verify(bytes.fromhex(assinatura), hash_bloco.encode())
+        return True
+    except (InvalidSignature, ValueError):
+        return False
 
-def propor_bloco(nodo_nome, eventos, hash_anterior):
+def verificar_assinatura(chave_publica, hash_bloco, assinatura):
+    """Confere a assinatura Ed25519 de um nó sobre `hash_bloco` com a chave pública (hex)."""
+    if not all(isinstance(v, str) for v in (chave_publica, hash_bloco, assinatura)):
+        return False
+    return _assinatura_confere(chave_publica, hash_bloco, assinatura)
+
+def verificar_assinaturas(itens):
     """
-    Cria proposta determinística (sem timestamp).
+    Verifica em lote (chave_publica, hash_bloco, assinatura) — os votos
+    de uma rodada ou as assinaturas de uma cadeia inteira. Cada chave
+    pública é decodificada uma vez por processo e itens repetidos ou
+    já conferidos saem do cache. Retorna [bool] na ordem dos itens.
     """
-    tx_id = str(uuid.uuid4())
+    return [verificar_assinatura(*item) for item in itens]
+
+def _folhas_eventos(eventos):
+    return [hash_folha(c) for c in codificar_eventos(eventos)[0]]
+
+def calcular_merkle_raiz(eventos):
+    """Raiz Merkle sobre os eventos do lote (um evento = uma folha)."""
+    return raiz_merkle(_folhas_eventos(eventos))
 
+def _conteudo_proposta(eventos, tx_id):
     if isinstance(eventos, (list, dict)):
-        conteudo = json.dumps(eventos, ensure_ascii=False, sort_keys=True)
+        conteudo = _json_ordenado(eventos)
     else:
         conteudo = str(eventos)
 
-    conteudo_final = f"{conteudo}-{tx_id}"
-    hash_bloco = gerar_hash(conteudo_final, hash_anterior)
+    return f"{conteudo}-{tx_id}"
+
+def propor_bloco(nodo_nome, eventos, hash_anterior):
+    """
+    Cria proposta determinística (sem timestamp).
+    O hash do bloco cobre a raiz Merkle dos eventos + tx_id; a
+    codificação canônica (eventos_json) é calculada aqui, uma vez, e
+    reaproveitada no bloco gravado.
+    """
+    tx_id = str(uuid.uuid4())
+    canonicos, eventos_json = codificar_eventos(eventos)
+    merkle_raiz = raiz_merkle([hash_folha(c) for c in canonicos])
+    hash_bloco = gerar_hash(f"{merkle_raiz}-{tx_id}", hash_anterior)
 
     return {
         "propositor": nodo_nome,
         "eventos": eventos,
+        "eventos_json": eventos_json,
         "hash_anterior": hash_anterior,
         "hash_bloco": hash_bloco,
+        "merkle_raiz": merkle_raiz,
         "tx_id_proposta": tx_id,
         "assinaturas": {}
     }
@@ -210,7 +641,7 @@ def votar_proposta(proposta, nos, chaves_privadas):
     Nó vota somente se estiver alinhado com o hash_anterior.
     """
     for n in nos.keys():
-        ultimo_hash = nos[n].iloc[-1]["hash_atual"]
+        ultimo_hash = como_ledger(nos[n]).ultimo_hash
 
         if ultimo_hash == proposta["hash_anterior"]:
             assinatura = assinar_bloco(chaves_privadas[n], proposta["hash_bloco"])
@@ -224,61 +655,235 @@ def votar_proposta(proposta, nos, chaves_privadas):
 # CONSENSO FINAL
 # ===========================================================
 
-def aplicar_consenso(proposta, nos, quorum=2):
-    votos_validos = sum(
-        1 for a in proposta["assinaturas"].values()
-        if not a.startswith("Recusado")
-    )
+def _assinaturas_validas(assinaturas, hash_bloco, chaves_publicas):
+    """{nó: assinatura} só com as que conferem com a chave pública do nó."""
+    votos = [
+        (n, a) for n, a in assinaturas.items()
+        if n in chaves_publicas and isinstance(a, str) and not a.startswith("Recusado")
+    ]
+    confere = verificar_assinaturas((chaves_publicas[n], hash_bloco, a) for n, a in votos)
+    return {n: a for (n, a), ok in zip(votos, confere) if ok}
+
+def aplicar_consenso(proposta, nos, quorum=2, chaves_publicas=None):
+    """
+    Confirma a proposta se ao menos `quorum` nós assinaram hash_bloco
+    com assinaturas que conferem. chaves_publicas: {nó: chave pública};
+    por padrão, as das chaves simuladas dos nós.
+    """
+    if chaves_publicas is None:
+        chaves_publicas = _chaves_publicas_simuladas(tuple(nos))
 
-    if votos_validos < quorum:
+    assinaturas = _assinaturas_validas(proposta["assinaturas"], proposta["hash_bloco"], chaves_publicas)
+    if len(assinaturas) < quorum:
         return False, None
 
     tx_id_final = proposta["tx_id_proposta"]
+    bloco = bloco_da_proposta(proposta, None, assinaturas=assinaturas)
 
-    for nome, df in nos.items():
-        bloco = {
-            "bloco_id": len(df),
-            "eventos": json.dumps(proposta["eventos"], ensure_ascii=False),
-            "timestamp": GENESIS_TIMESTAMP,
-            "hash_anterior": proposta["hash_anterior"],
-            "hash_atual": proposta["hash_bloco"],
-            "tx_id": tx_id_final
-        }
+    for nome, ledger in nos.items():
+        ledger = como_ledger(ledger)
 
-        nos[nome] = pd.concat([df, pd.DataFrame([bloco])], ignore_index=True)
+        # Append O(1) amortizado — sem recopiar a cadeia a cada bloco
+        ledger.append(dict(bloco, bloco_id=len(ledger)))
+        nos[nome] = ledger
 
     return True, tx_id_final
 
+def bloco_da_proposta(proposta, bloco_id, eventos_json=None, assinaturas=None):
+    """
+    Bloco final (formato do ledger) de uma proposta aprovada, com as
+    assinaturas dos nós (por padrão, as não recusadas da proposta).
+    """
+    if eventos_json is None:
+        eventos_json = proposta.get("eventos_json") or codificar_eventos(proposta["eventos"])[1]
+    if assinaturas is None:
+        assinaturas = {
+            n: a for n, a in proposta["assinaturas"].items()
+            if isinstance(a, str) and not a.startswith("Recusado")
+        }
+
+    return {
+        "bloco_id": bloco_id,
+        "eventos": eventos_json,
+        "timestamp": GENESIS_TIMESTAMP,
+        "hash_anterior": proposta["hash_anterior"],
+        "hash_atual": proposta["hash_bloco"],
+        "merkle_raiz": proposta["merkle_raiz"],
+        "tx_id": proposta["tx_id_proposta"],
+        "assinaturas": assinaturas,
+    }
+
+def localizar_bloco_sem_quorum(blockchain, chaves_publicas, quorum=2):
+    """
+    Auditoria das assinaturas da cadeia: primeira altura cujo bloco
+    não tem `quorum` assinaturas válidas, ou None. Todas as assinaturas
+    são verificadas num único lote; blocos sem o campo (gênesis,
+    iniciais, anteriores às chaves Ed25519) ficam de fora.
+    """
+    ledger = como_ledger(blockchain)
+    hashes = ledger.coluna("hash_atual")
+    todas = ledger.coluna("assinaturas")
+
+    itens, alturas = [], []
+    for altura, (hash_bloco, assinaturas) in enumerate(zip(hashes, todas)):
+        if isinstance(assinaturas, dict):
+            for n, a in assinaturas.items():
+                if n in chaves_publicas:
+                    itens.append((chaves_publicas[n], hash_bloco, a))
+                    alturas.append(altura)
+
+    validas = Counter(a for a, ok in zip(alturas, verificar_assinaturas(itens)) if ok)
+    for altura, assinaturas in enumerate(todas):
+        if isinstance(assinaturas, dict) and validas[altura] < quorum:
+            return altura
+    return None
+
+def verificar_bloco(bloco, hash_anterior, chaves_publicas, quorum=2):
+    """
+    Confere um bloco recebido de outro nó antes de anexá-lo: encadeia
+    em `hash_anterior` (o topo de quem recebe), o hash confere com o
+    conteúdo e há ao menos `quorum` assinaturas válidas de nós em
+    `chaves_publicas`. Retorna o motivo da recusa, ou None.
+    """
+    if bloco.get("hash_anterior") != hash_anterior:
+        return "hash_anterior diverge do topo do nó"
+
+    hash_atual = bloco.get("hash_atual")
+    recalculado = recalcular_hash_bloco(bloco.get("eventos"), hash_anterior, bloco.get("tx_id"), bloco.get("merkle_raiz"))
+    if not isinstance(hash_atual, str) or recalculado != hash_atual:
+        return "hash_atual não confere com o conteúdo"
+
+    assinaturas = bloco.get("assinaturas")
+    validas = _assinaturas_validas(assinaturas, hash_atual, chaves_publicas) if isinstance(assinaturas, dict) else {}
+    if len(validas) < quorum:
+        return f"assinaturas válidas insuficientes ({len(validas)} de {quorum})"
+    return None
+
+# ===========================================================
+# PROVAS DE INCLUSÃO (MERKLE)
+# ===========================================================
+
+def gerar_prova_evento(blockchain, altura, id_entrega):
+    """
+    Prova O(log n) de que a entrega `id_entrega` está no bloco `altura`.
+    Basta o cabeçalho do bloco (merkle_raiz) para verificá-la.
+    """
+    bloco = como_ledger(blockchain).bloco(altura)
+    merkle_raiz = bloco.get("merkle_raiz")
+
+    if not isinstance(merkle_raiz, str):
+        raise ValueError(f"Bloco {altura} não possui raiz Merkle.")
+
+    eventos = bloco["eventos"]
+    if isinstance(eventos, str):
+        eventos = json.loads(eventos)
+    lista = eventos if isinstance(eventos, list) else [eventos]
+
+    for indice, evento in enumerate(lista):
+        if isinstance(evento, dict) and str(evento.get("id_entrega")) == str(id_entrega):
+            return {
+                "altura": bloco["bloco_id"],
+                "hash_bloco": bloco["hash_atual"],
+                "merkle_raiz": merkle_raiz,
+                "evento": evento,
+                "prova": gerar_prova(_folhas_eventos(lista), indice),
+            }
+
+    raise ValueError(f"Entrega {id_entrega} não encontrada no bloco {altura}.")
+
+def verificar_prova_evento(prova, merkle_raiz=None, *, hash_bloco=None, hash_anterior=None, tx_id=None):
+    """
+    Verifica uma prova de inclusão contra dados confiáveis — nunca só
+    contra o que acompanha a prova. Informe a merkle_raiz do bloco ou o
+    cabeçalho confiável (hash_bloco, hash_anterior, tx_id): nesse caso a
+    raiz da prova só é aceita se reproduzir hash_bloco.
+    """
+    if merkle_raiz is None:
+        if None in (hash_bloco, hash_anterior, tx_id):
+            raise ValueError("Informe merkle_raiz ou hash_bloco, hash_anterior e tx_id confiáveis.")
+        merkle_raiz = prova["merkle_raiz"]
+        if gerar_hash(f"{merkle_raiz}-{tx_id}", hash_anterior) != hash_bloco:
+            return False
+
+    folha = hash_folha(_json_ordenado(prova["evento"]))
+    return verificar_prova(folha, prova["prova"], merkle_raiz)
+
+# ===========================================================
+# CONSULTAS (ÍNDICES SECUNDÁRIOS)
+# ===========================================================
+
+def buscar_por_hash(blockchain, hash_bloco):
+    """Altura do bloco com esse hash, ou None."""
+    return como_ledger(blockchain).indice().por_hash.get(hash_bloco)
+
+def buscar_por_tx(blockchain, tx_id):
+    """Altura do bloco com esse tx_id, ou None."""
+    return como_ledger(blockchain).indice().por_tx.get(tx_id)
+
+def buscar_entrega(blockchain, id_entrega):
+    """Alturas dos blocos que registram a entrega `id_entrega`."""
+    return list(como_ledger(blockchain).indice().por_entrega.get(str(id_entrega), []))
+
+def buscar_por_risco(blockchain, risco):
+    """Alturas dos blocos com algum evento do nível de risco informado."""
+    return list(como_ledger(blockchain).indice().por_risco.get(str(risco), []))
+
 # ===========================================================
 # AUDITORIA
 # ===========================================================
 
 def auditar_nos(nos):
-    return pd.DataFrame([
-        {
+    linhas = []
+    for nome, ledger in nos.items():
+        topo = como_ledger(ledger).ultimo() or {}
+        linhas.append({
             "nó": nome,
-            "hash_final": df.iloc[-1]["hash_atual"],
-            "tx_id_final": df.iloc[-1]["tx_id"],
-            "tamanho": len(df),
-        }
-        for nome, df in nos.items()
-    ])
+            "hash_final": topo.get("hash_atual"),
+            "tx_id_final": topo.get("tx_id"),
+            "tamanho": len(ledger),
+        })
+    return pd.DataFrame(linhas)
 
 # ===========================================================
 # EXPORTAÇÃO
 # ===========================================================
 
 __all__ = [
+    "Ledger",
     "gerar_hash",
     "criar_blockchain_inicial",
+    "recalcular_hash_bloco",
+    "CacheDigest",
+    "cache_digest",
+    "localizar_bloco_invalido",
     "validar_blockchain",
     "criar_nos",
     "validar_consenso",
     "detectar_no_corrompido",
+    "primeira_divergencia",
+    "altura_comum",
+    "detectar_divergencias",
+    "recuperar_nos_divergentes",
     "recuperar_no",
     "simular_chaves_privadas",
+    "chave_publica",
+    "chaves_publicas_de",
+    "assinar_bloco",
+    "verificar_assinatura",
+    "verificar_assinaturas",
+    "codificar_eventos",
+    "calcular_merkle_raiz",
     "propor_bloco",
     "votar_proposta",
     "aplicar_consenso",
+    "bloco_da_proposta",
+    "localizar_bloco_sem_quorum",
+    "verificar_bloco",
+    "gerar_prova_evento",
+    "verificar_prova_evento",
+    "buscar_por_hash",
+    "buscar_por_tx",
+    "buscar_entrega",
+    "buscar_por_risco",
     "auditar_nos"
 ]
@@ -0,0 +1,426 @@
+# ===========================================================
+# smartlog_firestore.py — Persistência da cadeia em blocos (chunks)
+# ===========================================================
+# Em vez de um único documento com a cadeia inteira (limite de 1 MiB
+# e reenvio total a cada save), a cadeia fica em:
+#
+#   blockchains/<rede>                    → metadados (altura, hash do topo,
+#                                           altura inicial de cada chunk)
+#   blockchains/<rede>/blocos/<inicio>    → chunk de blocos consecutivos
+#
+# Um chunk fecha em BLOCOS_POR_CHUNK blocos ou BYTES_POR_CHUNK bytes
+# (medidos como o Firestore mede um documento), o que vier antes; como
+# o tamanho varia, as fronteiras ficam nos metadados. Salvar envia só
+# os chunks a partir da última altura persistida, em WriteBatches;
+# carregar lê os chunks em páginas paralelas (get_all).
+# O cliente Firestore é recebido como parâmetro (nada é inicializado
+# aqui), o que permite testar com um Firestore em memória.
+#
+# ArmazemFirestore expõe o mesmo layout pela interface ArmazemBlocos
+# (smartlog_armazenamento), com a auditoria em auditoria_logs.
+# ===========================================================
+
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import threading
+
+from smartlog_armazenamento import QUALQUER_TOPO, ArmazemBlocos
+from smartlog_auditoria import encadear
+from smartlog_ledger import Ledger, como_ledger
+
+COLECAO = "blockchains"
+REDE_PADRAO = "rede_principal"
+SUBCOLECAO_BLOCOS = "blocos"
+COLECAO_AUDITORIA = "auditoria_logs"
+
+BLOCOS_POR_CHUNK = 200        # teto de blocos por documento (o chunk final é regravado a cada anexo)
+BYTES_POR_CHUNK = 900_000     # teto de bytes por documento, com folga sob o limite de 1 MiB
+CHUNKS_POR_LOTE = 10          # documentos por WriteBatch (limite: 500 operações / 10 MiB)
+CHUNKS_POR_PAGINA = 20        # documentos por get_all na leitura
+LEITORES = 4                  # páginas lidas em paralelo
+LIMITE_OPERACOES_LOTE = 500   # máximo de operações num WriteBatch
+
+
+def _id_chunk(inicio):
+    # Zeros à esquerda: a ordem lexicográfica dos IDs é a ordem das alturas
+    return f"{inicio:012d}"
+
+
+def _valor_firestore(valor):
+    """Converte tipos que o Firestore não aceita (numpy, Timestamp, NaT)."""
+    if isinstance(valor, dict):
+        return {str(k): _valor_firestore(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_valor_firestore(v) for v in valor]
+    if valor is None or isinstance(valor, (str, bool, int, float)):
+        return valor
+    if hasattr(valor, "item") and not hasattr(valor, "isoformat"):   # escalares numpy
+        return _valor_firestore(valor.item())
+    return str(valor)                                                 # datas, Timestamp, NaT...
+
+
+def _tamanho_firestore(valor):
+    """
+    Bytes que o Firestore conta para um valor: strings e nomes de campo
+    em UTF-8 + 1, números 8, booleanos e nulos 1, mapas e listas a soma.
+    """
+    if isinstance(valor, str):
+        return len(valor.encode()) + 1
+    if valor is None or isinstance(valor, bool):
+        return 1
+    if isinstance(valor, (int, float)):
+        return 8
+    if isinstance(valor, dict):
+        return sum(len(str(k).encode()) + 1 + _tamanho_firestore(v) for k, v in valor.items())
+    if isinstance(valor, (list, tuple)):
+        return sum(_tamanho_firestore(v) for v in valor)
+    return len(str(valor).encode()) + 1
+
+
+def _cortar_chunks(blocos, inicio, blocos_por_chunk=BLOCOS_POR_CHUNK, bytes_por_chunk=BYTES_POR_CHUNK):
+    """
+    Divide blocos consecutivos (a partir da altura `inicio`) em chunks
+    [(altura inicial, blocos convertidos)] dentro dos dois tetos.
+    """
+    chunks, atual, ocupado = [], [], 0
+    for altura, bloco in enumerate(blocos, inicio):
+        convertido = _valor_firestore(bloco)
+        tamanho = _tamanho_firestore(convertido)
+        if tamanho > bytes_por_chunk:
+            raise ValueError(f"Bloco na altura {altura} excede o limite de um chunk ({tamanho} bytes).")
+
+        if atual and (len(atual) >= blocos_por_chunk or ocupado + tamanho > bytes_por_chunk):
+            chunks.append((altura - len(atual), atual))
+            atual, ocupado = [], 0
+        atual.append(convertido)
+        ocupado += tamanho
+
+    if atual:
+        chunks.append((inicio + len(blocos) - len(atual), atual))
+    return chunks
+
+
+def _inicios_chunks(meta):
+    """Altura inicial de cada chunk; metadados antigos (passo fixo) derivam do passo."""
+    if "chunks" in meta:
+        return list(meta["chunks"])
+    return list(range(0, meta.get("altura", 0), meta.get("blocos_por_chunk", BLOCOS_POR_CHUNK)))
+
+
+def _referencias(db, rede):
+    meta = db.collection(COLECAO).document(rede)
+    return meta, meta.collection(SUBCOLECAO_BLOCOS)
+
+
+def ler_metadados(db, rede=REDE_PADRAO):
+    doc = _referencias(db, rede)[0].get()
+    return doc.to_dict() if doc.exists else None
+
+
+# -----------------------------------------------------------
+# Escrita incremental
+# -----------------------------------------------------------
+
+def _gravar_chunks(db, rede, inicios, chunks, chunks_por_lote=CHUNKS_POR_LOTE):
+    """
+    Grava `chunks` [(inicio, blocos)] em WriteBatches. Os metadados
+    avançam com cada lote e listam os `inicios` dos chunks que ficam
+    mais os já gravados. Retorna (inicios finais, lotes gravados).
+    """
+    ref_meta, ref_blocos = _referencias(db, rede)
+    inicios, lotes = list(inicios), 0
+
+    for i in range(0, len(chunks), chunks_por_lote):
+        lote = db.batch()
+        for inicio, blocos in chunks[i:i + chunks_por_lote]:
+            lote.set(ref_blocos.document(_id_chunk(inicio)), {
+                "inicio": inicio,
+                "fim": inicio + len(blocos),
+                "blocos": blocos,
+            })
+            inicios.append(inicio)
+
+        lote.set(ref_meta, {
+            "altura": inicio + len(blocos),
+            "hash_topo": blocos[-1].get("hash_atual"),
+            "chunks": list(inicios),
+            "atualizado_em": datetime.utcnow().isoformat(),
+        })
+        lote.commit()
+        lotes += 1
+    return inicios, lotes
+
+
+def salvar_cadeia(db, blockchain, rede=REDE_PADRAO, blocos_por_chunk=BLOCOS_POR_CHUNK,
+                  bytes_por_chunk=BYTES_POR_CHUNK, chunks_por_lote=CHUNKS_POR_LOTE):
+    """
+    Persiste a cadeia (Ledger ou DataFrame) enviando só o que falta.
+
+    O último chunk persistido é recortado junto com os blocos novos
+    (ele pode estar incompleto) e só é regravado se mudou; os seguintes
+    são novos. Se o topo persistido não bate com a cadeia local (cadeia
+    refeita ou adulterada), tudo é reenviado e os chunks excedentes são
+    apagados. Os metadados avançam junto com cada lote, então um save
+    interrompido retoma de onde parou.
+    """
+    ledger = como_ledger(blockchain)
+    ref_meta, ref_blocos = _referencias(db, rede)
+    meta = ler_metadados(db, rede) or {}
+
+    tamanho = len(ledger)
+    persistida = meta.get("altura", 0)
+
+    # O prefixo persistido ainda é o da cadeia local?
+    if persistida and (persistida > tamanho or ledger.hash_em(persistida - 1) != meta.get("hash_topo")):
+        persistida = 0
+
+    relatorio = {"altura_anterior": meta.get("altura", 0), "altura": tamanho,
+                 "blocos_enviados": 0, "documentos": 0, "lotes": 0, "documentos_removidos": 0}
+
+    if meta and persistida == tamanho:
+        return relatorio  # nada novo
+
+    inicios = _inicios_chunks(meta) if persistida else []
+    inicio = inicios.pop() if inicios else 0
+    chunks = _cortar_chunks(ledger.registros(inicio, tamanho), inicio, blocos_por_chunk, bytes_por_chunk)
+
+    # Último chunk já cheio: continua igual, só os seguintes são gravados
+    if persistida and len(chunks) > 1 and chunks[0][0] + len(chunks[0][1]) == persistida:
+        inicios.append(chunks.pop(0)[0])
+
+    _, relatorio["lotes"] = _gravar_chunks(db, rede, inicios, chunks, chunks_por_lote)
+    relatorio["documentos"] = len(chunks)
+    relatorio["blocos_enviados"] = sum(len(b) for _, b in chunks)
+
+    # Reenvio total: remove chunks que não fazem parte da cadeia nova
+    # (sobras de uma cadeia maior ou de outras fronteiras de chunk)
+    if meta and persistida == 0:
+        relatorio["documentos_removidos"] = _apagar_chunks(
+            db, ref_blocos, manter={_id_chunk(a) for a, _ in chunks}
+        )
+        if not chunks:
+            ref_meta.set({"altura": 0, "hash_topo": None, "chunks": [],
+                          "atualizado_em": datetime.utcnow().isoformat()})
+
+    return relatorio
+
+
+def _apagar_chunks(db, ref_blocos, manter=()):
+    """Apaga, em lotes, os chunks da rede (exceto os IDs em `manter`)."""
+    refs = [r for r in ref_blocos.list_documents() if r.id not in manter]
+
+    for i in range(0, len(refs), LIMITE_OPERACOES_LOTE):
+        lote = db.batch()
+        for ref in refs[i:i + LIMITE_OPERACOES_LOTE]:
+            lote.delete(ref)
+        lote.commit()
+    return len(refs)
+
+
+# -----------------------------------------------------------
+# Leitura paginada e paralela
+# -----------------------------------------------------------
+
+def ler_blocos(db, rede, inicio, fim, inicios, chunks_por_pagina=CHUNKS_POR_PAGINA, leitores=LEITORES):
+    """
+    Blocos nas alturas [inicio, fim). `inicios` são as alturas iniciais
+    dos chunks (metadados); os IDs saem delas, então as páginas são
+    lidas em paralelo com get_all, sem varrer a coleção.
+    """
+    if fim <= inicio or not inicios:
+        return []
+
+    ref_blocos = _referencias(db, rede)[1]
+    selecionados = inicios[max(0, bisect_right(inicios, inicio) - 1):bisect_left(inicios, fim)]
+    primeiro = selecionados[0]
+    ids = [_id_chunk(a) for a in selecionados]
+    paginas = [ids[i:i + chunks_por_pagina] for i in range(0, len(ids), chunks_por_pagina)]
+
+    def ler_pagina(pagina):
+        docs = db.get_all([ref_blocos.document(i) for i in pagina])
+        return [d.to_dict() for d in docs if d.exists]
+
+    with ThreadPoolExecutor(max_workers=max(1, min(leitores, len(paginas)))) as executor:
+        chunks = [c for pagina in executor.map(ler_pagina, paginas) for c in pagina]
+
+    # get_all não garante ordem: ordena por altura e confere a continuidade
+    blocos = []
+    for chunk in sorted(chunks, key=lambda c: c["inicio"]):
+        if chunk["inicio"] != primeiro + len(blocos):
+            raise ValueError(f"Chunk ausente na altura {primeiro + len(blocos)} da rede {rede}.")
+        blocos.extend(chunk["blocos"])
+    return blocos[inicio - primeiro:fim - primeiro]
+
+
+def carregar_cadeia(db, rede=REDE_PADRAO, chunks_por_pagina=CHUNKS_POR_PAGINA, leitores=LEITORES):
+    """Lista de blocos persistidos (ou None se a rede não existe)."""
+    meta = ler_metadados(db, rede)
+    if not meta:
+        return None
+    if "altura" not in meta:
+        return meta.get("dados") or None  # formato antigo: cadeia inteira no documento
+
+    return ler_blocos(db, rede, 0, meta["altura"], _inicios_chunks(meta), chunks_por_pagina, leitores)
+
+
+def limpar_cadeia(db, rede=REDE_PADRAO):
+    """Remove os chunks e os metadados da rede."""
+    ref_meta, ref_blocos = _referencias(db, rede)
+    removidos = _apagar_chunks(db, ref_blocos)
+    ref_meta.delete()
+    return removidos
+
+
+# ===========================================================
+# ARMAZÉM (interface comum de smartlog_armazenamento)
+# ===========================================================
+
+class ArmazemFirestore(ArmazemBlocos):
+    """
+    Cadeia da rede `rede` no layout em chunks e auditoria em
+    auditoria_logs. Pensado para um único escritor por rede: o topo e
+    o chunk final (incompleto) ficam espelhados em memória, então cada
+    anexo grava só esse chunk e os metadados, num WriteBatch.
+
+    A cadeia (metadados, chunk final e a migração do formato antigo)
+    só é lida na primeira operação sobre blocos: quem só grava ou
+    consulta auditoria não toca nos documentos da cadeia.
+    """
+
+    def __init__(self, rede=REDE_PADRAO, db=None, blocos_por_chunk=BLOCOS_POR_CHUNK,
+                 bytes_por_chunk=BYTES_POR_CHUNK):
+        if db is None:
+            from firebase_utils import obter_db
+            db = obter_db()
+
+        self._db = db
+        self.rede = rede
+        self._lock = threading.Lock()
+        self._blocos_por_chunk = blocos_por_chunk
+        self._bytes_por_chunk = bytes_por_chunk
+        self._topo = None                # carregado por _carregar_cadeia
+        self._ultimo_auditoria = None    # lido na primeira gravação de auditoria
+
+    def _carregar_cadeia(self):
+        """Topo e chunk final da cadeia (uma vez; chamar com o lock)."""
+        if self._topo is not None:
+            return
+
+        meta = ler_metadados(self._db, self.rede) or {}
+        if meta and "altura" not in meta:
+            # Documento no formato antigo: migra para chunks
+            salvar_cadeia(self._db, Ledger(meta.get("dados") or []), self.rede,
+                          self._blocos_por_chunk, self._bytes_por_chunk)
+            meta = ler_metadados(self._db, self.rede)
+
+        altura = meta.get("altura", 0)
+        self._inicios = _inicios_chunks(meta)
+        self._inicio_cauda = self._inicios[-1] if self._inicios else 0
+        self._cauda = ler_blocos(self._db, self.rede, self._inicio_cauda, altura, self._inicios)
+        self._topo = (altura, meta.get("hash_topo"))
+
+    def _gravar(self, novos):
+        # O chunk final é recortado junto com os novos; se já estava cheio, fica como está
+        inicios = self._inicios[:-1] if self._cauda else list(self._inicios)
+        chunks = _cortar_chunks(self._cauda + novos, self._inicio_cauda,
+                                self._blocos_por_chunk, self._bytes_por_chunk)
+        if self._cauda and len(chunks[0][1]) == len(self._cauda):
+            inicios.append(chunks.pop(0)[0])
+
+        self._inicios, _ = _gravar_chunks(self._db, self.rede, inicios, chunks)
+        self._inicio_cauda, self._cauda = chunks[-1]
+
+    def anexar_se_novo(self, bloco, topo_esperado=QUALQUER_TOPO):
+        resultados, tamanho = self.anexar_varios_se_novos([bloco], topo_esperado)
+        return resultados[0], tamanho
+
+    def anexar_varios_se_novos(self, blocos, topo_esperado=QUALQUER_TOPO):
+        with self._lock:
+            self._carregar_cadeia()
+            tamanho, ultimo = self._topo
+            if topo_esperado is not QUALQUER_TOPO and ultimo != topo_esperado:
+                return [False] * len(blocos), tamanho
+            novos, resultados = [], []
+
+            for bloco in blocos:
+                repetido = tamanho > 0 and bloco.get("hash_atual") == ultimo
+                resultados.append(not repetido)
+                if not repetido:
+                    novos.append(bloco)
+                    tamanho += 1
+                    ultimo = bloco.get("hash_atual")
+
+            if novos:
+                self._gravar(novos)
+                self._topo = (tamanho, ultimo)
+            return resultados, self._topo[0]
+
+    def status(self):
+        if self._topo is None:
+            with self._lock:
+                self._carregar_cadeia()
+        return self._topo
+
+    def ler_intervalo(self, inicio, fim=None):
+        tamanho = self.status()[0]
+        fim = tamanho if fim is None else min(fim, tamanho)
+        return ler_blocos(self._db, self.rede, inicio, fim, self._inicios)
+
+    def podar(self, altura):
+        # O histórico continua na nuvem; em memória só há o chunk final
+        return 0
+
+    def limpar(self):
+        with self._lock:
+            limpar_cadeia(self._db, self.rede)
+            self._inicios, self._inicio_cauda, self._cauda = [], 0, []
+            self._topo = (0, None)
+
+    # Auditoria: um documento por registro, com ID = seq (12 dígitos).
+    # create() falha se o seq já existe, então dois escritores não
+    # bifurcam a cadeia em silêncio. Logs antigos (sem seq) ficam de fora.
+    # As consultas por ação + horário usam o índice composto
+    # (acao, timestamp) de auditoria_logs.
+
+    def registrar_auditoria_varios(self, registros):
+        colecao = self._db.collection(COLECAO_AUDITORIA)
+        with self._lock:
+            if self._ultimo_auditoria is None:
+                self._ultimo_auditoria = (self.ler_auditoria(1) or [{}])[-1]
+
+            registros = encadear(registros, self._ultimo_auditoria or None)
+            for i in range(0, len(registros), LIMITE_OPERACOES_LOTE):
+                lote = self._db.batch()
+                for registro in registros[i:i + LIMITE_OPERACOES_LOTE]:
+                    lote.create(colecao.document(f"{registro['seq']:012d}"), _valor_firestore(registro))
+                lote.commit()
+                self._ultimo_auditoria = registros[min(i + LIMITE_OPERACOES_LOTE, len(registros)) - 1]
+
+    def ler_auditoria(self, limite=None):
+        consulta = self._db.collection(COLECAO_AUDITORIA).order_by("seq", direction="DESCENDING")
+        if limite:
+            consulta = consulta.limit(limite)
+        return [d.to_dict() for d in consulta.stream()][::-1]
+
+    def consultar_auditoria(self, inicio=None, fim=None, acao=None, limite=None):
+        consulta = self._db.collection(COLECAO_AUDITORIA)
+        for campo, operador, valor in (("acao", "==", acao), ("timestamp", ">=", inicio), ("timestamp", "<", fim)):
+            if valor is not None:
+                consulta = consulta.where(campo, operador, valor)
+        consulta = consulta.order_by("timestamp")
+        if limite:
+            consulta = consulta.limit(limite)
+        return sorted((d.to_dict() for d in consulta.stream()), key=lambda r: r.get("seq", -1))
+
+
+__all__ = [
+    "BLOCOS_POR_CHUNK",
+    "BYTES_POR_CHUNK",
+    "ler_metadados",
+    "salvar_cadeia",
+    "ler_blocos",
+    "carregar_cadeia",
+    "limpar_cadeia",
+    "ArmazemFirestore",
+]
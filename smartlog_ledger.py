@@ -0,0 +1,501 @@
+# ===========================================================
+# smartlog_ledger.py — Ledger colunar append-only
+# ===========================================================
+# Substitui o DataFrame por nó: cada coluna é uma lista Python
+# (append amortizado O(1)) e o DataFrame só é montado sob demanda.
+# ===========================================================
+
+import hashlib
+import json
+from collections import defaultdict
+
+import pandas as pd
+
+# Colunas padrão de um bloco (novas colunas são aceitas dinamicamente)
+COLUNAS_BLOCO = [
+    "bloco_id",
+    "eventos",
+    "hash_anterior",
+    "hash_atual",
+    "tx_id",
+    "timestamp",
+]
+
+# Campos que entram na impressão digital de conteúdo de cada bloco
+CAMPOS_IMPRESSAO = COLUNAS_BLOCO + ["merkle_raiz"]
+
+# Checkpoints de conteúdo a cada N blocos (detecção de divergência)
+INTERVALO_CHECKPOINT = 1024
+ACUMULADO_INICIAL = "0" * 64
+
+
+def eventos_do_bloco(eventos):
+    """
+    Lista de eventos de um bloco, qualquer que seja o formato gravado
+    (dict nos blocos iniciais, JSON nos blocos de consenso).
+    """
+    if isinstance(eventos, str):
+        try:
+            eventos = json.loads(eventos)
+        except ValueError:
+            return []
+    if isinstance(eventos, dict):
+        return [eventos] if eventos else []
+    if isinstance(eventos, list):
+        return eventos
+    return []
+
+
+class IndiceLedger:
+    """
+    Índices secundários sobre o conteúdo do ledger:
+    hash → altura, tx_id → altura, id_entrega → [alturas], risco → [alturas].
+    Chaves de entrega/risco são normalizadas para str.
+    """
+
+    def __init__(self):
+        self.por_hash = {}
+        self.por_tx = {}
+        self.por_entrega = defaultdict(list)
+        self.por_risco = defaultdict(list)
+        self.altura = 0
+
+    def indexar(self, altura, hash_atual, tx_id, eventos):
+        """Indexa um bloco (deve ser chamado em ordem de altura)."""
+        self.por_hash[hash_atual] = altura
+        self.por_tx[tx_id] = altura
+
+        for evento in eventos_do_bloco(eventos):
+            if not isinstance(evento, dict):
+                continue
+            for indice, campo in ((self.por_entrega, "id_entrega"), (self.por_risco, "risco")):
+                if evento.get(campo) is None:
+                    continue
+                alturas = indice[str(evento[campo])]
+                if not alturas or alturas[-1] != altura:
+                    alturas.append(altura)
+
+        self.altura = altura + 1
+
+    def descartar_a_partir(self, altura, ledger):
+        """
+        Remove dos índices os blocos de altura >= `altura`, lendo-os de
+        `ledger` antes de serem substituídos. Custo proporcional ao
+        trecho descartado.
+        """
+        fim = min(self.altura, len(ledger))
+        atuais = ledger.coluna("hash_atual", altura, fim)
+        tx_ids = ledger.coluna("tx_id", altura, fim)
+        eventos = ledger.coluna("eventos", altura, fim)
+
+        for j in range(len(atuais)):
+            if self.por_hash.get(atuais[j]) == altura + j:
+                del self.por_hash[atuais[j]]
+            if self.por_tx.get(tx_ids[j]) == altura + j:
+                del self.por_tx[tx_ids[j]]
+
+            for evento in eventos_do_bloco(eventos[j]):
+                if not isinstance(evento, dict):
+                    continue
+                for indice, campo in ((self.por_entrega, "id_entrega"), (self.por_risco, "risco")):
+                    alturas = indice.get(str(evento.get(campo)))
+                    while alturas and alturas[-1] >= altura:
+                        alturas.pop()
+
+        self.altura = min(self.altura, altura)
+
+    def sincronizar(self, ledger):
+        """Indexa os blocos do ledger ainda não vistos."""
+        inicio = self.altura
+        atuais = ledger.coluna("hash_atual", inicio)
+        tx_ids = ledger.coluna("tx_id", inicio)
+        eventos = ledger.coluna("eventos", inicio)
+
+        for j in range(len(atuais)):
+            self.indexar(inicio + j, atuais[j], tx_ids[j], eventos[j])
+
+
+class Ledger:
+    """
+    Ledger append-only armazenado por colunas.
+
+    - append(bloco) custa O(1) amortizado (sem cópia da cadeia);
+    - to_dataframe() materializa um DataFrame apenas quando pedido
+      e o reaproveita até a próxima escrita.
+
+    Compartilhamento estrutural: copy() é O(1) — as cópias apontam para
+    as mesmas listas de colunas, cada uma com seu próprio tamanho (como
+    uma fatia). Blocos gravados são imutáveis, então o prefixo comum é
+    guardado uma única vez. Um append idêntico ao que outra cópia já
+    gravou naquela altura é apenas adotado; só um append divergente ou
+    substituir() separa o armazenamento (copy-on-write).
+    """
+
+    def __init__(self, blocos=None):
+        self._colunas = {c: [] for c in COLUNAS_BLOCO}
+        self._tamanho = 0
+        self._df_cache = None
+
+        # Checkpoint de validação: prefixo [0, altura) já verificado
+        self._altura_verificada = 0
+        self._hash_verificado = None
+
+        # Índices secundários: criados na primeira consulta
+        self._indice = None
+
+        # Hashes acumulados de conteúdo a cada INTERVALO_CHECKPOINT blocos;
+        # a lista acompanha o armazenamento e é compartilhada com ele
+        self._checkpoints = []
+        self._acumulado_cache = None
+
+        if blocos is not None:
+            self.extend(blocos)
+
+    # -------------------------------------------------------
+    # Construtores
+    # -------------------------------------------------------
+
+    @classmethod
+    def de_dataframe(cls, df):
+        """Cria um ledger a partir de um DataFrame de blocos."""
+        ledger = cls()
+        if df is None or len(df) == 0:
+            return ledger
+
+        for c in df.columns:
+            ledger._colunas[c] = df[c].tolist()
+        ledger._tamanho = len(df)
+
+        for c in ledger._colunas:
+            if len(ledger._colunas[c]) != ledger._tamanho:
+                ledger._colunas[c] = [None] * ledger._tamanho
+        return ledger
+
+    # -------------------------------------------------------
+    # Armazenamento compartilhado
+    # -------------------------------------------------------
+
+    def _no_topo(self):
+        """True se nenhuma outra cópia gravou além do nosso tamanho."""
+        return len(self._colunas["hash_atual"]) == self._tamanho
+
+    def _ja_gravado(self, bloco):
+        """True se outra cópia já gravou exatamente este bloco na próxima altura."""
+        p = self._tamanho
+        if any(c not in self._colunas for c in bloco):
+            return False
+        return all(v[p] == bloco.get(c) for c, v in self._colunas.items())
+
+    def _separar(self):
+        """Copy-on-write: passa a ter armazenamento próprio (cópia de ponteiros)."""
+        self._colunas = {c: v[:self._tamanho] for c, v in self._colunas.items()}
+        self._checkpoints = self._checkpoints[:self._tamanho // INTERVALO_CHECKPOINT]
+
+    def compartilha_com(self, outro):
+        """True se os dois ledgers usam o mesmo armazenamento."""
+        return self._colunas is outro._colunas
+
+    # -------------------------------------------------------
+    # Escrita
+    # -------------------------------------------------------
+
+    def append(self, bloco):
+        """Acrescenta um bloco (dict) ao final do ledger."""
+        if not self._no_topo():
+            if self._ja_gravado(bloco):
+                self._tamanho += 1
+                self._apos_append(bloco)
+                return
+            self._separar()
+
+        for c in bloco:
+            if c not in self._colunas:
+                self._colunas[c] = [None] * self._tamanho
+
+        for c, valores in self._colunas.items():
+            valores.append(bloco.get(c))
+
+        self._tamanho += 1
+        self._apos_append(bloco)
+
+    def _apos_append(self, bloco):
+        self._df_cache = None
+
+        if self._indice is not None:
+            self._indice.indexar(
+                self._tamanho - 1, bloco.get("hash_atual"), bloco.get("tx_id"), bloco.get("eventos")
+            )
+
+    def extend(self, blocos):
+        """Acrescenta vários blocos em sequência."""
+        for bloco in blocos:
+            self.append(bloco)
+
+    def anexar_colunas(self, colunas):
+        """
+        Acrescenta vários blocos de uma vez, já organizados por coluna
+        (dict coluna → lista). Evita o custo de um append por bloco.
+        """
+        if not self._no_topo():
+            self._separar()
+
+        total = len(next(iter(colunas.values()), []))
+
+        for c in colunas:
+            if c not in self._colunas:
+                self._colunas[c] = [None] * self._tamanho
+
+        for c, valores in self._colunas.items():
+            if c in colunas:
+                valores.extend(colunas[c])
+            else:
+                valores.extend([None] * total)
+
+        self._tamanho += total
+        self._df_cache = None
+
+        if self._indice is not None:
+            self._indice.sincronizar(self)
+
+    def substituir(self, altura, **campos):
+        """
+        Sobrescreve campos de um bloco já gravado.
+        Usado apenas pela simulação de fraude (adulteração de nó).
+        """
+        altura = self._normalizar_altura(altura)
+
+        # Bloco gravado pode estar compartilhado com outros nós
+        self._separar()
+
+        for c, v in campos.items():
+            if c not in self._colunas:
+                self._colunas[c] = [None] * self._tamanho
+            self._colunas[c][altura] = v
+        self._df_cache = None
+        del self._checkpoints[altura // INTERVALO_CHECKPOINT:]
+
+        # Prefixo alterado → próxima validação volta a ser completa
+        if altura < self._altura_verificada:
+            self._altura_verificada = 0
+            self._hash_verificado = None
+
+        # Índices refeitos na próxima consulta
+        self._indice = None
+
+    def ressincronizar(self, fonte, altura_comum):
+        """
+        Substitui o sufixo [altura_comum, fim) pelo conteúdo de `fonte`,
+        cujo prefixo [0, altura_comum) é idêntico ao deste ledger.
+        O armazenamento de `fonte` é adotado (O(1)); só os índices do
+        trecho descartado são refeitos. Retorna (gravados, descartados):
+        blocos vindos de `fonte` e blocos próprios removidos após
+        altura_comum (diferem quando os tamanhos diferem).
+        """
+        descartados = self._tamanho - altura_comum
+
+        if self._indice is not None:
+            self._indice.descartar_a_partir(altura_comum, self)
+
+        verificado = max(
+            fonte._altura_verificada if fonte.inicio_verificacao() else 0,
+            min(self._altura_verificada, altura_comum),
+        )
+
+        self._colunas = fonte._colunas
+        self._checkpoints = fonte._checkpoints
+        self._tamanho = fonte._tamanho
+        self._df_cache = None
+        self.registrar_verificacao(min(verificado, self._tamanho))
+
+        return self._tamanho - altura_comum, descartados
+
+    # -------------------------------------------------------
+    # Leitura
+    # -------------------------------------------------------
+
+    def __len__(self):
+        return self._tamanho
+
+    def __iter__(self):
+        for i in range(self._tamanho):
+            yield self.bloco(i)
+
+    @property
+    def colunas(self):
+        return list(self._colunas)
+
+    def coluna(self, nome, inicio=0, fim=None):
+        """Valores de uma coluna no intervalo [inicio, fim) (nova lista)."""
+        fim = self._tamanho if fim is None else min(fim, self._tamanho)
+        if nome not in self._colunas:
+            return [None] * max(fim - inicio, 0)
+        return self._colunas[nome][inicio:fim]
+
+    def hash_em(self, altura):
+        """hash_atual do bloco na altura indicada."""
+        return self._colunas["hash_atual"][self._normalizar_altura(altura)]
+
+    def bloco(self, altura):
+        """Retorna o bloco na altura indicada (aceita índice negativo)."""
+        altura = self._normalizar_altura(altura)
+        return {c: v[altura] for c, v in self._colunas.items()}
+
+    def ultimo(self):
+        """Último bloco do ledger, ou None se estiver vazio."""
+        return self.bloco(-1) if self._tamanho else None
+
+    @property
+    def ultimo_hash(self):
+        """Hash do topo da cadeia, ou None se estiver vazio."""
+        return self._colunas["hash_atual"][self._tamanho - 1] if self._tamanho else None
+
+    def copy(self):
+        """
+        Cópia do ledger em O(1): compartilha o armazenamento e só se
+        separa quando uma das cópias divergir (copy-on-write).
+        """
+        novo = Ledger()
+        novo._colunas = self._colunas
+        novo._checkpoints = self._checkpoints
+        novo._acumulado_cache = self._acumulado_cache
+        novo._tamanho = self._tamanho
+        novo._altura_verificada = self._altura_verificada
+        novo._hash_verificado = self._hash_verificado
+        return novo
+
+    # -------------------------------------------------------
+    # Checkpoint de validação incremental
+    # -------------------------------------------------------
+
+    def inicio_verificacao(self):
+        """
+        Altura a partir da qual a cadeia ainda precisa ser verificada.
+        Retorna 0 (verificação completa) se o prefixo mudou desde o
+        último checkpoint.
+        """
+        altura = self._altura_verificada
+        if altura == 0 or altura > self._tamanho:
+            return 0
+        if self._colunas["hash_atual"][altura - 1] != self._hash_verificado:
+            return 0
+        return altura
+
+    def registrar_verificacao(self, altura):
+        """Marca o prefixo [0, altura) como verificado."""
+        self._altura_verificada = altura
+        self._hash_verificado = self._colunas["hash_atual"][altura - 1] if altura else None
+
+    # -------------------------------------------------------
+    # Impressão digital de conteúdo (detecção de divergência)
+    # -------------------------------------------------------
+
+    def _avancar(self, acumulado, inicio, fim):
+        """Encadeia no hash acumulado o conteúdo completo dos blocos [inicio, fim)."""
+        colunas = [self._colunas.get(c) for c in CAMPOS_IMPRESSAO]
+
+        for i in range(inicio, fim):
+            partes = [acumulado]
+            for valores in colunas:
+                v = valores[i] if valores is not None else None
+                if isinstance(v, (dict, list)):
+                    v = json.dumps(v, ensure_ascii=False, sort_keys=True, default=str)
+                partes.append("" if v is None else str(v))
+            acumulado = hashlib.sha256("\x1f".join(partes).encode()).hexdigest()
+
+        return acumulado
+
+    def checkpoints(self):
+        """
+        Hashes acumulados do conteúdo nas alturas INTERVALO_CHECKPOINT,
+        2 * INTERVALO_CHECKPOINT, ... Calculados sob demanda, uma única vez
+        por armazenamento (cópias compartilhadas reaproveitam a lista).
+        """
+        cps = self._checkpoints
+        completos = self._tamanho // INTERVALO_CHECKPOINT
+
+        while len(cps) < completos:
+            j = len(cps)
+            anterior = cps[-1] if cps else ACUMULADO_INICIAL
+            cps.append(self._avancar(anterior, j * INTERVALO_CHECKPOINT, (j + 1) * INTERVALO_CHECKPOINT))
+
+        return cps[:completos]
+
+    def acumulado_em(self, altura):
+        """
+        Hash acumulado do conteúdo dos blocos [0, altura): dois ledgers
+        têm o mesmo valor se e somente se o prefixo é idêntico.
+        """
+        j = altura // INTERVALO_CHECKPOINT
+        cps = self.checkpoints()
+        inicio, acumulado = j * INTERVALO_CHECKPOINT, (cps[j - 1] if j else ACUMULADO_INICIAL)
+
+        # O conteúdo de um armazenamento já gravado não muda: reaproveita o último cálculo
+        cache = self._acumulado_cache
+        if cache and cache[0] is self._colunas and inicio <= cache[1] <= altura:
+            inicio, acumulado = cache[1], cache[2]
+
+        acumulado = self._avancar(acumulado, inicio, altura)
+        self._acumulado_cache = (self._colunas, altura, acumulado)
+        return acumulado
+
+    def impressao(self):
+        """Impressão digital do ledger inteiro: (tamanho, hash acumulado)."""
+        return self._tamanho, self.acumulado_em(self._tamanho)
+
+    # -------------------------------------------------------
+    # Índices secundários
+    # -------------------------------------------------------
+
+    def indice(self):
+        """
+        Índices do ledger. Na primeira chamada indexa a cadeia inteira;
+        a partir daí cada append atualiza os índices em O(eventos do bloco).
+        """
+        if self._indice is None:
+            self._indice = IndiceLedger()
+        self._indice.sincronizar(self)
+        return self._indice
+
+    def registros(self, inicio=0, fim=None):
+        """Lista de blocos (dicts) no intervalo [inicio, fim)."""
+        fim = self._tamanho if fim is None else min(fim, self._tamanho)
+        return [self.bloco(i) for i in range(inicio, fim)]
+
+    def to_dataframe(self, inicio=0, fim=None):
+        """
+        Visão em DataFrame do ledger (ou de um intervalo dele).
+        A visão completa fica em cache até a próxima escrita.
+        """
+        fim = self._tamanho if fim is None else min(fim, self._tamanho)
+        completo = inicio == 0 and fim == self._tamanho
+
+        if completo and self._df_cache is not None:
+            return self._df_cache
+
+        df = pd.DataFrame({c: v[inicio:fim] for c, v in self._colunas.items()})
+
+        if completo:
+            self._df_cache = df
+        return df
+
+    def _normalizar_altura(self, altura):
+        if altura < 0:
+            altura += self._tamanho
+        if not 0 <= altura < self._tamanho:
+            raise IndexError(f"Altura {altura} fora do ledger (tamanho {self._tamanho}).")
+        return altura
+
+    def __repr__(self):
+        return f"Ledger(tamanho={self._tamanho}, topo={str(self.ultimo_hash)[:12]})"
+
+
+def como_ledger(blockchain):
+    """Aceita Ledger ou DataFrame (compatibilidade) e devolve um Ledger."""
+    if isinstance(blockchain, Ledger):
+        return blockchain
+    if blockchain is None:
+        return Ledger()
+    return Ledger.de_dataframe(blockchain)
+
+
+__all__ = ["COLUNAS_BLOCO", "IndiceLedger", "Ledger", "como_ledger", "eventos_do_bloco"]
@@ -0,0 +1,171 @@
+# ===========================================================
+# smartlog_mempool.py — Mempool e pipeline de rodadas PoA
+# ===========================================================
+# Acumula eventos logísticos, corta blocos por tamanho ou tempo
+# e executa propor → votar → aplicar em sequência, medindo vazão
+# (eventos/s, blocos/s) e latência da entrada até o commit.
+# ===========================================================
+
+import time
+from collections import deque
+
+from smartlog_blockchain import aplicar_consenso, chaves_publicas_de, propor_bloco, votar_proposta
+
+
+class Mempool:
+    """
+    Fila de eventos pendentes.
+    Um bloco fica pronto quando há `tamanho_bloco` eventos ou quando o
+    evento mais antigo espera há `tempo_max` segundos.
+    """
+
+    def __init__(self, tamanho_bloco=100, tempo_max=0.5, relogio=time.perf_counter):
+        if tamanho_bloco < 1:
+            raise ValueError("tamanho_bloco deve ser >= 1.")
+        self.tamanho_bloco = tamanho_bloco
+        self.tempo_max = tempo_max
+        self.relogio = relogio
+        self._fila = deque()
+
+    def __len__(self):
+        return len(self._fila)
+
+    def adicionar(self, evento):
+        """Enfileira um evento, registrando o instante de chegada."""
+        self._fila.append((evento, self.relogio()))
+
+    def adicionar_varios(self, eventos):
+        agora = self.relogio()
+        self._fila.extend((e, agora) for e in eventos)
+
+    def pronto(self):
+        """True se já há um bloco a cortar (por tamanho ou por tempo)."""
+        if not self._fila:
+            return False
+        if len(self._fila) >= self.tamanho_bloco:
+            return True
+        return self.relogio() - self._fila[0][1] >= self.tempo_max
+
+    def cortar_bloco(self):
+        """Retira até `tamanho_bloco` eventos: (eventos, instantes de chegada)."""
+        n = min(self.tamanho_bloco, len(self._fila))
+        itens = [self._fila.popleft() for _ in range(n)]
+        return [e for e, _ in itens], [t for _, t in itens]
+
+    def devolver(self, eventos, chegadas):
+        """Recoloca um bloco cortado no início da fila, com os instantes de chegada originais."""
+        self._fila.extendleft(reversed(list(zip(eventos, chegadas))))
+
+
+class PipelineConsenso:
+    """
+    Executa rodadas PoA consecutivas sobre os blocos cortados da mempool.
+    O propositor alterna entre os nós (round-robin).
+    """
+
+    def __init__(self, nos, chaves, mempool, quorum=2):
+        self.nos = nos
+        self.chaves = chaves
+        self.chaves_publicas = chaves_publicas_de(chaves)
+        self.mempool = mempool
+        self.quorum = quorum
+
+        self._propositores = list(nos)
+        self._vez = 0
+
+        self.blocos = 0
+        self.eventos = 0
+        self.rejeitados = 0
+        self.latencias = []
+        self._tempo_consenso = 0.0
+
+    def rodada(self, max_propostas=1, apenas_prontos=False):
+        """
+        Propõe e confirma até `max_propostas` blocos em sequência, cada
+        um encadeado no anterior. Com apenas_prontos, só corta blocos
+        cheios ou vencidos (Mempool.pronto). Um bloco rejeitado volta
+        para o início da mempool e encerra a rodada, preservando a
+        ordem dos eventos. Retorna quantos blocos foram confirmados.
+        """
+        confirmados = 0
+
+        for _ in range(max_propostas):
+            if not len(self.mempool) or (apenas_prontos and not self.mempool.pronto()):
+                break
+
+            lote, chegadas = self.mempool.cortar_bloco()
+            propositor = self._propositores[self._vez % len(self._propositores)]
+            self._vez += 1
+
+            inicio = self.mempool.relogio()
+            proposta = propor_bloco(propositor, lote, self.nos[propositor].ultimo_hash)
+            proposta = votar_proposta(proposta, self.nos, self.chaves)
+            sucesso, _ = aplicar_consenso(proposta, self.nos, self.quorum, self.chaves_publicas)
+            fim = self.mempool.relogio()
+
+            self._tempo_consenso += fim - inicio
+            if not sucesso:
+                self.rejeitados += 1
+                self.mempool.devolver(lote, chegadas)
+                break
+
+            confirmados += 1
+            self.blocos += 1
+            self.eventos += len(lote)
+            self.latencias.extend(fim - t for t in chegadas)
+
+        return confirmados
+
+    def processar_prontos(self, max_propostas=1):
+        """
+        Roda enquanto a mempool tiver blocos prontos (tamanho ou tempo).
+        Para na primeira rodada sem confirmação (bloco rejeitado).
+        """
+        total = 0
+        while self.mempool.pronto():
+            confirmados = self.rodada(max_propostas, apenas_prontos=True)
+            if not confirmados:
+                break
+            total += confirmados
+        return total
+
+    def drenar(self, max_propostas=1):
+        """
+        Confirma tudo o que estiver na mempool, mesmo blocos incompletos.
+        Para na primeira rodada sem confirmação; o que foi rejeitado
+        continua na mempool.
+        """
+        total = 0
+        while len(self.mempool):
+            confirmados = self.rodada(max_propostas)
+            if not confirmados:
+                break
+            total += confirmados
+        return total
+
+    def metricas(self, duracao=None):
+        """
+        Vazão e latência acumuladas. `duracao` (s) é o tempo de parede
+        da simulação; se omitido, usa o tempo gasto em consenso.
+        """
+        duracao = duracao or self._tempo_consenso or 1e-9
+        lat = sorted(self.latencias)
+
+        def pct(p):
+            return lat[min(len(lat) - 1, int(p * len(lat)))] if lat else 0.0
+
+        return {
+            "blocos": self.blocos,
+            "eventos": self.eventos,
+            "rejeitados": self.rejeitados,
+            "pendentes": len(self.mempool),
+            "eventos_s": self.eventos / duracao,
+            "blocos_s": self.blocos / duracao,
+            "latencia_media_ms": 1000 * sum(lat) / len(lat) if lat else 0.0,
+            "latencia_p50_ms": 1000 * pct(0.50),
+            "latencia_p95_ms": 1000 * pct(0.95),
+            "latencia_max_ms": 1000 * (lat[-1] if lat else 0.0),
+        }
+
+
+__all__ = ["Mempool", "PipelineConsenso"]
@@ -0,0 +1,72 @@
+# ===========================================================
+# smartlog_merkle.py — Árvore de Merkle dos eventos do bloco
+# ===========================================================
+# Folhas e nós internos usam prefixos distintos (0x00 / 0x01)
+# para impedir que um nó interno se passe por folha.
+# Nível com quantidade ímpar: o último nó sobe sem duplicação.
+# ===========================================================
+
+import hashlib
+
+RAIZ_VAZIA = hashlib.sha256(b"").hexdigest()
+
+
+def hash_folha(conteudo):
+    """Hash de uma folha a partir do conteúdo já serializado (str)."""
+    return hashlib.sha256(b"\x00" + conteudo.encode()).hexdigest()
+
+
+def _hash_par(esquerda, direita):
+    return hashlib.sha256(b"\x01" + bytes.fromhex(esquerda) + bytes.fromhex(direita)).hexdigest()
+
+
+def _proximo_nivel(nivel):
+    proximo = [_hash_par(nivel[i], nivel[i + 1]) for i in range(0, len(nivel) - 1, 2)]
+    if len(nivel) % 2:
+        proximo.append(nivel[-1])
+    return proximo
+
+
+def raiz_merkle(folhas):
+    """Raiz da árvore a partir da lista de hashes das folhas."""
+    if not folhas:
+        return RAIZ_VAZIA
+
+    nivel = list(folhas)
+    while len(nivel) > 1:
+        nivel = _proximo_nivel(nivel)
+    return nivel[0]
+
+
+def gerar_prova(folhas, indice):
+    """
+    Prova de inclusão da folha `indice`: lista de pares [lado, hash]
+    do caminho até a raiz (O(log n) hashes). lado é "E" quando o irmão
+    fica à esquerda e "D" quando fica à direita.
+    """
+    if not 0 <= indice < len(folhas):
+        raise IndexError(f"Folha {indice} inexistente (total {len(folhas)}).")
+
+    prova = []
+    nivel = list(folhas)
+
+    while len(nivel) > 1:
+        irmao = indice ^ 1
+        if irmao < len(nivel):
+            prova.append(["E" if irmao < indice else "D", nivel[irmao]])
+
+        nivel = _proximo_nivel(nivel)
+        indice //= 2
+
+    return prova
+
+
+def verificar_prova(folha, prova, raiz):
+    """Confere se `folha` pertence à árvore de raiz `raiz`."""
+    atual = folha
+    for lado, irmao in prova:
+        atual = _hash_par(irmao, atual) if lado == "E" else _hash_par(atual, irmao)
+    return atual == raiz
+
+
+__all__ = ["RAIZ_VAZIA", "hash_folha", "raiz_merkle", "gerar_prova", "verificar_prova"]
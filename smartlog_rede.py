@@ -0,0 +1,151 @@
+# ===========================================================
+# smartlog_rede.py — Cliente HTTP dos nós remotos (modo distribuído)
+# ===========================================================
+# Sessão requests compartilhada (conexões keep-alive reaproveitadas)
+# e fan-out paralelo das propostas: a rodada termina assim que o
+# quorum de assinaturas chega, sem esperar os nós lentos.
+# ===========================================================
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import os
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+TIMEOUT_PADRAO = 5
+MAX_CONEXOES = 32
+
+_sessao = None
+_executor = None
+
+
+def obter_sessao():
+    """Sessão HTTP única do processo, com pool de conexões por host."""
+    global _sessao
+    if _sessao is None:
+        sessao = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=MAX_CONEXOES, pool_maxsize=MAX_CONEXOES)
+        sessao.mount("http://", adaptador)
+        sessao.mount("https://", adaptador)
+        _sessao = sessao
+    return _sessao
+
+
+def _obter_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=MAX_CONEXOES, thread_name_prefix="smartlog-rede")
+    return _executor
+
+
+def _post(url, payload, timeout):
+    try:
+        resp = obter_sessao().post(url, json=payload, timeout=timeout)
+        if resp.status_code != 200:
+            return {"erro": f"status {resp.status_code}"}
+        return resp.json()
+    except Exception as e:
+        return {"erro": str(e)}
+
+
+def consultar_no(url, rota, params=None, timeout=TIMEOUT_PADRAO):
+    """GET `rota` num nó; erros viram {"erro": ...} como no fan-out."""
+    try:
+        resp = obter_sessao().get(url.rstrip("/") + rota, params=params, timeout=timeout)
+        if resp.status_code != 200:
+            return {"erro": f"status {resp.status_code}"}
+        return resp.json()
+    except Exception as e:
+        return {"erro": str(e)}
+
+
+def mapa_configurado(variavel):
+    """{nome: valor} de uma variável de ambiente no formato "Nome=valor,Nome=valor"."""
+    mapa = {}
+    for item in filter(None, os.getenv(variavel, "").split(",")):
+        nome, _, valor = item.strip().rpartition("=")
+        mapa[nome or valor] = valor
+    return mapa
+
+
+def chaves_publicas_dos_nos(nos_remotos, configuradas=None, timeout=TIMEOUT_PADRAO):
+    """
+    {nó: chave pública} para conferir os votos. Valem as `configuradas`
+    (ex.: mapa_configurado("CHAVES_PUBLICAS")); as que faltarem são lidas
+    do /status de cada nó, em paralelo. Nó sem chave fica de fora, e as
+    assinaturas dele não contam para o quorum.
+    """
+    chaves = {n: c for n, c in (configuradas or {}).items() if n in nos_remotos}
+    faltando = [n for n in nos_remotos if n not in chaves]
+
+    executor = _obter_executor()
+    futuros = {n: executor.submit(consultar_no, nos_remotos[n], "/status", None, timeout) for n in faltando}
+    for nome, futuro in futuros.items():
+        chave = futuro.result().get("chave_publica")
+        if isinstance(chave, str):
+            chaves[nome] = chave
+    return chaves
+
+
+def voto_valido(resposta):
+    """True se a resposta do nó traz uma assinatura (e não um erro)."""
+    return "erro" not in resposta and bool(resposta.get("assinatura"))
+
+
+def enviar_para_nos(nos_remotos, rota, payload, quorum=None, timeout=TIMEOUT_PADRAO, validar=None):
+    """
+    Envia `payload` para `rota` em todos os nós ao mesmo tempo.
+
+    Sem quorum, espera todas as respostas (ou o timeout). Com quorum,
+    retorna assim que `quorum` respostas válidas chegarem; os nós que
+    ainda não responderam aparecem como {"erro": "sem resposta ..."}.
+    A latência da rodada passa a ser a do quorum, não a soma de todos.
+
+    validar(nome, resposta) decide se o voto conta para o quorum (ex.:
+    conferir a assinatura com a chave pública do nó). Sem ele, basta
+    uma assinatura não vazia — um nó que responde lixo rápido pode
+    então encerrar a rodada antes dos honestos.
+    """
+    executor = _obter_executor()
+    futuros = {
+        executor.submit(_post, url.rstrip("/") + rota, payload, timeout): nome
+        for nome, url in nos_remotos.items()
+    }
+
+    respostas = {}
+    validos = 0
+    pendentes = set(futuros)
+    limite = time.monotonic() + timeout
+
+    while pendentes:
+        restante = limite - time.monotonic()
+        if restante <= 0:
+            break
+
+        prontos, pendentes = wait(pendentes, timeout=restante, return_when=FIRST_COMPLETED)
+        for f in prontos:
+            nome, resposta = futuros[f], f.result()
+            respostas[nome] = resposta
+            validos += voto_valido(resposta) and (validar is None or bool(validar(nome, resposta)))
+
+        if quorum is not None and validos >= quorum:
+            break
+
+    # Retardatários: cancela os que nem começaram; os demais são ignorados
+    for f in pendentes:
+        f.cancel()
+        respostas[futuros[f]] = {"erro": "sem resposta (rodada encerrada)"}
+
+    return {nome: respostas[nome] for nome in nos_remotos}
+
+
+__all__ = [
+    "TIMEOUT_PADRAO",
+    "obter_sessao",
+    "consultar_no",
+    "mapa_configurado",
+    "chaves_publicas_dos_nos",
+    "voto_valido",
+    "enviar_para_nos",
+]
@@ -0,0 +1,134 @@
+# ===========================================================
+# smartlog_snapshot.py — Snapshots assinados da cadeia
+# ===========================================================
+# Um snapshot resume a cadeia até a altura H: hash do topo (bloco
+# H-1), estado atual de cada entrega e o digest do snapshot anterior.
+# Os nós o assinam; depois dele, os blocos abaixo de H podem ser
+# podados da memória (e arquivados em disco) e a validação passa a
+# começar do snapshot confiável, não do gênesis.
+# ===========================================================
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from smartlog_blockchain import assinar_bloco, recalcular_hash_bloco, verificar_assinaturas
+from smartlog_ledger import eventos_do_bloco
+
+
+def _digest(snapshot):
+    conteudo = {k: v for k, v in snapshot.items() if k not in ("digest", "assinaturas")}
+    return hashlib.sha256(
+        json.dumps(conteudo, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+def atualizar_entregas(entregas, blocos, altura_inicial):
+    """
+    Aplica os eventos de `blocos` (a partir de `altura_inicial`) ao
+    estado das entregas: {id_entrega: {etapa, risco, altura}}.
+    """
+    for altura, bloco in enumerate(blocos, start=altura_inicial):
+        for evento in eventos_do_bloco(bloco.get("eventos")):
+            if isinstance(evento, dict) and evento.get("id_entrega") is not None:
+                entregas[str(evento["id_entrega"])] = {
+                    "etapa": evento.get("etapa"),
+                    "risco": evento.get("risco"),
+                    "altura": altura,
+                }
+    return entregas
+
+
+def criar_snapshot(blocos, altura, hash_topo, anterior=None):
+    """
+    Snapshot na altura `altura`. `blocos` são só os blocos desde o
+    snapshot `anterior` (ou desde o gênesis): o estado é incremental.
+    """
+    base = anterior["altura"] if anterior else 0
+    entregas = dict(anterior["entregas"]) if anterior else {}
+
+    snapshot = {
+        "altura": altura,
+        "hash_topo": hash_topo,
+        "entregas": atualizar_entregas(entregas, blocos, base),
+        "anterior": anterior["digest"] if anterior else None,
+        "criado_em": datetime.now().isoformat(),
+    }
+    snapshot["digest"] = _digest(snapshot)
+    snapshot["assinaturas"] = {}
+    return snapshot
+
+
+def assinar_snapshot(snapshot, chaves_privadas):
+    """Acrescenta a assinatura de cada nó ({nome: chave privada}) sobre o digest."""
+    for nome, chave in chaves_privadas.items():
+        snapshot["assinaturas"][nome] = assinar_bloco(chave, snapshot["digest"])
+    return snapshot
+
+
+def verificar_snapshot(snapshot, chaves_publicas, quorum=1):
+    """
+    True se o digest confere e ao menos `quorum` nós conhecidos
+    ({nome: chave pública}) assinaram.
+    """
+    if not snapshot or _digest(snapshot) != snapshot.get("digest"):
+        return False
+
+    assinaturas = snapshot.get("assinaturas", {})
+    validas = sum(verificar_assinaturas(
+        (chave, snapshot["digest"], assinaturas.get(nome))
+        for nome, chave in chaves_publicas.items()
+    ))
+    return validas >= quorum
+
+
+def validar_desde_snapshot(snapshot, blocos, conteudo=True):
+    """
+    Valida os blocos a partir de um snapshot confiável: o primeiro deve
+    apontar para snapshot["hash_topo"] e cada um para o anterior. Com
+    conteudo=True, o hash de cada bloco também é recalculado.
+    Retorna a primeira altura inválida, ou None.
+    """
+    anterior = snapshot["hash_topo"] if snapshot else None
+
+    for altura, bloco in enumerate(blocos, start=snapshot["altura"] if snapshot else 0):
+        if anterior is not None and bloco.get("hash_anterior") != anterior:
+            return altura
+
+        if conteudo and bloco.get("hash_atual") != recalcular_hash_bloco(
+            bloco.get("eventos"), bloco.get("hash_anterior"), bloco.get("tx_id"), bloco.get("merkle_raiz")
+        ):
+            return altura
+
+        anterior = bloco.get("hash_atual")
+
+    return None
+
+
+def salvar_snapshot(snapshot, caminho):
+    """Grava o snapshot de forma atômica (arquivo temporário + rename)."""
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, caminho)
+
+
+def carregar_snapshot(caminho):
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+__all__ = [
+    "atualizar_entregas",
+    "criar_snapshot",
+    "assinar_snapshot",
+    "verificar_snapshot",
+    "validar_desde_snapshot",
+    "salvar_snapshot",
+    "carregar_snapshot",
+]
@@ -0,0 +1,231 @@
+# ===========================================================
+# smartlog_sync.py — Sincronização de nós atrasados (catch-up P2P)
+# ===========================================================
+# Um nó que reiniciou ou perdeu chamadas a /bloco pergunta a altura
+# dos pares (/status) e puxa os blocos que faltam em páginas
+# (GET /blocos?from&to), várias em voo ao mesmo tempo e distribuídas
+# entre os pares mais altos. Cada página é conferida pelo encadeamento
+# (hash_anterior → hash_atual) antes de ser gravada, sempre em ordem,
+# e gravada só sobre o topo contra o qual foi conferida: se o destino
+# avançou no meio (um /bloco aceito durante o catch-up), o catch-up
+# recomeça do topo novo.
+#
+# O custo passa a ser ~(blocos / página) idas e voltas, sobrepostas,
+# em vez de uma requisição por bloco.
+# ===========================================================
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import time
+
+from smartlog_ledger import Ledger
+from smartlog_rede import TIMEOUT_PADRAO, consultar_no
+
+TAMANHO_PAGINA = 5000
+PAGINAS_EM_VOO = 4
+
+# hash_anterior do primeiro bloco de uma cadeia: "GENESIS" nos nós,
+# "0" no bloco gênesis do simulador
+RAIZES = ("GENESIS", "0")
+
+
+# -----------------------------------------------------------
+# Destino: armazenamento do nó (ArmazemBlocos) ou Ledger local
+# -----------------------------------------------------------
+
+def _topo(destino):
+    if isinstance(destino, Ledger):
+        return len(destino), destino.ultimo_hash
+    return destino.status()
+
+def _gravar(destino, blocos, hash_anterior):
+    """Grava `blocos` se o topo do destino ainda for `hash_anterior`; True se gravou."""
+    if isinstance(destino, Ledger):
+        if destino.ultimo_hash != hash_anterior:
+            return False
+        destino.extend(blocos)
+        return True
+    return any(destino.anexar_varios_se_novos(blocos, topo_esperado=hash_anterior)[0])
+
+
+def encadeamento_valido(blocos, hash_anterior):
+    """
+    True se cada bloco aponta para o anterior. `hash_anterior` é o
+    topo já conhecido (None = cadeia vazia: o primeiro bloco precisa
+    começar uma cadeia, ver RAIZES).
+    """
+    for bloco in blocos:
+        if hash_anterior is None:
+            if bloco.get("hash_anterior") not in RAIZES:
+                return False
+        elif bloco.get("hash_anterior") != hash_anterior:
+            return False
+        hash_anterior = bloco.get("hash_atual")
+    return True
+
+
+def alturas_dos_pares(pares, timeout=TIMEOUT_PADRAO):
+    """{nome: (tamanho, ultimo_hash)} dos pares que responderam a /status."""
+    with ThreadPoolExecutor(max_workers=max(1, len(pares))) as executor:
+        futuros = {nome: executor.submit(consultar_no, url, "/status", None, timeout) for nome, url in pares.items()}
+        respostas = {nome: f.result() for nome, f in futuros.items()}
+
+    return {
+        nome: (r["tamanho"], r.get("ultimo_hash"))
+        for nome, r in respostas.items()
+        if "erro" not in r and "tamanho" in r
+    }
+
+
+def _baixar_pagina(url, inicio, fim, timeout):
+    resposta = consultar_no(url, "/blocos", params={"from": inicio, "to": fim}, timeout=timeout)
+    if "erro" in resposta:
+        raise RuntimeError(resposta["erro"])
+    return resposta.get("blocos", [])
+
+
+def sincronizar(destino, pares, tamanho_pagina=TAMANHO_PAGINA, paginas_em_voo=PAGINAS_EM_VOO,
+                timeout=TIMEOUT_PADRAO, validar=None):
+    """
+    Traz `destino` até a maior altura entre os `pares` ({nome: url}).
+
+    Páginas são pedidas em paralelo (até `paginas_em_voo` por par),
+    em rodízio entre os pares que estão na altura máxima; a página que
+    falhar ou não encadear é pedida a outro par. A gravação segue a
+    ordem das alturas. Retorna métricas da sincronização.
+
+    validar(blocos, hash_anterior) confere o conteúdo de cada página
+    já encadeada (ex.: quorum de assinaturas) e devolve o motivo da
+    recusa ou None; a página recusada também é pedida a outro par.
+    """
+    t0 = time.perf_counter()
+    altura, ultimo_hash = _topo(destino)
+    relatorio = {
+        "altura_inicial": altura,
+        "altura_final": altura,
+        "blocos": 0,
+        "paginas": 0,
+        "fontes": {},
+        "erros": [],
+        "segundos": 0.0,
+        "blocos_s": 0.0,
+    }
+
+    alturas = alturas_dos_pares(pares, timeout)
+    alvo = max((t for t, _ in alturas.values()), default=0)
+    fontes = [nome for nome, (t, _) in alturas.items() if t == alvo]
+
+    if alvo <= altura or not fontes:
+        relatorio["segundos"] = time.perf_counter() - t0
+        return relatorio
+
+    proxima = altura          # próxima altura a pedir
+    prontas = {}              # inicio → (fim, blocos ou None, fonte, índice do par)
+    falhas = {}               # inicio → quantos pares já falharam nessa página
+    rodizio = 0
+    geracao = 0               # muda quando o catch-up recomeça: páginas antigas são descartadas
+
+    with ThreadPoolExecutor(max_workers=paginas_em_voo * len(fontes)) as executor:
+        em_voo = {}
+
+        def pedir(inicio, fim, indice):
+            nome = fontes[indice % len(fontes)]
+            futuro = executor.submit(_baixar_pagina, pares[nome], inicio, fim, timeout)
+            em_voo[futuro] = (inicio, fim, nome, indice, geracao)
+
+        abortar = False
+        while altura < alvo and not abortar:
+            # Mantém a janela de páginas em voo cheia
+            while proxima < alvo and len(em_voo) < paginas_em_voo * len(fontes):
+                fim = min(proxima + tamanho_pagina, alvo)
+                pedir(proxima, fim, rodizio)
+                rodizio += 1
+                proxima = fim
+
+            if not em_voo:
+                break
+
+            concluidos, _ = wait(em_voo, return_when=FIRST_COMPLETED)
+            for futuro in concluidos:
+                inicio, fim, nome, indice, pedida_em = em_voo.pop(futuro)
+                if pedida_em != geracao:
+                    continue
+                try:
+                    blocos = futuro.result()
+                except Exception as e:
+                    relatorio["erros"].append(f"{nome} [{inicio}, {fim}): {e}")
+                    blocos = None
+                prontas[inicio] = (fim, blocos, nome, indice)
+
+            # Grava, em ordem, tudo o que já é contíguo ao topo
+            while altura in prontas:
+                fim, blocos, nome, indice = prontas.pop(altura)
+
+                if blocos and not encadeamento_valido(blocos, ultimo_hash):
+                    relatorio["erros"].append(f"{nome} [{altura}, {fim}): encadeamento inválido")
+                    blocos = None
+                elif blocos and validar is not None:
+                    motivo = validar(blocos, ultimo_hash)
+                    if motivo:
+                        relatorio["erros"].append(f"{nome} [{altura}, {fim}): {motivo}")
+                        blocos = None
+
+                if not blocos:
+                    # Pede a página a outro par; desiste depois de passar por todos
+                    falhas[altura] = falhas.get(altura, 0) + 1
+                    if falhas[altura] >= len(fontes):
+                        abortar = True
+                    else:
+                        pedir(altura, fim, indice + 1)
+                    break
+
+                if not _gravar(destino, blocos, ultimo_hash):
+                    # O destino avançou por fora: recomeça a partir do topo novo
+                    altura, ultimo_hash = _topo(destino)
+                    relatorio["erros"].append(f"topo do destino mudou; recomeçando da altura {altura}")
+                    geracao += 1
+                    prontas.clear()
+                    falhas.clear()
+                    proxima = altura
+                    break
+
+                altura += len(blocos)
+                ultimo_hash = blocos[-1].get("hash_atual")
+                relatorio["blocos"] += len(blocos)
+                relatorio["paginas"] += 1
+                relatorio["fontes"][nome] = relatorio["fontes"].get(nome, 0) + 1
+
+                # Página parcial (limite de página do servidor): pede o restante
+                if altura < fim:
+                    pedir(altura, fim, indice)
+
+        for futuro in em_voo:
+            futuro.cancel()
+
+    relatorio["altura_final"] = altura
+    relatorio["segundos"] = time.perf_counter() - t0
+    relatorio["blocos_s"] = relatorio["blocos"] / relatorio["segundos"] if relatorio["segundos"] else 0.0
+    return relatorio
+
+
+def sincronizar_espelhos(espelhos, pares, timeout=TIMEOUT_PADRAO, **opcoes):
+    """
+    Sincroniza vários espelhos ao mesmo tempo, cada um a partir do seu
+    nó: espelhos {nome: destino}, pares {nome: url}. Um nó fora do ar
+    custa um timeout no total, não um por nó. Retorna {nome: relatório}.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, len(espelhos))) as executor:
+        futuros = {
+            nome: executor.submit(sincronizar, destino, {nome: pares[nome]}, timeout=timeout, **opcoes)
+            for nome, destino in espelhos.items()
+        }
+        return {nome: f.result() for nome, f in futuros.items()}
+
+
+__all__ = [
+    "TAMANHO_PAGINA",
+    "RAIZES",
+    "encadeamento_valido",
+    "alturas_dos_pares",
+    "sincronizar",
+    "sincronizar_espelhos",
+]
@@ -0,0 +1,130 @@
+# ===========================================================
+# smartlog_wal.py — Log append-only de blocos (JSONL)
+# ===========================================================
+# Cada bloco é uma linha JSON terminada em "\n". Anexar custa O(1)
+# (não reescreve a cadeia) e, na partida, o log é reproduzido para
+# reconstruir a lista de blocos. Uma linha incompleta no fim (queda
+# no meio da escrita) é descartada e o arquivo é truncado ali.
+# ===========================================================
+
+import json
+import os
+import time
+
+
+class LogBlocos:
+    """
+    Log de blocos append-only com fsync em lote.
+
+    - fsync_a_cada: faz fsync a cada N blocos anexados (1 = todo bloco);
+    - fsync_intervalo: também faz fsync se passaram N segundos desde o
+      último (None desativa). Entre fsyncs, os dados ficam no cache do SO.
+    """
+
+    def __init__(self, caminho, fsync_a_cada=1, fsync_intervalo=None):
+        self.caminho = caminho
+        self.fsync_a_cada = max(1, fsync_a_cada)
+        self.fsync_intervalo = fsync_intervalo
+
+        self._arquivo = None
+        self._pendentes = 0
+        self._ultimo_fsync = time.monotonic()
+
+    # -------------------------------------------------------
+    # Leitura (replay)
+    # -------------------------------------------------------
+
+    def carregar(self):
+        """
+        Reproduz o log e retorna a lista de blocos.
+        Trunca o arquivo após a última linha íntegra.
+        """
+        blocos = []
+        if not os.path.exists(self.caminho):
+            return blocos
+
+        valido = 0
+        with open(self.caminho, "rb") as f:
+            for linha in f:
+                if not linha.endswith(b"\n"):
+                    break
+                try:
+                    blocos.append(json.loads(linha))
+                except ValueError:
+                    break
+                valido += len(linha)
+
+        if valido != os.path.getsize(self.caminho):
+            print(f"⚠️ Log {self.caminho}: final corrompido descartado ({valido} bytes íntegros).")
+            with open(self.caminho, "r+b") as f:
+                f.truncate(valido)
+
+        return blocos
+
+    # -------------------------------------------------------
+    # Escrita
+    # -------------------------------------------------------
+
+    def _abrir(self):
+        if self._arquivo is None:
+            self._arquivo = open(self.caminho, "ab")
+        return self._arquivo
+
+    def anexar(self, bloco):
+        """Anexa um bloco ao fim do log (O(1))."""
+        self.anexar_varios([bloco])
+
+    def anexar_varios(self, blocos):
+        """Anexa vários blocos com uma única escrita."""
+        dados = b"".join(
+            json.dumps(b, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+            for b in blocos
+        )
+        if not dados:
+            return
+
+        f = self._abrir()
+        f.write(dados)
+        f.flush()
+
+        self._pendentes += len(blocos)
+        atrasado = (
+            self.fsync_intervalo is not None
+            and time.monotonic() - self._ultimo_fsync >= self.fsync_intervalo
+        )
+        if self._pendentes >= self.fsync_a_cada or atrasado:
+            self.sincronizar()
+
+    def reescrever(self, blocos):
+        """
+        Substitui o conteúdo do log por `blocos`, de forma atômica
+        (arquivo temporário + fsync + rename). Usado na compactação.
+        """
+        self.fechar()
+
+        temporario = self.caminho + ".tmp"
+        with open(temporario, "wb") as f:
+            f.write(b"".join(
+                json.dumps(b, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+                for b in blocos
+            ))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.caminho)
+
+    def sincronizar(self):
+        """Força o fsync dos blocos pendentes."""
+        if self._arquivo is not None and self._pendentes:
+            self._arquivo.flush()
+            os.fsync(self._arquivo.fileno())
+        self._pendentes = 0
+        self._ultimo_fsync = time.monotonic()
+
+    def fechar(self):
+        self.sincronizar()
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
+
+
+__all__ = ["LogBlocos"]
@@ -0,0 +1,72 @@
+# ============================================================
+# Gravação de auditoria em segundo plano (GravadorAuditoria)
+# ============================================================
+
+from datetime import datetime
+import threading
+
+from audit_logger import GravadorAuditoria
+from smartlog_armazenamento import ArmazemMemoria, criar_armazem
+
+
+def _log(acao, detalhes="d"):
+    return {"usuario": "u", "acao": acao, "detalhes": detalhes, "timestamp": datetime.utcnow().isoformat()}
+
+
+def test_grava_em_lotes_sem_duplicados_consecutivos(tmp_path):
+    armazem = criar_armazem("sqlite", str(tmp_path / "auditoria.db"))
+    gravador = GravadorAuditoria(armazem, tamanho_lote=50, intervalo=60)
+
+    # Espião: de que thread, e com quantos registros, o armazenamento é chamado
+    chamadas = []
+    gravar = armazem.registrar_auditoria_varios
+
+    def espiao(registros):
+        chamadas.append((threading.current_thread(), len(registros)))
+        gravar(registros)
+
+    armazem.registrar_auditoria_varios = espiao
+
+    aceitos = [gravador.registrar(_log(f"a{i // 2}")) for i in range(400)]
+
+    assert aceitos == [True, False] * 200
+    assert gravador.descarregar(timeout=10)
+    # Nenhuma ida ao armazenamento no caminho da chamada, e sempre em lotes
+    assert chamadas and all(t is not threading.main_thread() for t, _ in chamadas)
+    assert all(n <= 50 for _, n in chamadas) and sum(n for _, n in chamadas) == 200
+    assert [r["acao"] for r in armazem.ler_auditoria()] == [f"a{i}" for i in range(200)]
+
+    # Encerramento grava o que sobrou na fila
+    gravador.registrar(_log("final"))
+    gravador.fechar()
+    assert armazem.ler_auditoria(1)[0]["acao"] == "final"
+
+
+def test_duplicado_do_ultimo_log_gravado_antes_e_descartado():
+    armazem = ArmazemMemoria()
+    armazem.registrar_auditoria(_log("consenso"))
+
+    gravador = GravadorAuditoria(armazem, intervalo=60)
+    gravador.registrar(_log("consenso"))
+    gravador.registrar(_log("recuperacao"))
+    assert gravador.descarregar(timeout=10)
+    assert [r["acao"] for r in armazem.ler_auditoria()] == ["consenso", "recuperacao"]
+
+
+class _ArmazemInstavel(ArmazemMemoria):
+    falhas = 1
+
+    def _persistir_auditoria(self, registros):
+        if self.falhas:
+            self.falhas -= 1
+            raise OSError("armazenamento indisponível")
+
+
+def test_falha_na_escrita_mantem_o_lote_para_nova_tentativa():
+    armazem = _ArmazemInstavel()
+    gravador = GravadorAuditoria(armazem, intervalo=0.05)
+
+    for i in range(5):
+        gravador.registrar(_log(f"a{i}"))
+    assert gravador.descarregar(timeout=10)
+    assert [r["acao"] for r in armazem.ler_auditoria()] == [f"a{i}" for i in range(5)]
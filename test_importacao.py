@@ -0,0 +1,25 @@
+# ============================================================
+# Importar o app e o nó não pode inicializar o Firebase
+# ============================================================
+
+import json
+import os
+import subprocess
+import sys
+
+from bench_importacao import MODULOS_FIREBASE, RAIZ, modulos_do_app
+
+
+def test_importar_app_e_no_nao_carrega_firebase():
+    modulos = modulos_do_app() + ["no_poa_server", "smartlog_armazenamento"]
+    codigo = (
+        f"import json, sys\n"
+        f"for m in {modulos!r}: __import__(m)\n"
+        f"print(json.dumps([m for m in {MODULOS_FIREBASE!r} if m in sys.modules]))"
+    )
+    env = dict(os.environ, ARMAZENAMENTO="memoria", SMARTLOG_ARMAZENAMENTO="memoria")
+
+    saida = subprocess.run(
+        [sys.executable, "-c", codigo], cwd=RAIZ, env=env, capture_output=True, text=True, check=True
+    ).stdout.strip().splitlines()[-1]
+    assert json.loads(saida) == []
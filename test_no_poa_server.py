@@ -0,0 +1,458 @@
+# ============================================================
+# Teste de carga do nó Flask: /bloco e /status em paralelo
+# ============================================================
+
+import json
+import multiprocessing
+import os
+import secrets
+import tempfile
+import threading
+import time
+
+import pytest
+
+# O servidor cria o armazenamento e a chave ao ser importado: aponta para um diretório temporário
+_DIRETORIO = tempfile.mkdtemp()
+os.environ.setdefault("ARQUIVO_LOG", os.path.join(_DIRETORIO, "blockchain_teste.jsonl"))
+os.environ.setdefault("ARQUIVO_CHAVE", os.path.join(_DIRETORIO, "chave_teste.secret"))
+
+import no_poa_server as srv
+from smartlog_armazenamento import ArmazemMemoria, ArmazemSQLite, criar_armazem
+from smartlog_blockchain import assinar_bloco, bloco_da_proposta, propor_bloco
+
+THREADS = 16
+BLOCOS_POR_THREAD = 40
+
+
+@pytest.fixture(params=["memoria", "arquivo", "sqlite"])
+def armazem(request, tmp_path, monkeypatch):
+    caminho = tmp_path / ("ledger.jsonl" if request.param == "arquivo" else "ledger.db")
+    armazem = criar_armazem(request.param, str(caminho))
+    monkeypatch.setattr(srv, "armazem", armazem)
+    yield armazem
+    armazem.fechar()
+
+
+def _cadeia(total, topo="GENESIS", chaves=None):
+    """Blocos encadeados a partir de `topo`, assinados pelo nó (ou por `chaves`: {nó: privada})."""
+    chaves = chaves or {srv.NOME_NO: srv.CHAVE_NO}
+    blocos = []
+    for i in range(total):
+        proposta = propor_bloco("Node_X", [{"id_entrega": i}], topo)
+        assinaturas = {n: assinar_bloco(c, proposta["hash_bloco"]) for n, c in chaves.items()}
+        blocos.append(bloco_da_proposta(proposta, i, assinaturas=assinaturas))
+        topo = proposta["hash_bloco"]
+    return blocos
+
+
+def _em_paralelo(alvo, total=THREADS):
+    erros = []
+
+    def executar(i):
+        try:
+            alvo(i)
+        except Exception as e:  # pragma: no cover - reportado abaixo
+            erros.append(e)
+
+    threads = [threading.Thread(target=executar, args=(i,)) for i in range(total)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not erros, erros
+
+
+def test_carga_bloco_e_status_concorrentes(armazem):
+    # Todos os clientes enviam a mesma cadeia, em ordem: cada bloco entra
+    # uma vez; os demais envios são repetições do topo ou já ficaram para trás
+    cadeia = _cadeia(BLOCOS_POR_THREAD)
+    aceitos = []
+
+    def cliente(i):
+        http = srv.app.test_client()
+        ultimo_tamanho = 0
+        for bloco in cadeia:
+            r = http.post("/bloco", json=bloco)
+            assert r.json["status"] in ("OK", "IGNORADO", "RECUSADO")
+            if r.json["status"] == "OK":
+                aceitos.append(bloco["hash_atual"])
+
+            st = http.get("/status").json
+            assert st["tamanho"] >= ultimo_tamanho
+            ultimo_tamanho = st["tamanho"]
+
+    _em_paralelo(cliente)
+
+    assert armazem.ler_intervalo(0) == cadeia
+    assert sorted(aceitos) == sorted(b["hash_atual"] for b in cadeia)
+    assert srv.app.test_client().get("/status").json["tamanho"] == len(cadeia)
+
+
+def test_bloco_repetido_concorrente_e_aceito_uma_vez(armazem):
+    respostas = []
+
+    bloco = _cadeia(1)[0]
+
+    def cliente(_):
+        r = srv.app.test_client().post("/bloco", json=bloco)
+        respostas.append(r.json["status"])
+
+    _em_paralelo(cliente)
+
+    assert respostas.count("OK") == 1
+    assert respostas.count("IGNORADO") == THREADS - 1
+    assert armazem.tamanho() == 1
+
+
+def _worker_sqlite(caminho, worker, total):
+    armazem = ArmazemSQLite(caminho)
+    for j in range(total):
+        armazem.anexar_se_novo({"hash_atual": f"p{worker}-{j}"})
+        armazem.status()
+    armazem.fechar()
+
+
+def test_sqlite_varios_processos(tmp_path):
+    caminho = str(tmp_path / "ledger.db")
+    ArmazemSQLite(caminho).fechar()
+
+    ctx = multiprocessing.get_context("fork")
+    processos = [ctx.Process(target=_worker_sqlite, args=(caminho, w, 50)) for w in range(4)]
+    for p in processos:
+        p.start()
+    for p in processos:
+        p.join()
+        assert p.exitcode == 0
+
+    armazem = ArmazemSQLite(caminho)
+    blocos = armazem.ler_intervalo(0)
+    assert armazem.status() == (200, blocos[-1]["hash_atual"])
+    assert len({b["hash_atual"] for b in blocos}) == 200
+
+
+def _worker_concorrente(caminho, cadeia, largada, status):
+    srv.armazem = ArmazemSQLite(caminho)
+    largada.wait()
+    for bloco in cadeia:
+        status.append(srv.processar_bloco(bloco)["status"])
+    srv.armazem.fechar()
+
+
+def test_sqlite_blocos_concorrentes_sobre_o_mesmo_pai_nao_bifurcam(tmp_path):
+    # Cada worker envia a sua própria cadeia a partir do GENESIS: os
+    # blocos disputam os mesmos pais e só um por altura pode entrar
+    caminho = str(tmp_path / "ledger.db")
+    ArmazemSQLite(caminho).fechar()
+
+    ctx = multiprocessing.get_context("fork")
+    largada, status = ctx.Barrier(4), ctx.Manager().list()
+    cadeias = [_cadeia(15) for _ in range(4)]
+    processos = [ctx.Process(target=_worker_concorrente, args=(caminho, c, largada, status)) for c in cadeias]
+    for p in processos:
+        p.start()
+    for p in processos:
+        p.join()
+        assert p.exitcode == 0
+
+    armazem = ArmazemSQLite(caminho)
+    blocos = armazem.ler_intervalo(0)
+    armazem.fechar()
+
+    anteriores = ["GENESIS"] + [b["hash_atual"] for b in blocos[:-1]]
+    assert [b["hash_anterior"] for b in blocos] == anteriores
+    assert list(status).count("OK") == len(blocos) == 15
+    assert set(status) <= {"OK", "RECUSADO"}
+
+
+def _worker_chave(largada, chaves):
+    largada.wait()
+    chaves.append(srv.carregar_chave_no())
+
+
+def test_workers_subindo_juntos_compartilham_a_mesma_chave(tmp_path, monkeypatch):
+    # Quem perde a corrida pela criação do arquivo nunca lê uma chave vazia
+    # (a geração lenta alarga a janela entre criar o arquivo e escrevê-lo)
+    monkeypatch.delenv("CHAVE_NO", raising=False)
+    token_hex = secrets.token_hex
+    monkeypatch.setattr(secrets, "token_hex", lambda n: time.sleep(0.05) or token_hex(n))
+    for rodada in range(5):
+        monkeypatch.setattr(srv, "ARQUIVO_CHAVE", str(tmp_path / f"chave_{rodada}.secret"))
+        ctx = multiprocessing.get_context("fork")
+        largada, chaves = ctx.Barrier(6), ctx.Manager().list()
+        processos = [ctx.Process(target=_worker_chave, args=(largada, chaves)) for _ in range(6)]
+        for p in processos:
+            p.start()
+        for p in processos:
+            p.join()
+            assert p.exitcode == 0
+
+        assert len(chaves) == 6 and len(set(chaves)) == 1 and len(chaves[0]) == 64
+        assert srv.carregar_chave_no() == chaves[0]
+        assert os.stat(srv.ARQUIVO_CHAVE).st_mode & 0o777 == 0o600
+    assert sorted(os.listdir(tmp_path)) == [f"chave_{r}.secret" for r in range(5)]
+
+
+def test_no_sem_validadores_configurados_nao_sobe(monkeypatch):
+    monkeypatch.setattr(srv, "CHAVES_PUBLICAS", {srv.NOME_NO: srv.CHAVE_PUBLICA_NO})
+    monkeypatch.setattr(srv, "QUORUM", 1)
+    monkeypatch.setattr(srv, "NO_UNICO", False)
+    with pytest.raises(SystemExit, match="CHAVES_PUBLICAS"):
+        srv.verificar_validadores()
+
+    # Nó isolado declarado
+    monkeypatch.setattr(srv, "NO_UNICO", True)
+    srv.verificar_validadores()
+
+    # Quorum que nenhum conjunto de validadores alcança
+    monkeypatch.setattr(srv, "CHAVES_PUBLICAS", {srv.NOME_NO: srv.CHAVE_PUBLICA_NO, "Node_B": "bb"})
+    monkeypatch.setattr(srv, "QUORUM", 3)
+    with pytest.raises(SystemExit, match="QUORUM"):
+        srv.verificar_validadores()
+
+    monkeypatch.setattr(srv, "QUORUM", 2)
+    srv.verificar_validadores()
+    assert srv.status_no()["validadores"] == sorted([srv.NOME_NO, "Node_B"])
+
+
+@pytest.fixture(params=["flask", "async"])
+def cliente(request, armazem):
+    if request.param == "flask":
+        return srv.app.test_client()
+    from starlette.testclient import TestClient
+    import no_poa_async
+    return TestClient(no_poa_async.app)
+
+
+def _corpo(r):
+    # Flask expõe .json como propriedade; o TestClient do Starlette, como método
+    return r.json() if callable(r.json) else r.json
+
+
+def test_lote_de_blocos_e_intervalo(cliente, armazem):
+    cadeia = _cadeia(1200)
+    r = cliente.post("/blocos", json=cadeia + [cadeia[-1]])
+    corpo = _corpo(r)
+    assert (corpo["anexados"], corpo["ignorados"], corpo["tamanho"]) == (1200, 1, 1200)
+    assert corpo["resultados"][-1] == "IGNORADO"
+
+    pagina = _corpo(cliente.get("/blocos?from=995&to=1010"))
+    assert (pagina["from"], pagina["to"], pagina["tamanho"]) == (995, 1010, 1200)
+    assert pagina["blocos"] == cadeia[995:1010]
+    assert len(_corpo(cliente.get("/blocos?from=100"))["blocos"]) == 1100
+
+
+def test_bloco_sem_quorum_adulterado_ou_fora_do_topo_e_recusado(cliente, armazem, monkeypatch):
+    from smartlog_blockchain import chave_publica
+
+    valido, seguinte = _cadeia(2)
+
+    sem_assinatura = dict(valido, assinaturas={})
+    estranho = dict(valido, assinaturas={srv.NOME_NO: assinar_bloco("chave_de_outro", valido["hash_atual"])})
+    adulterado = dict(valido, eventos='[{"id_entrega": 666}]')
+    for bloco in (sem_assinatura, estranho, adulterado, seguinte, {"hash_atual": "qualquer"}):
+        resposta = _corpo(cliente.post("/bloco", json=bloco))
+        assert resposta["status"] == "RECUSADO", resposta
+    assert armazem.tamanho() == 0
+
+    # Lote: anexa até o primeiro bloco recusado e para
+    corpo = _corpo(cliente.post("/blocos", json=[valido, dict(seguinte, tx_id="outro"), _cadeia(3)[2]]))
+    assert corpo["resultados"] == ["OK", "RECUSADO", "RECUSADO"] and corpo["status"] == "RECUSADO"
+    assert "hash_atual" in corpo["motivo"] and armazem.tamanho() == 1
+
+    # Com três validadores, a assinatura do próprio nó não basta: exige 2 de 3
+    chaves = {"Node_B": "segredo_b", "Node_C": "segredo_c"}
+    monkeypatch.setattr(srv, "CHAVES_PUBLICAS", {
+        srv.NOME_NO: srv.CHAVE_PUBLICA_NO, **{n: chave_publica(c) for n, c in chaves.items()}
+    })
+    monkeypatch.setattr(srv, "QUORUM", 2)
+    resposta = _corpo(cliente.post("/bloco", json=seguinte))
+    assert resposta["status"] == "RECUSADO" and "1 de 2" in resposta["motivo"]
+
+    proposta = propor_bloco("Node_X", [{"id_entrega": 1}], valido["hash_atual"])
+    assinado = bloco_da_proposta(proposta, 1, assinaturas={n: assinar_bloco(c, proposta["hash_bloco"]) for n, c in chaves.items()})
+    assert _corpo(cliente.post("/bloco", json=assinado))["status"] == "OK"
+    assert armazem.status() == (2, assinado["hash_atual"])
+
+
+
+def test_proposta_deterministica_e_sobre_o_topo(cliente, armazem):
+    from smartlog_blockchain import chave_publica, verificar_assinatura
+
+    inicial = _cadeia(1)[0]
+    topo = inicial["hash_atual"]
+    assert _corpo(cliente.post("/bloco", json=inicial))["status"] == "OK"
+    proposta = propor_bloco("Node_X", [{"id_entrega": 1}], topo)
+    payload = {"eventos": proposta["eventos"], "hash_anterior": topo, "tx_id": proposta["tx_id_proposta"]}
+
+    voto = _corpo(cliente.post("/proposta", json=payload))
+    assert voto["hash_bloco"] == proposta["hash_bloco"]
+    assert verificar_assinatura(chave_publica(srv.CHAVE_NO), proposta["hash_bloco"], voto["assinatura"])
+
+    # Reenvio idêntico com o hash já visto: mesmo voto, vindo do cache
+    reenvio = dict(payload, hash_bloco=proposta["hash_bloco"])
+    assert _corpo(cliente.post("/proposta", json=reenvio)) == voto
+
+    # Só o hash, ou o hash em cache com outro conteúdo: o cache não responde
+    assert _corpo(cliente.post("/proposta", json={"hash_bloco": proposta["hash_bloco"]}))["assinatura"] is None
+    trocado = _corpo(cliente.post("/proposta", json=dict(reenvio, eventos=[{"id_entrega": 666}])))
+    assert trocado["assinatura"] is None and trocado["hash_bloco"] != proposta["hash_bloco"]
+
+    # Fora do topo ou com hash adulterado: recusada
+    fora = _corpo(cliente.post("/proposta", json=dict(payload, hash_anterior="outro")))
+    assert fora["assinatura"] is None and fora["topo"] == topo
+    adulterado = _corpo(cliente.post("/proposta", json=dict(payload, tx_id="t2", hash_bloco="0" * 64)))
+    assert adulterado["assinatura"] is None
+
+    # Lote: a segunda proposta pode se apoiar na primeira
+    p1 = propor_bloco("Node_X", [{"id_entrega": 2}], topo)
+    p2 = propor_bloco("Node_X", [{"id_entrega": 3}], p1["hash_bloco"])
+    votos = _corpo(cliente.post("/propostas", json=[
+        {"eventos": p["eventos"], "hash_anterior": p["hash_anterior"], "tx_id": p["tx_id_proposta"]} for p in (p1, p2)
+    ]))
+    assert [v["hash_bloco"] for v in votos] == [p1["hash_bloco"], p2["hash_bloco"]]
+    assert all(v["assinatura"] for v in votos)
+
+    # Topo avançou para outro bloco: o reenvio em cache não é mais assinado
+    outro = _cadeia(1, topo)[0]
+    assert _corpo(cliente.post("/bloco", json=outro))["status"] == "OK"
+    movido = _corpo(cliente.post("/proposta", json=reenvio))
+    assert movido["assinatura"] is None and movido["topo"] == outro["hash_atual"]
+
+
+def test_snapshot_poda_e_reabertura(armazem, tmp_path, monkeypatch):
+    from smartlog_snapshot import validar_desde_snapshot, verificar_snapshot
+
+    if type(armazem) is ArmazemMemoria:
+        pytest.skip("em memória, a poda descarta os blocos (não há arquivo)")
+
+    monkeypatch.setattr(srv, "CAMINHO_SNAPSHOT", str(tmp_path / "snapshot.json"))
+    monkeypatch.setattr(srv, "snapshot_atual", None)
+
+    topo, blocos = "GENESIS", []
+    for i in range(30):
+        proposta = propor_bloco("Node_X", [{"id_entrega": i % 7, "etapa": f"etapa {i}"}], topo)
+        blocos.append(bloco_da_proposta(proposta, i))
+        topo = proposta["hash_bloco"]
+
+    armazem.anexar_varios_se_novos(blocos[:20])
+    snapshot = srv.gerar_snapshot()
+    assert verificar_snapshot(snapshot, {srv.NOME_NO: srv.CHAVE_PUBLICA_NO})
+    assert snapshot["altura"] == 20 and snapshot["entregas"]["5"]["etapa"] == "etapa 19"
+    assert armazem.altura_base() == 20 and armazem.status() == (20, blocos[19]["hash_atual"])
+
+    # Continua anexando; a leitura atravessa arquivo + blocos vivos
+    armazem.anexar_varios_se_novos(blocos[20:])
+    assert armazem.ler_intervalo(15, 25) == blocos[15:25]
+    assert validar_desde_snapshot(snapshot, armazem.ler_intervalo(20)) is None
+
+    # Ao reabrir, só os blocos acima do snapshot voltam para a memória
+    armazem.fechar()
+    if isinstance(armazem, ArmazemSQLite):
+        reaberto = criar_armazem("sqlite", str(tmp_path / "ledger.db"))
+    else:
+        reaberto = criar_armazem("arquivo", str(tmp_path / "ledger.jsonl"))
+    assert reaberto.altura_base() == 20 and reaberto.status() == (30, topo)
+    assert reaberto.ler_intervalo(0) == blocos
+    reaberto.fechar()
+
+    # Snapshot adulterado não é aceito
+    assert not verificar_snapshot(dict(snapshot, altura=10), {srv.NOME_NO: srv.CHAVE_PUBLICA_NO})
+
+
+def test_no_nao_sobe_com_blocos_vivos_que_nao_conferem_com_o_snapshot(armazem, tmp_path, monkeypatch):
+    monkeypatch.setattr(srv, "CAMINHO_SNAPSHOT", str(tmp_path / "snapshot.json"))
+    monkeypatch.setattr(srv, "snapshot_atual", None)
+
+    cadeia = _cadeia(15)
+    armazem.anexar_varios_se_novos(cadeia[:10])
+    snapshot = srv.gerar_snapshot(podar=False)
+    armazem.anexar_varios_se_novos(cadeia[10:])
+    assert srv.carregar_snapshot_confiavel() == snapshot
+
+    # Bloco vivo adulterado acima do snapshot
+    armazem.limpar()
+    adulterado = dict(cadeia[12], eventos=json.dumps([{"id_entrega": 999}]))
+    armazem.anexar_varios_se_novos(cadeia[:12] + [adulterado] + cadeia[13:])
+    with pytest.raises(SystemExit, match="Bloco 12"):
+        srv.carregar_snapshot_confiavel()
+
+
+def test_intervalo_podado_sem_arquivo_responde_410(cliente, armazem):
+    armazem.anexar_varios_se_novos(_cadeia(30))
+    armazem.podar(20)
+
+    r = cliente.get("/blocos?from=20&to=25")
+    assert [b["bloco_id"] for b in _corpo(r)["blocos"]] == list(range(20, 25))
+
+    r = cliente.get("/blocos?from=15&to=25")
+    if type(armazem) is ArmazemMemoria:
+        assert r.status_code == 410 and _corpo(r)["altura_base"] == 20
+    else:
+        assert [b["bloco_id"] for b in _corpo(r)["blocos"]] == list(range(15, 25))
+
+
+def test_pedidos_malformados_respondem_400(cliente, armazem):
+    armazem.anexar_varios_se_novos(_cadeia(5))
+
+    for consulta in ("from=abc", "from=1&to=2x", "to=1.5"):
+        r = cliente.get(f"/blocos?{consulta}")
+        assert r.status_code == 400 and "inteiras" in _corpo(r)["erro"]
+
+    for corpo in ({"hash_atual": "x"}, [{"hash_atual": "x"}, 3], "bloco"):
+        r = cliente.post("/blocos", json=corpo)
+        assert r.status_code == 400 and "lista de blocos" in _corpo(r)["erro"]
+    assert cliente.post("/bloco", json=[_cadeia(1)[0]]).status_code == 400
+
+    r = cliente.post("/blocos", data="[{", headers={"Content-Type": "application/json"})
+    assert r.status_code == 400
+
+    # Nada foi anexado, e um pedido válido continua atendido
+    assert armazem.status()[0] == 5
+    assert len(_corpo(cliente.get("/blocos?from=1&to=3"))["blocos"]) == 2
+
+
+def test_chave_do_no_gerada_na_primeira_partida_e_reaproveitada(tmp_path, monkeypatch):
+    monkeypatch.delenv("CHAVE_NO", raising=False)
+    monkeypatch.setattr(srv, "ARQUIVO_CHAVE", str(tmp_path / "chave.secret"))
+
+    chave = srv.carregar_chave_no()
+    assert len(chave) == 64 and chave != f"key_{srv.NOME_NO}_secret"
+    assert os.stat(srv.ARQUIVO_CHAVE).st_mode & 0o777 == 0o600
+    assert srv.carregar_chave_no() == chave
+
+    monkeypatch.setenv("CHAVE_NO", "configurada")
+    assert srv.carregar_chave_no() == "configurada"
+
+
+@pytest.mark.parametrize("intruso", ["mesma_cadeia", "rival"])
+def test_bloco_aceito_durante_o_catch_up_nao_bifurca(armazem, monkeypatch, intruso):
+    import functools
+    import smartlog_sync
+
+    cadeia = _cadeia(30)
+    bloco = cadeia[10] if intruso == "mesma_cadeia" else _cadeia(1, cadeia[9]["hash_atual"])[0]
+    paginas = []
+
+    def consultar(url, rota, params=None, timeout=None):
+        if rota == "/status":
+            return {"tamanho": 30, "ultimo_hash": cadeia[-1]["hash_atual"]}
+        paginas.append(params["from"])
+        if paginas == [0, 10]:
+            # /bloco chega enquanto a página [10, 20) está a caminho
+            assert srv.processar_bloco(bloco)["status"] == "OK"
+        return {"blocos": cadeia[params["from"]:params["to"]]}
+
+    monkeypatch.setattr(smartlog_sync, "consultar_no", consultar)
+    monkeypatch.setattr(srv, "PARES", {"Node_B": "http://b"})
+    monkeypatch.setattr(srv, "sincronizar", functools.partial(smartlog_sync.sincronizar, tamanho_pagina=10, paginas_em_voo=1))
+
+    r = srv.sincronizar_com_pares()
+
+    blocos = armazem.ler_intervalo(0)
+    assert [b["hash_anterior"] for b in blocos] == ["GENESIS"] + [b["hash_atual"] for b in blocos[:-1]]
+    assert "topo do destino mudou; recomeçando da altura 11" in r["erros"]
+    if intruso == "mesma_cadeia":
+        assert blocos == cadeia and r["blocos"] == 29
+    else:
+        assert blocos == cadeia[:10] + [bloco] and r["altura_final"] == 11
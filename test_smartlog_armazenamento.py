@@ -0,0 +1,75 @@
+# ============================================================
+# Cadeia do app salva no armazenamento compartilhado
+# ============================================================
+
+import pytest
+
+from smartlog_armazenamento import ArmazemArquivo, ArmazemSQLite, carregar_ledger, criar_armazem, salvar_ledger
+from smartlog_ledger import Ledger
+
+
+def _cadeia(total, prefixo="h"):
+    return [
+        {"bloco_id": i, "hash_anterior": f"{prefixo}{i - 1}", "hash_atual": f"{prefixo}{i}", "eventos": "[]"}
+        for i in range(total)
+    ]
+
+
+@pytest.fixture(params=["memoria", "arquivo", "sqlite"])
+def armazem(request, tmp_path):
+    caminho = str(tmp_path / ("cadeia.jsonl" if request.param == "arquivo" else "cadeia.db"))
+    armazem = criar_armazem(request.param, None if request.param == "memoria" else caminho)
+    yield armazem
+    armazem.fechar()
+
+
+def test_salvar_envia_so_o_que_falta_e_regrava_cadeia_refeita(armazem):
+    blocos = _cadeia(30)
+    assert salvar_ledger(armazem, Ledger(blocos[:20]))["blocos_enviados"] == 20
+
+    r = salvar_ledger(armazem, Ledger(blocos))
+    assert (r["altura_anterior"], r["altura"], r["blocos_enviados"], r["reenvio_total"]) == (20, 30, 10, False)
+    assert salvar_ledger(armazem, Ledger(blocos))["blocos_enviados"] == 0
+
+    # Cadeia local refeita (e menor): tudo é regravado, inclusive o que foi podado
+    armazem.registrar_auditoria({"acao": "antes", "timestamp": "2024-01-01T00:00:00"})
+    armazem.podar(10)
+    refeita = _cadeia(12, "r")
+    r = salvar_ledger(armazem, Ledger(refeita))
+    assert (r["altura"], r["blocos_enviados"], r["reenvio_total"]) == (12, 12, True)
+    assert armazem.altura_base() == 0
+    assert carregar_ledger(armazem).registros() == Ledger(refeita).registros()
+
+    # Limpar remove os blocos, não a auditoria
+    armazem.limpar()
+    assert armazem.status() == (0, None) and carregar_ledger(armazem) is None
+    assert [r["acao"] for r in armazem.ler_auditoria()] == ["antes"]
+
+
+def test_anexo_condicionado_ao_topo_esperado(armazem):
+    blocos = _cadeia(4)
+    assert armazem.anexar_se_novo(blocos[0], topo_esperado=None) == (True, 1)
+
+    # Dois blocos sobre o mesmo pai: só o primeiro entra
+    rival = dict(blocos[1], hash_atual="rival")
+    assert armazem.anexar_se_novo(blocos[1], topo_esperado="h0") == (True, 2)
+    assert armazem.anexar_se_novo(rival, topo_esperado="h0") == (False, 2)
+
+    assert armazem.anexar_varios_se_novos(blocos[2:], topo_esperado="h0") == ([False, False], 2)
+    assert armazem.anexar_varios_se_novos(blocos[2:], topo_esperado="h1") == ([True, True], 4)
+    assert [b["hash_atual"] for b in armazem.ler_intervalo(0)] == ["h0", "h1", "h2", "h3"]
+
+
+def test_intervalo_podado_nao_desloca_as_alturas(armazem):
+    armazem.anexar_varios_se_novos(_cadeia(30))
+    assert armazem.podar(20) == 20
+
+    assert [b["bloco_id"] for b in armazem.ler_intervalo(20, 25)] == list(range(20, 25))
+    if isinstance(armazem, (ArmazemArquivo, ArmazemSQLite)):
+        # Com arquivo histórico, o trecho podado vem de lá
+        assert [b["bloco_id"] for b in armazem.ler_intervalo(15, 25)] == list(range(15, 25))
+    else:
+        # Só memória: o trecho podado não existe mais, e nada é devolvido no lugar dele
+        with pytest.raises(ValueError, match="podadas"):
+            armazem.ler_intervalo(15, 25)
+    assert armazem.ler_intervalo(25, 25) == []
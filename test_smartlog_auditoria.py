@@ -0,0 +1,116 @@
+# ============================================================
+# Auditoria encadeada por hash, com consulta por intervalo e ação
+# ============================================================
+
+import pytest
+
+from smartlog_armazenamento import criar_armazem
+from smartlog_auditoria import HASH_INICIAL, verificar_auditoria
+
+ACOES = ["consenso_aprovado", "no_corrompido", "no_recuperado"]
+
+
+def _registros(dias=3, por_dia=20):
+    return [
+        {"usuario": "Sistema", "acao": ACOES[i % 3], "detalhes": f"evento {d}-{i}",
+         "timestamp": f"2024-03-{d + 1:02d}T{i // 60:02d}:{i % 60:02d}:00"}
+        for d in range(dias) for i in range(por_dia)
+    ]
+
+
+@pytest.fixture(params=["memoria", "arquivo", "sqlite"])
+def abrir(request, tmp_path):
+    caminho = str(tmp_path / ("auditoria.jsonl" if request.param == "arquivo" else "auditoria.db"))
+    abertos = []
+
+    def abrir():
+        armazem = criar_armazem(request.param, caminho)
+        abertos.append(armazem)
+        return armazem
+
+    yield abrir
+    for armazem in abertos:
+        armazem.fechar()
+
+
+def test_registros_encadeados_e_adulteracao_detectada(abrir):
+    armazem = abrir()
+    armazem.registrar_auditoria_varios(_registros()[:30])
+    armazem.registrar_auditoria_varios(_registros()[30:])
+
+    log = armazem.ler_auditoria()
+    assert [r["seq"] for r in log] == list(range(60))
+    assert log[0]["hash_anterior"] == HASH_INICIAL
+    assert verificar_auditoria(log) is None
+    assert verificar_auditoria(armazem.ler_auditoria(10), anterior=log[49]) is None
+
+    adulterado = [dict(r) for r in log]
+    adulterado[17]["detalhes"] = "editado"
+    assert verificar_auditoria(adulterado) == 17
+
+    removido = log[:17] + log[18:]
+    assert verificar_auditoria(removido) == 17          # lacuna na seq
+    assert verificar_auditoria(removido[10:], anterior=log[9]) == 7
+    assert verificar_auditoria(log[20:], anterior=log[18]) == 0
+    removido[17] = dict(removido[17], seq=17)   # renumerar não esconde a remoção
+    assert verificar_auditoria(removido) == 17
+
+    # Filtrado (consulta): lacunas esperadas, mas hashes ainda conferidos
+    assert verificar_auditoria(log[::3], contiguo=False) is None
+    assert verificar_auditoria(adulterado[15:20:2], contiguo=False) == 1
+
+
+def test_consulta_por_intervalo_e_acao(abrir):
+    armazem = abrir()
+    armazem.registrar_auditoria_varios(_registros())
+
+    dia_2 = armazem.consultar_auditoria("2024-03-02", "2024-03-03")
+    assert len(dia_2) == 20 and {r["timestamp"][:10] for r in dia_2} == {"2024-03-02"}
+
+    recuperacoes = armazem.consultar_auditoria("2024-03-01T00:10", "2024-03-03", acao="no_recuperado")
+    esperado = [r for r in _registros() if r["acao"] == "no_recuperado" and "2024-03-01T00:10" <= r["timestamp"] < "2024-03-03"]
+    assert [r["detalhes"] for r in recuperacoes] == [r["detalhes"] for r in esperado]
+    assert verificar_auditoria(recuperacoes, contiguo=False) is None
+    assert verificar_auditoria(recuperacoes) is not None   # não é uma leitura contígua
+
+    assert len(armazem.consultar_auditoria(acao="no_corrompido", limite=5)) == 5
+    assert armazem.consultar_auditoria("2025-01-01") == []
+
+
+def test_cadeia_continua_apos_reabrir(abrir, request):
+    if request.node.callspec.params["abrir"] == "memoria":
+        pytest.skip("memória não persiste")
+
+    armazem = abrir()
+    armazem.registrar_auditoria_varios(_registros()[:40])
+    armazem.fechar()
+
+    reaberto = abrir()
+    # Registro com horário atrasado: vai para o segmento do seu dia
+    reaberto.registrar_auditoria({"acao": "no_recuperado", "detalhes": "atrasado", "timestamp": "2024-03-01T23:59:00"})
+    reaberto.fechar()
+
+    log = abrir().ler_auditoria()
+    assert [r["seq"] for r in log][-2:] == [39, 40]
+    assert verificar_auditoria(log) is None
+    assert abrir().consultar_auditoria(acao="no_recuperado")[-1]["detalhes"] == "atrasado"
+
+
+def test_segmento_vazio_ou_com_final_rasgado_nao_impede_a_abertura(tmp_path):
+    caminho = str(tmp_path / "no.jsonl")
+    armazem = criar_armazem("arquivo", caminho)
+    armazem.registrar_auditoria_varios(_registros(dias=2))
+    armazem.fechar()
+
+    diretorio = tmp_path / "no.jsonl.auditoria"
+    (diretorio / "2024-01-01.jsonl").write_bytes(b"")                 # criado e não escrito
+    with open(diretorio / "2024-03-02.jsonl", "ab") as f:
+        f.write(b'{"acao":"no_recuperado","seq":40,"hash_an')          # escrita interrompida
+
+    reaberto = criar_armazem("arquivo", caminho)
+    log = reaberto.ler_auditoria()
+    assert [r["seq"] for r in log] == list(range(40)) and verificar_auditoria(log) is None
+
+    reaberto.registrar_auditoria({"acao": "no_recuperado", "detalhes": "depois", "timestamp": "2024-03-02T23:00:00"})
+    assert reaberto.consultar_auditoria("2024-03-02")[-1]["detalhes"] == "depois"
+    assert verificar_auditoria(reaberto.ler_auditoria()) is None
@@ -0,0 +1,265 @@
+# ============================================================
+# Codificação canônica dos eventos e validação dos blocos
+# ============================================================
+
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import smartlog_blockchain
+from smartlog_blockchain import (
+    CacheDigest,
+    _dividir_faixas,
+    _json_ordenado,
+    aplicar_consenso,
+    assinar_bloco,
+    bloco_da_proposta,
+    cache_digest,
+    chaves_publicas_de,
+    criar_blockchain_inicial,
+    criar_nos,
+    gerar_prova_evento,
+    localizar_bloco_invalido,
+    localizar_bloco_sem_quorum,
+    propor_bloco,
+    recalcular_hash_bloco,
+    simular_chaves_privadas,
+    validar_blockchain,
+    verificar_prova_evento,
+    votar_proposta,
+)
+from smartlog_merkle import hash_folha
+
+LOTE = [
+    {"risco": "Alto", "id_entrega": 7, "etapa": "Em rota", "obs": "São Paulo, \"centro\""},
+    {"id_entrega": 8, "etapa": "Entregue", "extra": {"b": 1, "a": [1, 2]}},
+]
+
+
+def _confirmar(lote):
+    nos = criar_nos(criar_blockchain_inicial(), 2)
+    proposta = votar_proposta(propor_bloco("Node_A", lote, nos["Node_A"].ultimo_hash), nos, simular_chaves_privadas(nos))
+    assert aplicar_consenso(proposta, nos, quorum=2)[0]
+    return nos["Node_A"]
+
+
+def test_bloco_grava_o_json_canonico_e_valida():
+    ledger = _confirmar(LOTE)
+    bloco = ledger.ultimo()
+
+    assert bloco["eventos"] == json.dumps(LOTE, ensure_ascii=False, sort_keys=True)
+    assert json.loads(bloco["eventos"]) == LOTE
+    assert localizar_bloco_invalido(ledger, incremental=False) is None
+
+
+def test_bloco_gravado_sem_ordenar_chaves_continua_valido():
+    bloco = _confirmar(LOTE).ultimo()
+    legado = json.dumps(LOTE, ensure_ascii=False)   # formato anterior
+    args = (bloco["hash_anterior"], bloco["tx_id"], bloco["merkle_raiz"])
+
+    assert recalcular_hash_bloco(legado, *args) == bloco["hash_atual"]
+    assert recalcular_hash_bloco(legado.replace("Entregue", "Extraviado"), *args) is None
+    assert recalcular_hash_bloco(bloco["eventos"].replace("Alto", "Baixo"), *args) is None
+    assert recalcular_hash_bloco(bloco["eventos"] + " ", *args) == bloco["hash_atual"]
+
+
+def test_prova_de_inclusao_exige_raiz_ou_cabecalho_confiavel():
+    ledger = _confirmar(LOTE)
+    bloco = ledger.ultimo()
+    prova = gerar_prova_evento(ledger, len(ledger) - 1, 8)
+    cabecalho = {"hash_bloco": bloco["hash_atual"], "hash_anterior": bloco["hash_anterior"], "tx_id": bloco["tx_id"]}
+
+    assert verificar_prova_evento(prova, bloco["merkle_raiz"])
+    assert verificar_prova_evento(prova, **cabecalho)
+
+    # Prova forjada e coerente consigo mesma: raiz própria, sem vínculo com o bloco
+    evento = {"id_entrega": 8, "etapa": "Extraviado"}
+    forjada = dict(prova, evento=evento, prova=[], merkle_raiz=hash_folha(_json_ordenado(evento)))
+    assert not verificar_prova_evento(forjada, bloco["merkle_raiz"])
+    assert not verificar_prova_evento(forjada, **cabecalho)
+    with pytest.raises(ValueError):
+        verificar_prova_evento(forjada)
+
+
+def test_cache_de_digest_reaproveita_e_ainda_detecta_adulteracao():
+    ledger = _confirmar(LOTE)
+    for i in range(5):
+        ledger.append(bloco_da_proposta(propor_bloco("Node_A", [{"id_entrega": i}], ledger.ultimo_hash), len(ledger)))
+    alvo = len(ledger) - 3
+
+    cache_digest.limpar()
+    localizar_bloco_invalido(ledger, incremental=False)
+    assert localizar_bloco_invalido(ledger, incremental=False) is None
+    assert cache_digest.acertos >= 6
+
+    ledger.substituir(alvo, eventos=ledger.bloco(alvo)["eventos"].replace("id_entrega", "id"))
+    assert localizar_bloco_invalido(ledger, incremental=False) == alvo
+
+
+def _cadeia_em_faixas(monkeypatch, total=41, workers=4):
+    """Cadeia de `total` blocos dividida em `workers` faixas (limiar por worker reduzido)."""
+    monkeypatch.setattr(smartlog_blockchain, "MIN_BLOCOS_POR_WORKER", 10)
+    ledger = _confirmar(LOTE)
+    while len(ledger) < total:
+        ledger.append(bloco_da_proposta(propor_bloco("Node_A", [{"id_entrega": len(ledger)}], ledger.ultimo_hash), len(ledger)))
+
+    faixas = _dividir_faixas(1, len(ledger), workers)
+    assert len(faixas) == workers
+    return ledger, faixas
+
+
+def _espiar_verificacao(monkeypatch):
+    """Registra as faixas [inicio, fim) efetivamente verificadas."""
+    faixas = []
+    original = smartlog_blockchain._verificar_intervalo
+
+    def espiao(inicio, hash_limite, eventos, *resto):
+        faixas.append((inicio, inicio + len(eventos)))
+        return original(inicio, hash_limite, eventos, *resto)
+
+    monkeypatch.setattr(smartlog_blockchain, "_verificar_intervalo", espiao)
+    return faixas
+
+
+def _crescer(ledger, total, origem="Node_A"):
+    while len(ledger) < total:
+        ledger.append(bloco_da_proposta(propor_bloco(origem, [{"id_entrega": len(ledger)}], ledger.ultimo_hash), len(ledger)))
+    return ledger
+
+
+def test_validacao_incremental_so_confere_o_sufixo_novo(monkeypatch):
+    ledger = _crescer(_confirmar(LOTE), 20)
+    faixas = _espiar_verificacao(monkeypatch)
+
+    assert validar_blockchain(ledger) and faixas == [(1, 20)]
+    assert validar_blockchain(ledger) and faixas == [(1, 20)]      # nada novo: nada conferido
+
+    _crescer(ledger, 23)
+    assert validar_blockchain(ledger) and faixas[-1] == (20, 23)
+
+    # Cópias herdam o checkpoint; incremental=False ignora-o
+    assert validar_blockchain(ledger.copy()) and len(faixas) == 2
+    assert validar_blockchain(ledger, incremental=False) and faixas[-1] == (1, 23)
+
+
+def test_validacao_volta_a_ser_completa_quando_o_prefixo_muda(monkeypatch):
+    ledger = _crescer(_confirmar(LOTE), 20)
+    faixas = _espiar_verificacao(monkeypatch)
+    assert validar_blockchain(ledger)
+
+    # substituir abaixo do checkpoint
+    original = ledger.bloco(5)["tx_id"]
+    ledger.substituir(5, tx_id="adulterado")
+    assert not validar_blockchain(ledger) and faixas[-1] == (1, 20)
+    # A falha deixou [0, 5) como verificado: o conserto recomeça da altura 5
+    ledger.substituir(5, tx_id=original)
+    assert validar_blockchain(ledger) and faixas[-1] == (5, 20)
+
+    # Topo verificado trocado por fora (sem passar por substituir)
+    ledger._colunas["hash_atual"][19] = "outro"
+    assert not validar_blockchain(ledger) and faixas[-1] == (1, 20)
+
+
+def test_validacao_apos_ressincronizar_recomeca_da_altura_comum(monkeypatch):
+    base = _crescer(_confirmar(LOTE), 10)
+    fonte, divergente = _crescer(base.copy(), 25), _crescer(base.copy(), 18, origem="Node_X")
+    faixas = _espiar_verificacao(monkeypatch)
+    assert validar_blockchain(divergente) and faixas == [(1, 18)]
+
+    # Fonte nunca verificada: do trecho local só vale o prefixo comum
+    divergente.ressincronizar(fonte, 10)
+    assert validar_blockchain(divergente) and faixas[-1] == (10, 25)
+
+    # Nó que nunca verificou nada: passada completa
+    nunca = _crescer(base.copy(), 12, origem="Node_X")
+    nunca.ressincronizar(_crescer(base.copy(), 25), 10)
+    assert validar_blockchain(nunca) and faixas[-1] == (1, 25)
+
+
+def _contar_pools(monkeypatch):
+    pools = []
+
+    class Pool(ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            pools.append(self)
+
+    monkeypatch.setattr(smartlog_blockchain, "ProcessPoolExecutor", Pool)
+    return pools
+
+
+def test_validacao_paralela_acha_adulteracao_numa_faixa_posterior(monkeypatch):
+    ledger, faixas = _cadeia_em_faixas(monkeypatch)
+    pools = _contar_pools(monkeypatch)
+    assert localizar_bloco_invalido(ledger, incremental=False, workers=4) is None
+
+    # Dois blocos adulterados em faixas diferentes: vale o primeiro
+    alvo = faixas[2][0] + 3
+    ledger.substituir(alvo, eventos=ledger.bloco(alvo)["eventos"].replace("id_entrega", "id"))
+    ledger.substituir(faixas[3][0] + 1, tx_id="outro")
+    assert localizar_bloco_invalido(ledger, incremental=False, workers=4) == alvo
+    assert len(pools) == 2
+
+
+def test_validacao_paralela_confere_o_encadeamento_na_fronteira(monkeypatch):
+    ledger, faixas = _cadeia_em_faixas(monkeypatch)
+    pools = _contar_pools(monkeypatch)
+
+    # O primeiro bloco da 2ª faixa é trocado por um bloco íntegro sobre
+    # outro pai: só o encadeamento com o fim da faixa anterior o denuncia
+    fronteira = faixas[1][0]
+    rival = bloco_da_proposta(propor_bloco("Node_X", [{"id_entrega": -1}], "outro_pai"), fronteira)
+    assert recalcular_hash_bloco(rival["eventos"], "outro_pai", rival["tx_id"], rival["merkle_raiz"]) == rival["hash_atual"]
+    ledger.substituir(fronteira, **{c: rival[c] for c in ("eventos", "hash_anterior", "hash_atual", "tx_id", "merkle_raiz")})
+
+    assert localizar_bloco_invalido(ledger, incremental=False, workers=4) == fronteira
+    assert localizar_bloco_invalido(ledger, incremental=False, workers=1) == fronteira
+    assert len(pools) == 1
+
+
+def test_cache_de_digest_limitado_descarta_o_menos_usado():
+    cache = CacheDigest(capacidade=2)
+    cache.guardar("a", "1")
+    cache.guardar("b", "2")
+    assert cache.obter("a") == "1"
+    cache.guardar("c", "3")
+
+    assert cache.obter("b") is None and cache.obter("c") == "3"
+    assert cache.estatisticas() | {"taxa_acerto": None} == {
+        "tamanho": 2, "capacidade": 2, "acertos": 2, "falhas": 1, "descartes": 1, "taxa_acerto": None,
+    }
+
+
+def test_consenso_so_conta_assinaturas_ed25519_validas():
+    nos = criar_nos(criar_blockchain_inicial(), 3)
+    chaves = simular_chaves_privadas(nos)
+    proposta = votar_proposta(propor_bloco("Node_A", LOTE, nos["Node_A"].ultimo_hash), nos, chaves)
+
+    # Node_B assina com a chave errada, Node_C manda lixo: só Node_A confere
+    proposta["assinaturas"]["Node_B"] = assinar_bloco("chave_falsa", proposta["hash_bloco"])
+    proposta["assinaturas"]["Node_C"] = "ab" * 64
+    assert aplicar_consenso(dict(proposta), dict(nos), quorum=2) == (False, None)
+
+    proposta["assinaturas"]["Node_B"] = assinar_bloco(chaves["Node_B"], proposta["hash_bloco"])
+    assert aplicar_consenso(proposta, nos, quorum=2)[0]
+    assert set(nos["Node_A"].ultimo()["assinaturas"]) == {"Node_A", "Node_B"}
+
+
+def test_auditoria_de_assinaturas_da_cadeia_detecta_adulteracao():
+    nos = criar_nos(criar_blockchain_inicial(), 3)
+    chaves = simular_chaves_privadas(nos)
+    publicas = chaves_publicas_de(chaves)
+    for i in range(4):
+        proposta = propor_bloco("Node_A", [{"id_entrega": i}], nos["Node_A"].ultimo_hash)
+        assert aplicar_consenso(votar_proposta(proposta, nos, chaves), nos, 3, publicas)[0]
+
+    ledger = nos["Node_A"]
+    assert localizar_bloco_sem_quorum(ledger, publicas, quorum=3) is None
+
+    alvo = len(ledger) - 2
+    assinaturas = dict(ledger.bloco(alvo)["assinaturas"])
+    assinaturas["Node_C"] = f"{int(assinaturas['Node_C'][:2], 16) ^ 1:02x}" + assinaturas["Node_C"][2:]
+    ledger.substituir(alvo, assinaturas=assinaturas)
+    assert localizar_bloco_sem_quorum(ledger, publicas, quorum=3) == alvo
+    assert localizar_bloco_sem_quorum(ledger, publicas, quorum=2) is None
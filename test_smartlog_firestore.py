@@ -0,0 +1,384 @@
+# ============================================================
+# Persistência em chunks no Firestore — contra um Firestore em memória
+# ============================================================
+
+import copy
+import json
+import random
+
+import pytest
+
+from smartlog_armazenamento import salvar_ledger
+from smartlog_auditoria import verificar_auditoria
+from smartlog_blockchain import bloco_da_proposta, propor_bloco
+from smartlog_firestore import (
+    BYTES_POR_CHUNK,
+    ArmazemFirestore,
+    carregar_cadeia,
+    ler_metadados,
+    limpar_cadeia,
+    salvar_cadeia,
+)
+from smartlog_ledger import Ledger
+
+LIMITE_DOCUMENTO = 1_048_576  # 1 MiB, como no Firestore
+
+
+# ------------------------------------------------------------
+# Firestore em memória (só o que o módulo usa)
+# ------------------------------------------------------------
+
+class _Snapshot:
+    def __init__(self, id, dados):
+        self.id = id
+        self.exists = dados is not None
+        self._dados = dados
+
+    def to_dict(self):
+        return copy.deepcopy(self._dados)
+
+
+class _Documento:
+    def __init__(self, banco, caminho):
+        self._banco = banco
+        self.path = caminho
+        self.id = caminho.rsplit("/", 1)[-1]
+
+    def get(self):
+        self._banco.leituras += 1
+        return _Snapshot(self.id, self._banco.docs.get(self.path))
+
+    def set(self, dados):
+        self._banco.gravar(self.path, dados)
+
+    def delete(self):
+        self._banco.docs.pop(self.path, None)
+
+    def collection(self, nome):
+        return _Colecao(self._banco, f"{self.path}/{nome}")
+
+
+class _Colecao:
+    def __init__(self, banco, caminho):
+        self._banco = banco
+        self.path = caminho
+
+    def document(self, id=None):
+        if id is None:
+            self._banco.contador += 1
+            id = f"auto{self._banco.contador:08d}"
+        return _Documento(self._banco, f"{self.path}/{id}")
+
+    def add(self, dados):
+        ref = self.document()
+        ref.set(dados)
+        return None, ref
+
+    def where(self, campo, operador, valor):
+        return _Consulta(self).where(campo, operador, valor)
+
+    def order_by(self, campo, direction="ASCENDING"):
+        return _Consulta(self).order_by(campo, direction)
+
+    def list_documents(self):
+        prefixo = self.path + "/"
+        return [
+            _Documento(self._banco, p) for p in sorted(self._banco.docs)
+            if p.startswith(prefixo) and "/" not in p[len(prefixo):]
+        ]
+
+
+OPERADORES = {
+    "==": lambda a, b: a == b,
+    ">=": lambda a, b: a is not None and a >= b,
+    "<": lambda a, b: a is not None and a < b,
+}
+
+
+class _Consulta:
+    def __init__(self, colecao, filtros=(), ordem=None, limite=None):
+        self._colecao, self._filtros, self._ordem, self._limite = colecao, filtros, ordem, limite
+
+    def where(self, campo, operador, valor):
+        return _Consulta(self._colecao, self._filtros + ((campo, operador, valor),), self._ordem, self._limite)
+
+    def order_by(self, campo, direction="ASCENDING"):
+        return _Consulta(self._colecao, self._filtros, (campo, direction == "DESCENDING"), self._limite)
+
+    def limit(self, limite):
+        return _Consulta(self._colecao, self._filtros, self._ordem, limite)
+
+    def stream(self):
+        docs = [ref.get() for ref in self._colecao.list_documents()]
+        docs = [d for d in docs if all(OPERADORES[op](d.to_dict().get(c), v) for c, op, v in self._filtros)]
+        if self._ordem:
+            campo, decrescente = self._ordem
+            # Como no Firestore, documentos sem o campo ordenado ficam de fora
+            docs = [d for d in docs if campo in d.to_dict()]
+            docs.sort(key=lambda d: d.to_dict()[campo], reverse=decrescente)
+        return iter(docs[:self._limite])
+
+
+class _Lote:
+    def __init__(self, banco):
+        self._banco = banco
+        self._operacoes = []
+
+    def set(self, ref, dados):
+        self._operacoes.append((ref, copy.deepcopy(dados)))
+
+    def create(self, ref, dados):
+        assert ref.path not in self._banco.docs, f"{ref.path} já existe"
+        self.set(ref, dados)
+
+    def delete(self, ref):
+        self._operacoes.append((ref, None))
+
+    def commit(self):
+        assert len(self._operacoes) <= 500, "WriteBatch acima de 500 operações"
+        for ref, dados in self._operacoes:
+            ref.delete() if dados is None else ref.set(dados)
+        self._banco.lotes += 1
+
+
+def _tamanho_valor(valor):
+    # Regras de tamanho do Firestore: string/nome de campo = UTF-8 + 1, número = 8, bool/nulo = 1
+    if isinstance(valor, str):
+        return len(valor.encode()) + 1
+    if valor is None or isinstance(valor, bool):
+        return 1
+    if isinstance(valor, (int, float)):
+        return 8
+    if isinstance(valor, dict):
+        return sum(len(k.encode()) + 1 + _tamanho_valor(v) for k, v in valor.items())
+    return sum(_tamanho_valor(v) for v in valor)
+
+
+def _tamanho_documento(caminho, dados):
+    nome = sum(len(parte.encode()) + 1 for parte in caminho.split("/")) + 16
+    return nome + _tamanho_valor(dados) + 32
+
+
+class FirestoreMemoria:
+    def __init__(self):
+        self.docs = {}
+        self.contador = 0
+        self.escritas = 0
+        self.leituras = 0
+        self.lotes = 0
+
+    def gravar(self, caminho, dados):
+        json.dumps(dados)  # só tipos que o Firestore aceita
+        tamanho = _tamanho_documento(caminho, dados)
+        if tamanho > LIMITE_DOCUMENTO:
+            raise ValueError(f"Documento {caminho} excede 1 MiB ({tamanho} bytes)")
+        self.escritas += 1
+        self.docs[caminho] = copy.deepcopy(dados)
+
+    def collection(self, nome):
+        return _Colecao(self, nome)
+
+    def batch(self):
+        return _Lote(self)
+
+    def get_all(self, refs):
+        # Como no Firestore, a ordem da resposta não é garantida
+        refs = list(refs)
+        random.shuffle(refs)
+        for ref in refs:
+            yield ref.get()
+
+
+# ------------------------------------------------------------
+# Auxiliares
+# ------------------------------------------------------------
+
+def _cadeia(total, carga=0, inicio=0, hash_anterior="0" * 64):
+    blocos = []
+    for i in range(inicio, inicio + total):
+        hash_atual = f"{i:064x}"
+        blocos.append({
+            "bloco_id": i,
+            "eventos": [{"id_entrega": i, "etapa": "Em rota", "obs": "x" * carga}],
+            "hash_anterior": hash_anterior,
+            "hash_atual": hash_atual,
+            "tx_id": f"tx-{i}",
+            "timestamp": "2024-01-01T00:00:00Z",
+        })
+        hash_anterior = hash_atual
+    return blocos
+
+
+@pytest.fixture
+def db():
+    return FirestoreMemoria()
+
+
+# ------------------------------------------------------------
+# Testes
+# ------------------------------------------------------------
+
+def test_salva_em_chunks_e_carrega_igual(db):
+    ledger = Ledger(_cadeia(1000))
+    r = salvar_cadeia(db, ledger)
+
+    assert (r["documentos"], r["blocos_enviados"]) == (5, 1000)
+    assert ler_metadados(db)["altura"] == 1000
+    assert carregar_cadeia(db, chunks_por_pagina=2) == ledger.registros()
+
+
+def test_save_incremental_envia_so_o_que_falta(db):
+    blocos = _cadeia(1050)
+    ledger = Ledger(blocos[:1000])
+    salvar_cadeia(db, ledger)
+
+    escritas = db.escritas
+    ledger.extend(blocos[1000:])
+    r = salvar_cadeia(db, ledger)
+    assert (r["documentos"], r["blocos_enviados"]) == (1, 50)
+    assert db.escritas - escritas == 2  # um chunk + metadados
+
+    # Nada novo: nenhum documento é regravado
+    assert salvar_cadeia(db, ledger)["documentos"] == 0
+    assert carregar_cadeia(db) == blocos
+
+
+def test_cadeia_maior_que_1mib_nao_estoura_o_documento(db):
+    ledger = Ledger(_cadeia(3000, carga=400))
+    r = salvar_cadeia(db, ledger, chunks_por_lote=4)
+
+    assert r["lotes"] == 4 and r["documentos"] == 15
+    assert carregar_cadeia(db) == ledger.registros()
+
+
+def _bloco_de_carga(altura, eventos, hash_anterior):
+    # Bloco como o pipeline da mempool produz (eventos em JSON canônico)
+    lote = [{"id_entrega": f"C{altura}-{i}", "etapa": "Em rota", "risco": "Baixo"} for i in range(eventos)]
+    return bloco_da_proposta(propor_bloco("Node_A", lote, hash_anterior), altura)
+
+
+def test_blocos_grandes_fecham_o_chunk_pelo_tamanho(db):
+    blocos, topo = [], "GENESIS"
+    for altura, eventos in enumerate([100] * 60 + [5000] * 4 + [100] * 20):
+        blocos.append(_bloco_de_carga(altura, eventos, topo))
+        topo = blocos[-1]["hash_atual"]
+
+    salvar_cadeia(db, Ledger(blocos[:70]))
+    armazem = ArmazemFirestore(db=db)
+    for bloco in blocos[70:]:
+        armazem.anexar_se_novo(bloco)
+
+    # Fronteiras irregulares, gravadas nos metadados; nenhum documento passa do teto
+    meta = ler_metadados(db)
+    assert meta["altura"] == 84 and meta["chunks"][0] == 0 and len(meta["chunks"]) >= 3
+    assert any(b - a not in (0, 200) for a, b in zip(meta["chunks"], meta["chunks"][1:]))
+    for caminho, dados in db.docs.items():
+        assert _tamanho_documento(caminho, dados) <= BYTES_POR_CHUNK + 1000
+
+    assert carregar_cadeia(db) == blocos
+    reaberto = ArmazemFirestore(db=db)
+    assert reaberto.ler_intervalo(55, 75) == blocos[55:75]
+    assert reaberto.status() == (84, topo)
+
+    # Um bloco que sozinho não cabe num documento é recusado antes de gravar
+    gigante = dict(_bloco_de_carga(84, 1, topo), eventos="x" * (BYTES_POR_CHUNK + 1))
+    with pytest.raises(ValueError, match="altura 84"):
+        reaberto.anexar_se_novo(gigante)
+    assert carregar_cadeia(db) == blocos
+
+
+def test_metadados_de_passo_fixo_continuam_legiveis(db):
+    blocos = _cadeia(450)
+    salvar_cadeia(db, Ledger(blocos[:430]))
+    meta = ler_metadados(db)
+    del meta["chunks"]
+    meta["blocos_por_chunk"] = 200      # layout anterior: fronteiras derivadas do passo
+    db.collection("blockchains").document("rede_principal").set(meta)
+
+    assert carregar_cadeia(db) == blocos[:430]
+    armazem = ArmazemFirestore(db=db)
+    armazem.anexar_varios_se_novos(blocos[430:])
+    assert ler_metadados(db)["chunks"] == [0, 200, 400]
+    assert carregar_cadeia(db) == blocos
+
+
+def test_prefixo_divergente_reenvia_e_remove_sobras(db):
+    salvar_cadeia(db, Ledger(_cadeia(900)))
+
+    # Cadeia local refeita e menor: reenvio total, chunks além do topo somem
+    nova = Ledger(_cadeia(450, hash_anterior="f" * 64))
+    r = salvar_cadeia(db, nova)
+
+    assert r["blocos_enviados"] == 450 and r["documentos_removidos"] == 2
+    assert len(db.collection("blockchains").document("rede_principal").collection("blocos").list_documents()) == 3
+    assert carregar_cadeia(db) == nova.registros()
+
+
+def test_documento_no_formato_antigo_ainda_carrega_e_e_migrado(db):
+    antigos = _cadeia(5)
+    db.collection("blockchains").document("rede_principal").set({"dados": antigos})
+    assert carregar_cadeia(db) == antigos
+
+    salvar_cadeia(db, Ledger(antigos))
+    assert "dados" not in ler_metadados(db)
+    assert carregar_cadeia(db) == antigos
+
+
+def test_limpar_remove_chunks_e_metadados(db):
+    salvar_cadeia(db, Ledger(_cadeia(500)))
+    assert limpar_cadeia(db) == 3
+    assert carregar_cadeia(db) is None and db.docs == {}
+
+
+def test_armazem_firestore_anexa_so_o_chunk_final(db):
+    blocos = _cadeia(450)
+    armazem = ArmazemFirestore(db=db, blocos_por_chunk=200)
+    assert armazem.anexar_varios_se_novos(blocos[:430]) == ([True] * 430, 430)
+
+    # Reaberto: topo e chunk final vêm dos metadados; anexar regrava só esse chunk
+    armazem = ArmazemFirestore(db=db, blocos_por_chunk=200)
+    escritas = db.escritas
+    assert armazem.anexar_se_novo(blocos[430], topo_esperado=blocos[428]["hash_atual"]) == (False, 430)
+    assert armazem.anexar_se_novo(blocos[430], topo_esperado=blocos[429]["hash_atual"]) == (True, 431)
+    assert armazem.anexar_se_novo(blocos[430]) == (False, 431)
+    assert db.escritas - escritas == 2
+
+    armazem.anexar_varios_se_novos(blocos[431:])
+    assert armazem.status() == (450, blocos[-1]["hash_atual"])
+    assert armazem.ler_intervalo(190, 410) == blocos[190:410]
+    assert carregar_cadeia(db) == blocos
+
+    # Log antigo, sem seq: fora da cadeia
+    db.collection("auditoria_logs").add({"acao": "legado", "timestamp": "2023-12-31T00:00:00"})
+
+    armazem.registrar_auditoria({"acao": "a0", "timestamp": "2024-01-01T00:00:00"})
+    armazem = ArmazemFirestore(db=db, blocos_por_chunk=200)
+    armazem.registrar_auditoria_varios(
+        [{"acao": f"a{i % 2}", "timestamp": f"2024-01-01T00:00:0{i}"} for i in (1, 2, 3)]
+    )
+    assert [r["acao"] for r in armazem.ler_auditoria(2)] == ["a0", "a1"]
+    assert verificar_auditoria(armazem.ler_auditoria()) is None
+    assert [r["seq"] for r in armazem.consultar_auditoria("2024-01-01T00:00:01", acao="a1")] == [1, 3]
+
+
+def test_auditoria_nao_le_nem_migra_a_cadeia(db):
+    antigos = _cadeia(5)
+    db.collection("blockchains").document("rede_principal").set({"dados": antigos})
+    leituras = db.leituras
+
+    armazem = ArmazemFirestore(db=db)
+    armazem.registrar_auditoria({"acao": "a0", "timestamp": "2024-01-01T00:00:00"})
+    assert db.leituras == leituras
+    assert ler_metadados(db) == {"dados": antigos}   # formato antigo intocado
+
+    # Primeira operação sobre blocos: migra e segue normalmente
+    assert armazem.status() == (5, antigos[-1]["hash_atual"])
+    assert "dados" not in ler_metadados(db)
+
+    # salvar_ledger / limpar pelo armazenamento
+    r = salvar_ledger(armazem, Ledger(_cadeia(8, inicio=100)))
+    assert (r["altura"], r["reenvio_total"]) == (8, True)
+    assert carregar_cadeia(db) == _cadeia(8, inicio=100)
+    armazem.limpar()
+    assert armazem.status() == (0, None) and carregar_cadeia(db) is None
+    assert [r["acao"] for r in armazem.ler_auditoria()] == ["a0"]
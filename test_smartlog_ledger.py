@@ -0,0 +1,218 @@
+# ============================================================
+# Ledger colunar: copy-on-write, recuperação e checkpoints
+# ============================================================
+
+from smartlog_blockchain import (
+    buscar_entrega,
+    buscar_por_hash,
+    buscar_por_risco,
+    buscar_por_tx,
+    criar_nos,
+    detectar_divergencias,
+    detectar_no_corrompido,
+    primeira_divergencia,
+    recuperar_nos_divergentes,
+    validar_consenso,
+)
+from smartlog_ledger import INTERVALO_CHECKPOINT, Ledger
+
+
+def _bloco(i, marca=""):
+    return {
+        "bloco_id": i,
+        "eventos": [{"id_entrega": i, "risco": "Alto" if i % 2 else "Baixo", "obs": marca}],
+        "hash_anterior": f"h{i - 1}{marca}",
+        "hash_atual": f"h{i}{marca}",
+        "tx_id": f"tx{i}{marca}",
+        "timestamp": "2024-01-01T00:00:00",
+    }
+
+
+def _ledger(total, marca=""):
+    return Ledger([_bloco(i, marca) for i in range(total)])
+
+
+# ------------------------------------------------------------
+# Copy-on-write
+# ------------------------------------------------------------
+
+def test_copias_adotam_blocos_identicos_e_se_separam_ao_divergir():
+    a = _ledger(10)
+    b, c = a.copy(), a.copy()
+
+    # O mesmo bloco gravado por todos: b e c apenas adotam o que a gravou
+    for ledger in (a, b, c):
+        ledger.append(_bloco(10))
+    assert a.compartilha_com(b) and a.compartilha_com(c)
+    assert len(a) == len(b) == len(c) == 11
+
+    # Bloco divergente em c: só c passa a ter armazenamento próprio
+    a.append(_bloco(11))
+    c.append(_bloco(11, "x"))
+    assert not c.compartilha_com(a)
+    assert a.ultimo_hash == "h11" and c.ultimo_hash == "h11x"
+
+    # b, ainda em 11 blocos, adota o bloco que a gravou depois
+    b.append(_bloco(11))
+    assert b.compartilha_com(a) and b.bloco(11) == a.bloco(11)
+
+
+def test_substituir_nao_vaza_para_as_outras_copias():
+    a = _ledger(5)
+    b = a.copy()
+
+    b.substituir(2, eventos=[{"id_entrega": 99}])
+    assert not b.compartilha_com(a)
+    assert a.bloco(2)["eventos"] == _bloco(2)["eventos"]
+    assert b.bloco(2)["eventos"] == [{"id_entrega": 99}]
+
+    # Índice de a não enxerga a adulteração de b
+    assert a.indice().por_entrega.get("99") is None
+    assert b.indice().por_entrega["99"] == [2]
+
+
+def test_append_em_colunas_compartilhadas_respeita_o_tamanho_de_cada_copia():
+    a = _ledger(5)
+    b = a.copy()
+
+    # b cresce no armazenamento comum; a continua vendo só os seus 5 blocos
+    b.extend([_bloco(5), _bloco(6)])
+    assert b.compartilha_com(a) and (len(a), len(b)) == (5, 7)
+    assert a.ultimo_hash == "h4" and a.registros() == _ledger(5).registros()
+    assert len(a.to_dataframe()) == 5 and a.coluna("hash_atual", 3) == ["h3", "h4"]
+
+    # a grava outro bloco na altura 5: separa-se sem mexer no que b gravou
+    a.append(_bloco(5, "x"))
+    assert not a.compartilha_com(b)
+    assert [r["hash_atual"] for r in a.registros(4)] == ["h4", "h5x"]
+    assert [r["hash_atual"] for r in b.registros(4)] == ["h4", "h5", "h6"]
+
+    # Cópia feita depois da separação não enxerga o armazenamento antigo
+    c = a.copy()
+    c.append(_bloco(6, "x"))
+    assert c.compartilha_com(a) and len(a) == 6 and b.bloco(6) == _bloco(6)
+
+
+def test_dataframe_em_cache_ate_a_proxima_escrita():
+    a = _ledger(5)
+    b = a.copy()
+    df = a.to_dataframe()
+    assert a.to_dataframe() is df
+    assert a.to_dataframe(0, 3) is not df and len(a.to_dataframe(0, 3)) == 3
+
+    a.append(_bloco(5))
+    novo = a.to_dataframe()
+    assert novo is not df and len(df) == 5 and list(novo["hash_atual"])[-1] == "h5"
+
+    # Adotar o bloco que a já gravou também invalida o cache de b
+    df_b = b.to_dataframe()
+    b.append(_bloco(5))
+    assert b.compartilha_com(a) and b.to_dataframe() is not df_b and len(b.to_dataframe()) == 6
+
+    a.anexar_colunas({"bloco_id": [6], "hash_atual": ["h6"]})
+    assert len(a.to_dataframe()) == 7
+
+    a.substituir(0, tx_id="adulterado")
+    assert a.to_dataframe()["tx_id"][0] == "adulterado" and b.to_dataframe()["tx_id"][0] == "tx0"
+
+
+# ------------------------------------------------------------
+# Recuperação a partir do ponto de bifurcação
+# ------------------------------------------------------------
+
+def test_recuperacao_deixa_todos_os_nos_no_mesmo_armazenamento():
+    nos = criar_nos(_ledger(20), 3)
+    nos["Node_B"].substituir(7, eventos=[{"id_entrega": 99}])   # adulteração antiga
+    nos["Node_C"].append(_bloco(20, "x"))                       # bloco a mais, divergente
+
+    relatorio = recuperar_nos_divergentes(nos, "h19")
+
+    assert relatorio == {
+        "Node_B": {"altura_comum": 7, "reescritos": 13, "descartados": 13},
+        "Node_C": {"altura_comum": 20, "reescritos": 0, "descartados": 1},
+    }
+    assert all(nos[n].compartilha_com(nos["Node_A"]) for n in nos)
+    assert validar_consenso(nos) and detectar_no_corrompido(nos) == []
+
+
+def test_indices_consultados_apos_ressincronizar():
+    nos = {"Node_A": _ledger(12), "Node_B": _ledger(12), "Node_C": _ledger(8)}
+    nos["Node_C"].extend(_bloco(i, "x") for i in range(8, 14))
+
+    # Índices já montados antes da recuperação
+    assert buscar_por_hash(nos["Node_C"], "h13x") == 13
+    assert buscar_entrega(nos["Node_C"], 9) == [9]
+
+    recuperar_nos_divergentes(nos, "h11")
+    c = nos["Node_C"]
+
+    assert buscar_por_hash(c, "h13x") is None and buscar_por_tx(c, "tx9x") is None
+    assert buscar_por_hash(c, "h11") == 11 and buscar_por_tx(c, "tx10") == 10
+    assert buscar_entrega(c, 9) == [9] and buscar_entrega(c, 13) == []
+    assert buscar_por_risco(c, "Alto") == [1, 3, 5, 7, 9, 11]
+
+    # Appends seguintes continuam indexados
+    c.append(_bloco(12))
+    assert buscar_por_hash(c, "h12") == 12 and buscar_entrega(c, 12) == [12]
+
+
+# ------------------------------------------------------------
+# Divergência por checkpoints de conteúdo
+# ------------------------------------------------------------
+
+def test_bloco_antigo_adulterado_com_topo_intacto_e_detectado():
+    nos = criar_nos(_ledger(30), 3)
+    nos["Node_B"].substituir(4, eventos=[{"id_entrega": 4, "risco": "Baixo", "obs": "editado"}])
+
+    assert nos["Node_B"].ultimo_hash == nos["Node_A"].ultimo_hash
+    assert not validar_consenso(nos)
+    assert detectar_no_corrompido(nos) == ["Node_B"]
+    assert detectar_divergencias(nos) == {"Node_A": None, "Node_B": 4, "Node_C": None}
+
+
+def test_bifurcacao_localizada_alem_de_um_checkpoint():
+    total = 2 * INTERVALO_CHECKPOINT + 300
+    a = _ledger(total)
+    b = Ledger([_bloco(i) for i in range(total)])   # armazenamento próprio: compara pelos checkpoints
+    assert primeira_divergencia(a, b) is None
+
+    for altura in (INTERVALO_CHECKPOINT - 1, INTERVALO_CHECKPOINT, INTERVALO_CHECKPOINT + 1, total - 1):
+        c = Ledger([_bloco(i) if i != altura else _bloco(i, "x") for i in range(total)])
+        assert primeira_divergencia(a, c) == altura
+
+    # Prefixo comum e um nó mais longo: diverge no fim do mais curto
+    assert primeira_divergencia(a, _ledger(total - 5)) == total - 5
+
+
+def test_substituir_invalida_checkpoints_ja_calculados():
+    total = 2 * INTERVALO_CHECKPOINT + 10
+    a, b = _ledger(total), _ledger(total)
+    assert a.checkpoints() == b.checkpoints() and len(a.checkpoints()) == 2
+    antes = b.acumulado_em(total)
+
+    b.substituir(100, tx_id="adulterado")
+
+    assert b.checkpoints()[0] != a.checkpoints()[0]
+    assert b.acumulado_em(total) != antes
+    assert primeira_divergencia(a, b) == 100
+
+
+def test_acumulado_em_depende_so_do_prefixo():
+    total = INTERVALO_CHECKPOINT + 20
+    a, b = _ledger(total), _ledger(total)
+    alturas = (0, 1, INTERVALO_CHECKPOINT - 1, INTERVALO_CHECKPOINT, INTERVALO_CHECKPOINT + 1, total)
+    assert all(a.acumulado_em(h) == b.acumulado_em(h) for h in alturas)
+    assert a.acumulado_em(0) != a.acumulado_em(1) != a.acumulado_em(2)
+
+    # Diverge a partir da altura 10: prefixos menores continuam iguais
+    c = Ledger([_bloco(i) if i != 10 else _bloco(i, "x") for i in range(total)])
+    assert c.acumulado_em(10) == a.acumulado_em(10)
+    assert all(c.acumulado_em(h) != a.acumulado_em(h) for h in (11, INTERVALO_CHECKPOINT + 1, total))
+
+    # O cache do último cálculo não vaza entre alturas, appends e cópias
+    d = a.copy()
+    d.append(_bloco(total, "x"))
+    a.append(_bloco(total))
+    assert a.acumulado_em(total + 1) == _ledger(total + 1).acumulado_em(total + 1)
+    assert d.acumulado_em(total + 1) == Ledger(list(_ledger(total)) + [_bloco(total, "x")]).acumulado_em(total + 1)
+    assert a.acumulado_em(5) == b.acumulado_em(5) and a.impressao() == (total + 1, a.acumulado_em(total + 1))
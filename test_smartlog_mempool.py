@@ -0,0 +1,113 @@
+# ============================================================
+# Mempool e pipeline de rodadas: cortes, rejeição e métricas
+# ============================================================
+
+import pytest
+
+from smartlog_blockchain import criar_blockchain_inicial, criar_nos, simular_chaves_privadas
+from smartlog_mempool import Mempool, PipelineConsenso
+
+
+class _Relogio:
+    """Relógio controlado pelo teste (segundos)."""
+
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+def _eventos(total, prefixo="E"):
+    return [{"id_entrega": f"{prefixo}{i}"} for i in range(total)]
+
+
+@pytest.fixture
+def relogio():
+    return _Relogio()
+
+
+def _pipeline(mempool, quorum=2):
+    nos = criar_nos(criar_blockchain_inicial(), 3)
+    return PipelineConsenso(nos, simular_chaves_privadas(nos), mempool, quorum)
+
+
+def test_corte_por_tamanho_e_por_tempo(relogio):
+    mempool = Mempool(tamanho_bloco=3, tempo_max=0.5, relogio=relogio)
+    mempool.adicionar_varios(_eventos(2))
+    assert not mempool.pronto()
+
+    # Tempo: o mais antigo espera tempo_max → bloco incompleto fica pronto
+    relogio.agora = 0.5
+    assert mempool.pronto()
+    assert mempool.cortar_bloco() == (_eventos(2), [0.0, 0.0])
+
+    # Tamanho: tamanho_bloco eventos, mesmo sem esperar
+    mempool.adicionar_varios(_eventos(4))
+    assert mempool.pronto()
+    eventos, chegadas = mempool.cortar_bloco()
+    assert eventos == _eventos(3) and chegadas == [0.5] * 3 and len(mempool) == 1
+
+
+def test_processar_prontos_nao_corta_bloco_incompleto(relogio):
+    mempool = Mempool(tamanho_bloco=3, tempo_max=0.5, relogio=relogio)
+    mempool.adicionar_varios(_eventos(7))
+    pipeline = _pipeline(mempool)
+
+    # Dois blocos cheios; o terceiro (1 evento) ainda não venceu
+    assert pipeline.processar_prontos(max_propostas=5) == 2
+    assert len(mempool) == 1
+
+    relogio.agora = 0.5
+    assert pipeline.processar_prontos(max_propostas=5) == 1
+    assert len(mempool) == 0 and pipeline.eventos == 7
+
+
+def test_drenar_confirma_incompletos_e_encadeia(relogio):
+    mempool = Mempool(tamanho_bloco=4, relogio=relogio)
+    mempool.adicionar_varios(_eventos(10))
+    pipeline = _pipeline(mempool)
+
+    assert pipeline.drenar(max_propostas=2) == 3
+    assert len(mempool) == 0
+    ledger = pipeline.nos["Node_A"]
+    assert len(ledger) == 4 and all(pipeline.nos[n].ultimo_hash == ledger.ultimo_hash for n in pipeline.nos)
+
+
+def test_bloco_rejeitado_volta_para_a_mempool(relogio):
+    mempool = Mempool(tamanho_bloco=3, relogio=relogio)
+    mempool.adicionar_varios(_eventos(2, "A"))
+    relogio.agora = 1.0
+    mempool.adicionar_varios(_eventos(3, "B"))
+    pipeline = _pipeline(mempool, quorum=4)    # 3 nós: quorum impossível
+
+    assert pipeline.drenar(max_propostas=3) == 0
+    assert pipeline.rejeitados == 1 and pipeline.blocos == 0
+
+    # Nada se perde: mesma ordem e mesmos instantes de chegada
+    assert len(mempool) == 5
+    assert mempool.cortar_bloco() == (_eventos(2, "A") + _eventos(1, "B"), [0.0, 0.0, 1.0])
+    assert pipeline.metricas()["pendentes"] == 2
+
+    # Com quorum possível, os eventos devolvidos são confirmados
+    pipeline.quorum = 2
+    mempool.devolver(_eventos(2, "A") + _eventos(1, "B"), [0.0, 0.0, 1.0])
+    assert pipeline.drenar() == 2 and pipeline.eventos == 5
+
+
+def test_metricas_de_vazao_e_latencia(relogio):
+    mempool = Mempool(tamanho_bloco=2, relogio=relogio)
+    mempool.adicionar_varios(_eventos(2))
+    relogio.agora = 1.0
+    mempool.adicionar_varios(_eventos(2))
+    relogio.agora = 2.0
+    pipeline = _pipeline(mempool)
+
+    assert pipeline.drenar() == 2
+    m = pipeline.metricas(duracao=4.0)
+
+    # Latência = commit (t=2) - chegada: 2 s para os dois primeiros, 1 s para os outros
+    assert (m["blocos"], m["eventos"], m["rejeitados"], m["pendentes"]) == (2, 4, 0, 0)
+    assert (m["eventos_s"], m["blocos_s"]) == (1.0, 0.5)
+    assert m["latencia_media_ms"] == 1500.0
+    assert (m["latencia_p50_ms"], m["latencia_p95_ms"], m["latencia_max_ms"]) == (2000.0, 2000.0, 2000.0)
@@ -0,0 +1,54 @@
+# ============================================================
+# Fan-out das propostas: só votos validados encerram a rodada
+# ============================================================
+
+import time
+
+import smartlog_rede
+from smartlog_rede import chaves_publicas_dos_nos, enviar_para_nos, mapa_configurado
+
+NOS = {"Node_A": "http://a", "Node_B": "http://b", "Node_C": "http://c"}
+
+# Node_C responde primeiro, com uma assinatura que não confere
+RESPOSTAS = {
+    "http://a/proposta": (0.05, {"assinatura": "boa_a"}),
+    "http://b/proposta": (0.30, {"assinatura": "boa_b"}),
+    "http://c/proposta": (0.0, {"assinatura": "lixo"}),
+}
+
+
+def _post_simulado(url, payload, timeout):
+    espera, resposta = RESPOSTAS[url]
+    time.sleep(espera)
+    return resposta
+
+
+def test_voto_invalido_nao_conta_para_o_quorum(monkeypatch):
+    monkeypatch.setattr(smartlog_rede, "_post", _post_simulado)
+
+    # Sem validador, o lixo de Node_C + Node_A já fecham o quorum
+    sem_validar = enviar_para_nos(NOS, "/proposta", {}, quorum=2)
+    assert "erro" in sem_validar["Node_B"]
+
+    validos = {"Node_A": "boa_a", "Node_B": "boa_b", "Node_C": "boa_c"}
+    votos = enviar_para_nos(
+        NOS, "/proposta", {}, quorum=2,
+        validar=lambda nome, voto: voto["assinatura"] == validos[nome],
+    )
+    assert votos == {n: RESPOSTAS[u + "/proposta"][1] for n, u in NOS.items()}
+
+
+def test_chaves_configuradas_prevalecem_sobre_o_status(monkeypatch):
+    monkeypatch.setenv("CHAVES_PUBLICAS", "Node_A=aa, Node_X=xx")
+    status = {"http://a": {"chave_publica": "falsa"}, "http://b": {"chave_publica": "bb"}, "http://c": {"erro": "timeout"}}
+    consultados = []
+
+    def consultar(url, rota, params=None, timeout=None):
+        consultados.append(url)
+        return status[url]
+
+    monkeypatch.setattr(smartlog_rede, "consultar_no", consultar)
+
+    chaves = chaves_publicas_dos_nos(NOS, mapa_configurado("CHAVES_PUBLICAS"))
+    assert chaves == {"Node_A": "aa", "Node_B": "bb"}        # Node_C fora do ar: sem chave
+    assert sorted(consultados) == ["http://b", "http://c"]
@@ -0,0 +1,131 @@
+# ============================================================
+# Catch-up em páginas a partir de pares simulados
+# ============================================================
+
+import time
+
+import pytest
+
+import smartlog_sync
+from smartlog_ledger import Ledger
+from smartlog_sync import encadeamento_valido, sincronizar, sincronizar_espelhos
+
+CADEIA = [
+    {"bloco_id": i, "hash_anterior": f"h{i - 1}" if i else "GENESIS", "hash_atual": f"h{i}"}
+    for i in range(50)
+]
+
+
+class _Par:
+    """Nó simulado: serve /status e /blocos com limite de página próprio."""
+
+    def __init__(self, blocos, limite=1000, adulterar=None, atraso=0.0, fora_do_ar=False):
+        self.blocos = blocos
+        self.limite = limite
+        self.adulterar = adulterar    # altura cujo hash_anterior é servido errado
+        self.atraso = atraso
+        self.fora_do_ar = fora_do_ar
+        self.paginas = []
+
+    def responder(self, rota, params):
+        time.sleep(self.atraso)
+        if self.fora_do_ar:
+            return {"erro": "timeout"}
+        if rota == "/status":
+            return {"tamanho": len(self.blocos), "ultimo_hash": self.blocos[-1]["hash_atual"]}
+
+        inicio, fim = params["from"], min(params["to"], params["from"] + self.limite)
+        self.paginas.append((inicio, fim))
+        pagina = [dict(b) for b in self.blocos[inicio:fim]]
+        for b in pagina:
+            if b["bloco_id"] == self.adulterar:
+                b["hash_anterior"] = "forjado"
+        return {"blocos": pagina}
+
+
+@pytest.fixture
+def pares(monkeypatch):
+    registrados = {}
+    monkeypatch.setattr(
+        smartlog_sync, "consultar_no",
+        lambda url, rota, params=None, timeout=None: registrados[url].responder(rota, params),
+    )
+    return registrados
+
+
+def test_pagina_parcial_do_servidor_e_completada(pares):
+    pares["http://a"] = _Par(CADEIA, limite=7)
+    destino = Ledger(CADEIA[:5])
+
+    r = sincronizar(destino, {"Node_A": "http://a"}, tamanho_pagina=20, paginas_em_voo=2)
+
+    assert destino.coluna("hash_atual") == [b["hash_atual"] for b in CADEIA]
+    assert (r["altura_inicial"], r["altura_final"], r["blocos"], r["erros"]) == (5, 50, 45, [])
+    assert all(fim - inicio <= 7 for inicio, fim in pares["http://a"].paginas)
+
+
+def test_encadeamento_invalido_e_pedido_a_outro_par(pares):
+    pares["http://a"] = _Par(CADEIA)
+    pares["http://b"] = _Par(CADEIA, adulterar=15)
+    destino = Ledger()
+
+    r = sincronizar(destino, {"Node_A": "http://a", "Node_B": "http://b"}, tamanho_pagina=10, paginas_em_voo=1)
+
+    assert destino.coluna("hash_atual") == [b["hash_atual"] for b in CADEIA]
+    assert any("Node_B [10, 20): encadeamento inválido" in e for e in r["erros"])
+    assert r["fontes"]["Node_A"] >= 3  # inclui a página refeita
+
+
+def test_pagina_recusada_pelo_validador_e_pedida_a_outro_par(pares):
+    pares["http://a"] = _Par(CADEIA)
+    pares["http://b"] = _Par([dict(b, assinado=b["bloco_id"] != 15) for b in CADEIA])
+    destino = Ledger()
+
+    def validar(blocos, hash_anterior):
+        return None if all(b.get("assinado", True) for b in blocos) else "sem quorum"
+
+    r = sincronizar(destino, {"Node_A": "http://a", "Node_B": "http://b"}, tamanho_pagina=10,
+                    paginas_em_voo=1, validar=validar)
+
+    assert destino.coluna("hash_atual") == [b["hash_atual"] for b in CADEIA]
+    assert r["erros"] == ["Node_B [10, 20): sem quorum"]
+    assert all(b.get("assinado") is not False for b in destino)
+
+
+def test_par_fora_do_ar_cai_para_o_outro_e_desiste_sem_fontes(pares):
+    pares["http://a"] = _Par(CADEIA, fora_do_ar=True)
+    pares["http://b"] = _Par(CADEIA[:30])
+    destino = Ledger()
+
+    r = sincronizar(destino, {"Node_A": "http://a", "Node_B": "http://b"}, tamanho_pagina=10)
+    assert r["altura_final"] == 30 and destino.ultimo_hash == "h29"
+
+    # Único par com a cadeia adulterada: a página é abandonada, nada inválido é gravado
+    pares["http://c"] = _Par(CADEIA, adulterar=35)
+    r = sincronizar(destino, {"Node_C": "http://c"}, tamanho_pagina=10)
+    assert r["altura_final"] == 30 and len(destino) == 30
+
+
+def test_destino_vazio_so_aceita_o_inicio_de_uma_cadeia(pares):
+    assert encadeamento_valido(CADEIA[:10], None)
+    assert not encadeamento_valido(CADEIA[5:10], None)
+
+    # Par que serve uma cadeia sem começo: nada é gravado num destino vazio
+    pares["http://a"] = _Par(CADEIA[5:])
+    destino = Ledger()
+    r = sincronizar(destino, {"Node_A": "http://a"}, tamanho_pagina=10)
+    assert len(destino) == 0 and r["erros"] == ["Node_A [0, 10): encadeamento inválido"]
+
+
+def test_espelhos_sincronizam_em_paralelo(pares):
+    pares["http://a"] = _Par(CADEIA, atraso=0.2, fora_do_ar=True)
+    pares["http://b"] = _Par(CADEIA, atraso=0.2, fora_do_ar=True)
+    pares["http://c"] = _Par(CADEIA)
+    espelhos = {"Node_A": Ledger(), "Node_B": Ledger(), "Node_C": Ledger()}
+
+    t0 = time.perf_counter()
+    relatorios = sincronizar_espelhos(espelhos, {n: f"http://{n[-1].lower()}" for n in espelhos})
+
+    assert time.perf_counter() - t0 < 0.35   # nós fora do ar esperam juntos, não em série
+    assert len(espelhos["Node_C"]) == 50 and relatorios["Node_C"]["blocos"] == 50
+    assert relatorios["Node_A"]["altura_final"] == 0 and len(espelhos["Node_B"]) == 0
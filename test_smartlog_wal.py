@@ -0,0 +1,54 @@
+# ============================================================
+# Log append-only de blocos: final rasgado e replay na partida
+# ============================================================
+
+import os
+
+from smartlog_armazenamento import criar_armazem
+from smartlog_wal import LogBlocos
+
+
+def _bloco(i):
+    return {"bloco_id": i, "hash_anterior": f"h{i - 1}", "hash_atual": f"h{i}", "eventos": "[]"}
+
+
+def test_final_rasgado_e_truncado_e_o_log_continua(tmp_path):
+    caminho = str(tmp_path / "blocos.jsonl")
+    log = LogBlocos(caminho)
+    log.anexar_varios([_bloco(i) for i in range(5)])
+    log.fechar()
+    integro = os.path.getsize(caminho)
+
+    # Queda no meio da escrita: metade de uma linha, sem "\n"
+    with open(caminho, "ab") as f:
+        f.write(b'{"bloco_id":5,"hash_ant')
+
+    reaberto = LogBlocos(caminho)
+    assert reaberto.carregar() == [_bloco(i) for i in range(5)]
+    assert os.path.getsize(caminho) == integro
+
+    reaberto.anexar(_bloco(5))
+    reaberto.fechar()
+    assert LogBlocos(caminho).carregar() == [_bloco(i) for i in range(6)]
+
+
+def test_armazem_em_arquivo_recupera_altura_e_topo_apos_reiniciar(tmp_path):
+    caminho = str(tmp_path / "no.jsonl")
+    armazem = criar_armazem("arquivo", caminho)
+    armazem.anexar_varios_se_novos([_bloco(i) for i in range(10)])
+    armazem.fechar()
+
+    with open(caminho, "ab") as f:
+        f.write(b'{"bloco_id":10,')
+
+    reiniciado = criar_armazem("arquivo", caminho)
+    assert reiniciado.status() == (10, "h9")
+
+    assert reiniciado.anexar_se_novo(_bloco(10)) == (True, 11)
+    assert reiniciado.anexar_se_novo(_bloco(10)) == (False, 11)   # reenvio do mesmo topo
+    reiniciado.fechar()
+
+    final = criar_armazem("arquivo", caminho)
+    assert final.status() == (11, "h10")
+    assert [b["bloco_id"] for b in final.ler_intervalo(8)] == [8, 9, 10]
+    final.fechar()